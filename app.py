@@ -1,31 +1,156 @@
 import streamlit as st
-import uuid
-import os
-import base64
 import logging
-from generate import generate_resume
+import httpx
+from service_client import iter_job_events, pdf_url, submit_job, thumbnail_url
+from src.responses import (
+    EducationItem, EducationResponse,
+    ExperienceItem, ExperienceResponse,
+    ProjectItem, ProjectsResponse,
+    SkillItem, SkillsResponse
+)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
-def display_pdf(pdf_path: str):
+# Width in pixels of the first-page preview
+PREVIEW_WIDTH = 600
+
+def display_pdf(application_id: str):
+    """
+    Display a preview of a generated resume in the Streamlit app.
+
+    The PDF itself never passes through the app: the browser loads the first-page thumbnail
+    and the full PDF directly from the generation service.
+
+    Parameters:
+    application_id (str): The application ID of the generated resume.
+    """
+    st.image(thumbnail_url(application_id), width=PREVIEW_WIDTH)
+    st.link_button("Open full PDF", pdf_url(application_id))
+
+# Response and item models of the LLM sections, used to read their events back from the service
+SECTION_MODELS = {
+    "education": (EducationResponse, EducationItem),
+    "experience": (ExperienceResponse, ExperienceItem),
+    "projects": (ProjectsResponse, ProjectItem),
+    "skills": (SkillsResponse, SkillItem),
+}
+SECTION_STAGES = tuple(SECTION_MODELS)
+
+STAGE_LABELS = {
+    "load": "Resume data",
+    "education": "Education",
+    "experience": "Experience",
+    "projects": "Projects",
+    "skills": "Skills",
+    "latex": "LaTeX sources",
+    "compile": "PDF compile",
+}
+
+def display_section(stage, output):
     """
-    Display a PDF file in the Streamlit app.
+    Display a parsed resume section as soon as it arrives.
 
     Parameters:
-    pdf_path (str): The path to the PDF file.
+    stage (str): The section name.
+    output (BaseModel): The parsed LLM output of the section.
     """
-    # Verify that the PDF file exists
-    if not os.path.exists(pdf_path):
-        logging.error(f"PDF file not found at: {pdf_path}")
-        st.error("The generated PDF file could not be found.")
+    if output is None:
+        st.warning(f"{STAGE_LABELS[stage]} could not be generated.")
         return
+    with st.expander(STAGE_LABELS[stage], expanded=False):
+        if stage == "education":
+            for edu in output.education:
+                st.markdown(f"**{edu.university}** ({edu.duration}) - {edu.degree}")
+                st.caption(", ".join(edu.relevant_coursework))
+        elif stage == "experience":
+            for exp in output.experiences:
+                st.markdown(f"**{exp.role}**, {exp.company} ({exp.duration})")
+                st.markdown("\n".join(f"- {item}" for item in exp.responsibilities))
+        elif stage == "projects":
+            for project in output.projects:
+                st.markdown(f"**{project.title}** - {', '.join(project.skills)}")
+                st.markdown("\n".join(f"- {item}" for item in project.descriptions))
+        elif stage == "skills":
+            for skill in output.skills:
+                st.markdown(f"**{skill.category}:** {', '.join(skill.items)}")
+
+def describe_item(section, item):
+    """
+    Describe a single streamed item of a section in a few words.
+
+    Parameters:
+    section (str): The section the item belongs to.
+    item (BaseModel): The completed item, e.g. an ExperienceItem.
+    """
+    if section == "education":
+        return item.university
+    if section == "experience":
+        return f"{item.role} at {item.company}"
+    if section == "projects":
+        return item.title
+    return item.category
+
+def run_generation(job_description: str, bypass_cache: bool = False):
+    """
+    Submit a resume generation to the service and render each section as soon as it is ready.
+
+    Parameters:
+    job_description (str): The job description to tailor the resume to.
+    bypass_cache (bool): Force fresh LLM samples instead of reusing cached responses.
+
+    Returns:
+    tuple: The application ID and whether a PDF was generated.
+    """
+    timings = []
+    application_id = submit_job(job_description, bypass_cache)
+    logging.info(f"Submitted job with application ID: {application_id}")
+    with st.status("Waiting for a generation worker...", expanded=True) as status:
+        for event in iter_job_events(application_id):
+            stage, output = event["stage"], event["output"]
+            if stage == "status":
+                if output["status"] != "succeeded":
+                    status.update(label="Resume generation failed", state="error")
+                    st.error(f"Resume generation failed: {output['error']}")
+                    return application_id, False
+                continue
+            if stage.endswith(".item"):
+                section = stage.split(".")[0]
+                item = SECTION_MODELS[section][1].model_validate(output)
+                status.write(f"{STAGE_LABELS[section]}: {describe_item(section, item)}")
+                continue
+            timings.append({"Stage": STAGE_LABELS[stage], "Seconds": round(event["seconds"], 2)})
+            if stage == "load":
+                status.update(label="Generating your resume...")
+            elif stage in SECTION_STAGES:
+                status.write(f"{STAGE_LABELS[stage]} ready ({event['seconds']:.1f}s)")
+                display_section(stage, SECTION_MODELS[stage][0].model_validate(output))
+            elif stage == "latex":
+                status.update(label="Compiling PDF...")
+        status.update(label="Resume generated", state="complete", expanded=False)
+    st.session_state.stage_timings = timings
+    return application_id, True
+
+def generate_and_store(job_description: str, bypass_cache: bool = False):
+    """
+    Run a generation and keep its result in the session state.
 
-    # Display the PDF in the app using an iframe
-    with open(pdf_path, "rb") as pdf_file:
-        base64_pdf = base64.b64encode(pdf_file.read()).decode('utf-8')
-        pdf_display = f'<iframe src="data:application/pdf;base64,{base64_pdf}" width="700" height="1000" type="application/pdf"></iframe>'
-        st.markdown(pdf_display, unsafe_allow_html=True)
+    Returns:
+    bool: Whether a PDF was generated.
+    """
+    try:
+        application_id, succeeded = run_generation(job_description, bypass_cache)
+    except httpx.HTTPError as e:
+        logging.error(f"Resume generation service request failed: {e}")
+        st.error("The resume generation service is unavailable. Please try again later.")
+        return False
+    if not succeeded:
+        logging.error(f"No PDF was generated for {application_id}")
+        return False
+    # Only the ID is kept per session, the PDF and its preview are served by the service
+    st.session_state.application_id = application_id
+    logging.info(f"Resume generated for {application_id}")
+    return True
 
 def main():
     st.title("Resume Generator")
@@ -35,8 +160,8 @@ def main():
     job_description = st.text_area("Job Description", placeholder="Enter the job description here...")
 
     # Initialize session state for resume generation
-    if "pdf_path" not in st.session_state:
-        st.session_state.pdf_path = None
+    if "application_id" not in st.session_state:
+        st.session_state.application_id = None
 
     # Placeholder for PDF display
     pdf_placeholder = st.empty()
@@ -45,61 +170,31 @@ def main():
     if st.button("Generate Resume"):
         if not job_description.strip():
             st.error("Please enter a job description.")
-        else:
-            # Generate a unique UUID for the application ID
-            application_id = str(uuid.uuid4())
-            logging.info(f"Generated application ID: {application_id}")
-
-            # Generate the resume
-            with st.spinner("Generating your resume..."):
-                st.session_state.pdf_path = generate_resume(job_description, application_id)
-                logging.info(f"Resume generated and saved at: {st.session_state.pdf_path}")
-
+        elif generate_and_store(job_description):
             st.success("Resume generated successfully!")
 
     # Display the resume if it has been generated
-    if st.session_state.pdf_path:
-        logging.info(f"Attempting to display PDF from: {st.session_state.pdf_path}")
-        # Verify that the PDF file exists
-        if os.path.exists(st.session_state.pdf_path):
-            logging.info("PDF file exists. Displaying...")
-            st.write("### Your Resume")
-            with open(st.session_state.pdf_path, "rb") as pdf_file:
-                st.download_button(
-                    label="Download Resume",
-                    data=pdf_file,
-                    file_name="resume.pdf",
-                    mime="application/pdf"
-                )
-
-            # Display the PDF in the app using an iframe
-            st.write("### Preview")
-            pdf_placeholder.empty()  # Clear the previous PDF display
-            display_pdf(st.session_state.pdf_path)
-        else:
-            logging.error(f"PDF file not found at: {st.session_state.pdf_path}")
-            st.error("The generated PDF file could not be found.")
+    if st.session_state.application_id:
+        st.write("### Your Resume")
+        st.link_button("Download Resume", pdf_url(st.session_state.application_id, download=True))
+
+        if st.session_state.get("stage_timings"):
+            with st.expander("Stage timings"):
+                st.table(st.session_state.stage_timings)
+
+        st.write("### Preview")
+        pdf_placeholder.empty()  # Clear the previous PDF display
+        display_pdf(st.session_state.application_id)
 
         # Regenerate Resume button
         if st.button("Regenerate Resume"):
             if not job_description.strip():
                 st.error("Please enter a job description.")
-            else:
-                # Generate a new UUID for the application ID
-                application_id = str(uuid.uuid4())
-                logging.info(f"Regenerating resume with new application ID: {application_id}")
-
-                # Regenerate the resume
-                with st.spinner("Regenerating your resume..."):
-                    st.session_state.pdf_path = generate_resume(job_description, application_id)
-                    logging.info(f"Resume regenerated and saved at: {st.session_state.pdf_path}")
-
+            # Bypass the response cache so regenerating gives a fresh sample
+            elif generate_and_store(job_description, bypass_cache=True):
                 st.success("Resume regenerated successfully!")
-
-                # Update the PDF display
-                if os.path.exists(st.session_state.pdf_path):
-                    pdf_placeholder.empty()  # Clear the previous PDF display
-                    display_pdf(st.session_state.pdf_path)
+                pdf_placeholder.empty()  # Clear the previous PDF display
+                display_pdf(st.session_state.application_id)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
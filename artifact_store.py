@@ -0,0 +1,523 @@
+"""
+Storage of the generated artifacts of every application ID.
+
+Generations are written to a local working directory (OUTPUT_BASE_PATH, one directory per
+application ID) because TeX needs a file system. Once a PDF was compiled, the ArtifactStore
+drops the build intermediates (latex_src with its .tex and .aux files) and keeps only the
+artifacts in KEPT_ARTIFACTS on a backend: the local file system, or an S3-compatible bucket
+(AWS S3, MinIO, moto's server, ...) given as s3://bucket/prefix. Maintenance bounds the store:
+jobs older than a cutoff are packed into compressed tar archives that are indexed by
+application ID, and whole jobs and archives are deleted, oldest first, beyond a maximum age or
+total size.
+
+Usage:
+    python artifact_store.py --compact-after-days 7 --max-age-days 90 --max-size-mb 2048
+    ARTIFACT_STORE_URL=s3://resumes/artifacts ARTIFACT_S3_ENDPOINT_URL=http://127.0.0.1:9000 \\
+        python artifact_store.py --compact-after-days 7
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import shutil
+import tarfile
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from src.config import load_env
+from src.metrics import span
+from utils import remove_build_intermediates
+
+try:
+    import boto3
+except ImportError:
+    boto3 = None
+
+load_env()
+
+ARTIFACT_STORE_URL = os.getenv("ARTIFACT_STORE_URL", "")
+ARTIFACT_S3_ENDPOINT_URL = os.getenv("ARTIFACT_S3_ENDPOINT_URL") or None
+ARTIFACTS_DIR = "artifacts"
+# Application IDs name directories and object keys: UUIDs or slugs, with dots only between other characters
+APPLICATION_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]+(\.[A-Za-z0-9_-]+)*")
+# Everything else in a job directory is a build intermediate and dropped after a successful compile
+KEPT_ARTIFACTS = ("resume.pdf", "model_outputs.json", "thumbnail.png")
+# Key prefix of the compacted archives and of the index mapping application IDs to them
+ARCHIVE_PREFIX = "archives/"
+ARCHIVE_INDEX_KEY = "archives/index.json"
+# Top-level names of the store that are not jobs, so they can never be application IDs
+RESERVED_APPLICATION_IDS = frozenset({ARCHIVE_PREFIX.rstrip("/")})
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+def check_application_id(application_id):
+    """
+    Rejects application IDs that are unsafe as a directory name or an object key prefix.
+
+    Parameters:
+    application_id (str): The application ID to check.
+
+    Returns:
+    str: The application ID.
+
+    Raises:
+    ValueError: If the ID is empty, contains anything but letters, digits, "_", "-" and dots
+    between them, e.g. a path separator or "..", or is reserved like "archives".
+    """
+    if not is_application_id(application_id):
+        raise ValueError(f"Invalid application ID {application_id!r}")
+    return application_id
+
+
+def is_application_id(name):
+    """Whether a name is a valid application ID, see check_application_id."""
+    return (
+        isinstance(name, str) and APPLICATION_ID_PATTERN.fullmatch(name) is not None
+        and name not in RESERVED_APPLICATION_IDS
+    )
+
+
+def job_key(application_id, file_name):
+    """Returns the object key of an artifact of a job."""
+    return f"{check_application_id(application_id)}/{file_name}"
+
+
+@dataclass
+class StoredObject:
+    key: str
+    size: int
+    modified: float
+
+
+class LocalBackend:
+    """
+    Stores artifacts as files below a root directory, keys being relative paths.
+
+    Parameters:
+    root (str): The directory the keys are relative to.
+    """
+
+    name = "local"
+
+    def __init__(self, root):
+        self.root = root
+
+    def path_for(self, key):
+        return os.path.join(self.root, *key.split("/"))
+
+    def put(self, key, local_path):
+        """Upload the file at local_path under key."""
+        path = self.path_for(key)
+        if os.path.abspath(path) == os.path.abspath(local_path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        shutil.copyfile(local_path, tmp_path)
+        os.replace(tmp_path, path)
+
+    def get(self, key, local_path):
+        """
+        Download key to local_path.
+
+        Returns:
+        bool: Whether the key exists.
+        """
+        path = self.path_for(key)
+        if not os.path.exists(path):
+            return False
+        if os.path.abspath(path) != os.path.abspath(local_path):
+            os.makedirs(os.path.dirname(os.path.abspath(local_path)), exist_ok=True)
+            shutil.copyfile(path, local_path)
+        return True
+
+    def exists(self, key):
+        return os.path.exists(self.path_for(key))
+
+    def delete(self, keys):
+        """Delete keys and the directories they leave empty."""
+        directories = set()
+        for key in keys:
+            try:
+                os.remove(self.path_for(key))
+            except FileNotFoundError:
+                pass
+            directories.add(os.path.dirname(self.path_for(key)))
+        # Deepest first, so nested empty directories are removed bottom up
+        for directory in sorted(directories, key=len, reverse=True):
+            while os.path.abspath(directory) != os.path.abspath(self.root):
+                try:
+                    os.rmdir(directory)
+                except OSError:
+                    break
+                directory = os.path.dirname(directory)
+
+    def list(self, prefix=""):
+        """Yield a StoredObject for every key starting with prefix."""
+        for directory, _, file_names in os.walk(self.root):
+            for file_name in file_names:
+                path = os.path.join(directory, file_name)
+                key = os.path.relpath(path, self.root).replace(os.sep, "/")
+                if not key.startswith(prefix):
+                    continue
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield StoredObject(key, stat.st_size, stat.st_mtime)
+
+
+class S3Backend:
+    """
+    Stores artifacts in an S3-compatible bucket under a key prefix.
+
+    Requires boto3. Credentials are resolved by boto3 as usual (environment, config files,
+    instance roles). endpoint_url points the client at another S3 implementation, e.g. a local
+    MinIO or moto server for testing.
+
+    Parameters:
+    bucket (str): The bucket name.
+    prefix (str): Key prefix of all artifacts, e.g. "resumes/".
+    endpoint_url (str, optional): URL of an S3-compatible endpoint other than AWS.
+    client (optional): A preconfigured boto3 S3 client.
+    """
+
+    name = "s3"
+
+    def __init__(self, bucket, prefix="", endpoint_url=ARTIFACT_S3_ENDPOINT_URL, client=None):
+        if client is None:
+            if boto3 is None:
+                raise RuntimeError("The S3 artifact store requires boto3, install it with `pipenv install --categories s3`")
+            client = boto3.client("s3", endpoint_url=endpoint_url)
+        self.bucket = bucket
+        self.prefix = prefix.strip("/") + "/" if prefix.strip("/") else ""
+        self.client = client
+
+    def put(self, key, local_path):
+        self.client.upload_file(local_path, self.bucket, self.prefix + key)
+
+    def get(self, key, local_path):
+        if not self.exists(key):
+            return False
+        os.makedirs(os.path.dirname(os.path.abspath(local_path)), exist_ok=True)
+        self.client.download_file(self.bucket, self.prefix + key, local_path)
+        return True
+
+    def exists(self, key):
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self.prefix + key)
+        except self.client.exceptions.ClientError as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+        return True
+
+    def delete(self, keys):
+        keys = list(keys)
+        # DeleteObjects accepts at most 1000 keys per request
+        for start in range(0, len(keys), 1000):
+            self.client.delete_objects(
+                Bucket=self.bucket,
+                Delete={"Objects": [{"Key": self.prefix + key} for key in keys[start:start + 1000]], "Quiet": True}
+            )
+
+    def list(self, prefix=""):
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix + prefix):
+            for entry in page.get("Contents", []):
+                yield StoredObject(entry["Key"][len(self.prefix):], entry["Size"], entry["LastModified"].timestamp())
+
+
+class ArtifactStore:
+    """
+    Keeps the artifacts of every application ID on a backend and bounds their footprint.
+
+    Jobs are stored as <application_id>/<artifact> keys. Compacted jobs live in
+    archives/<timestamp>.tar.gz, and archives/index.json maps their application IDs to the
+    archive, so fetch still finds them. Maintenance only touches jobs and archives: top-level
+    files, directories whose name is not an application ID and directories without any of
+    KEPT_ARTIFACTS are left alone. Compaction and retention are maintenance operations and must
+    not run concurrently with each other.
+
+    Parameters:
+    backend (LocalBackend or S3Backend): Where the artifacts are kept.
+    work_dir (str): Local directory the pipeline writes the job directories to.
+    """
+
+    def __init__(self, backend, work_dir=ARTIFACTS_DIR):
+        self.backend = backend
+        self.work_dir = work_dir
+
+    @property
+    def is_local(self):
+        """Whether the backend keeps the artifacts in the working directory itself."""
+        return isinstance(self.backend, LocalBackend) and os.path.abspath(self.backend.root) == os.path.abspath(self.work_dir)
+
+    def job_dir(self, application_id):
+        return os.path.join(self.work_dir, check_application_id(application_id))
+
+    def finalize(self, application_id, keep_sources=False):
+        """
+        Reduce a compiled job to its kept artifacts and store them on the backend.
+
+        Does nothing unless the job has a resume.pdf. With a remote backend the local job
+        directory is removed once uploaded, fetch downloads artifacts again on demand.
+
+        Parameters:
+        application_id (str): The application ID of the job.
+        keep_sources (bool): Keep the latex_src directory, e.g. to debug templates.
+
+        Returns:
+        bool: Whether the job was finalized.
+        """
+        job_dir = self.job_dir(application_id)
+        if not os.path.exists(os.path.join(job_dir, "resume.pdf")):
+            return False
+        with span("artifact.finalize", backend=self.backend.name):
+            remove_build_intermediates(job_dir)
+            if not keep_sources:
+                shutil.rmtree(os.path.join(job_dir, "latex_src"), ignore_errors=True)
+            if self.is_local:
+                return True
+            for file_name in KEPT_ARTIFACTS:
+                path = os.path.join(job_dir, file_name)
+                if os.path.exists(path):
+                    self.backend.put(job_key(application_id, file_name), path)
+            if not keep_sources:
+                shutil.rmtree(job_dir, ignore_errors=True)
+        return True
+
+    def save(self, application_id, file_name):
+        """Store an artifact that was added to a finalized job, e.g. its thumbnail."""
+        path = os.path.join(self.job_dir(application_id), file_name)
+        if not self.is_local:
+            self.backend.put(job_key(application_id, file_name), path)
+
+    def exists(self, application_id, file_name="resume.pdf"):
+        """Whether the store has an artifact of a job, including compacted jobs."""
+        if os.path.exists(os.path.join(self.job_dir(application_id), file_name)):
+            return True
+        if self.backend.exists(job_key(application_id, file_name)):
+            return True
+        return application_id in self.load_index()
+
+    def fetch(self, application_id, file_name):
+        """
+        Make an artifact of a job available in the working directory.
+
+        Parameters:
+        application_id (str): The application ID of the job.
+        file_name (str): The artifact, e.g. "resume.pdf".
+
+        Returns:
+        str: The local path of the artifact, or None if the store does not have it.
+        """
+        path = os.path.join(self.job_dir(application_id), file_name)
+        if os.path.exists(path):
+            return path
+        if self.backend.get(job_key(application_id, file_name), path):
+            return path
+        if self.restore(application_id) and os.path.exists(path):
+            return path
+        return None
+
+    def load_index(self):
+        """Return the mapping of compacted application IDs to the key of their archive."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "index.json")
+            if not self.backend.get(ARCHIVE_INDEX_KEY, path):
+                return {}
+            with open(path) as f:
+                return json.load(f)
+
+    def _save_index(self, index):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "index.json")
+            with open(path, "w") as f:
+                json.dump(index, f, sort_keys=True)
+            self.backend.put(ARCHIVE_INDEX_KEY, path)
+
+    def restore(self, application_id):
+        """
+        Extract a compacted job into the working directory.
+
+        Returns:
+        bool: Whether the job was found in an archive.
+        """
+        archive_key = self.load_index().get(check_application_id(application_id))
+        if archive_key is None:
+            return False
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            archive_path = os.path.join(tmp_dir, "archive.tar.gz")
+            if not self.backend.get(archive_key, archive_path):
+                logging.warning(f"Archive {archive_key} of {application_id} is missing")
+                return False
+            with tarfile.open(archive_path, "r:gz") as archive:
+                # Archives only ever contain regular files below <application_id>/
+                members = [
+                    member for member in archive.getmembers()
+                    if member.isfile() and member.name.startswith(f"{application_id}/") and ".." not in member.name.split("/")
+                ]
+                archive.extractall(self.work_dir, members=members)
+        # The restored job was just used, so the next compaction must not pack it again right away
+        now = time.time()
+        for member in members:
+            os.utime(os.path.join(self.work_dir, *member.name.split("/")), (now, now))
+        return True
+
+    def list_jobs(self):
+        """
+        Group the stored objects into jobs and archives.
+
+        Returns:
+        dict: Maps every application ID and archive key to its total size in bytes, the
+        modification time of its newest object and its StoredObjects. Archives age from the
+        time they were packed.
+        """
+        units = {}
+        for stored in self.backend.list():
+            if stored.key.startswith(ARCHIVE_PREFIX):
+                if stored.key == ARCHIVE_INDEX_KEY:
+                    continue
+                unit = stored.key
+            else:
+                unit, _, file_name = stored.key.partition("/")
+                # Top-level files like the batch manifest and foreign directories are not jobs
+                if not file_name or not is_application_id(unit):
+                    continue
+            entry = units.setdefault(unit, {"size": 0, "modified": 0.0, "objects": []})
+            entry["size"] += stored.size
+            entry["modified"] = max(entry["modified"], stored.modified)
+            entry["objects"].append(stored)
+        # Neither is a directory the pipeline never stored an artifact in
+        return {
+            unit: entry for unit, entry in units.items()
+            if unit.startswith(ARCHIVE_PREFIX)
+            or any(stored.key.split("/", 1)[1] in KEPT_ARTIFACTS for stored in entry["objects"])
+        }
+
+    def compact(self, older_than_seconds, now=None):
+        """
+        Pack every job not modified for older_than_seconds into one compressed archive.
+
+        Parameters:
+        older_than_seconds (float): Minimum age of the jobs to pack.
+        now (float, optional): Current time, defaults to time.time().
+
+        Returns:
+        str: The key of the new archive, or None if no job was old enough.
+        """
+        now = time.time() if now is None else now
+        jobs = {
+            unit: entry for unit, entry in self.list_jobs().items()
+            if not unit.startswith(ARCHIVE_PREFIX) and now - entry["modified"] >= older_than_seconds
+        }
+        if not jobs:
+            return None
+        stamp = datetime.fromtimestamp(now, timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        archive_key = f"{ARCHIVE_PREFIX}{stamp}-{len(jobs)}.tar.gz"
+        with span("artifact.compact", backend=self.backend.name), tempfile.TemporaryDirectory() as tmp_dir:
+            archive_path = os.path.join(tmp_dir, "archive.tar.gz")
+            with tarfile.open(archive_path, "w:gz") as archive:
+                for entry in jobs.values():
+                    for stored in entry["objects"]:
+                        local_path = os.path.join(tmp_dir, "object")
+                        if not self.backend.get(stored.key, local_path):
+                            continue
+                        # Keep the original modification time in the archive
+                        tarinfo = archive.gettarinfo(local_path, arcname=stored.key)
+                        tarinfo.mtime = stored.modified
+                        with open(local_path, "rb") as f:
+                            archive.addfile(tarinfo, f)
+            self.backend.put(archive_key, archive_path)
+            index = self.load_index()
+            index.update({application_id: archive_key for application_id in jobs})
+            self._save_index(index)
+            # Only delete the originals once the archive and the index point at them
+            self.backend.delete(stored.key for entry in jobs.values() for stored in entry["objects"])
+        logging.info(f"Compacted {len(jobs)} jobs into {archive_key}")
+        return archive_key
+
+    def enforce_retention(self, max_age_seconds=None, max_bytes=None, now=None):
+        """
+        Delete whole jobs and archives that are too old or exceed the size budget.
+
+        Everything not modified for max_age_seconds is deleted, then the oldest remaining jobs
+        and archives until the store fits into max_bytes.
+
+        Parameters:
+        max_age_seconds (float, optional): Maximum age of a job or archive.
+        max_bytes (int, optional): Maximum total size of the store.
+        now (float, optional): Current time, defaults to time.time().
+
+        Returns:
+        list: The deleted application IDs and archive keys.
+        """
+        now = time.time() if now is None else now
+        units = sorted(self.list_jobs().items(), key=lambda item: item[1]["modified"])
+        total_bytes = sum(entry["size"] for _, entry in units)
+        deleted = []
+        for unit, entry in units:
+            too_old = max_age_seconds is not None and now - entry["modified"] > max_age_seconds
+            too_big = max_bytes is not None and total_bytes > max_bytes
+            if not (too_old or too_big):
+                continue
+            self.backend.delete(stored.key for stored in entry["objects"])
+            if not unit.startswith(ARCHIVE_PREFIX) and not self.is_local:
+                # Drop the local copy fetched from the remote backend as well
+                shutil.rmtree(self.job_dir(unit), ignore_errors=True)
+            total_bytes -= entry["size"]
+            deleted.append(unit)
+        archives = {unit for unit in deleted if unit.startswith(ARCHIVE_PREFIX)}
+        if archives:
+            index = self.load_index()
+            self._save_index({key: value for key, value in index.items() if value not in archives})
+        if deleted:
+            logging.info(f"Retention deleted {len(deleted)} jobs and archives")
+        return deleted
+
+
+def create_artifact_store(url=ARTIFACT_STORE_URL, work_dir=ARTIFACTS_DIR, endpoint_url=ARTIFACT_S3_ENDPOINT_URL):
+    """
+    Create the artifact store configured by a URL.
+
+    Parameters:
+    url (str): "s3://bucket/prefix" for an S3-compatible bucket, a directory path, or empty to
+    keep the artifacts in work_dir.
+    work_dir (str): Local directory the pipeline writes the job directories to.
+    endpoint_url (str, optional): URL of an S3-compatible endpoint other than AWS.
+
+    Returns:
+    ArtifactStore: The store.
+    """
+    if url.startswith("s3://"):
+        bucket, _, prefix = url[len("s3://"):].partition("/")
+        return ArtifactStore(S3Backend(bucket, prefix, endpoint_url), work_dir)
+    return ArtifactStore(LocalBackend(url or work_dir), work_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=ARTIFACT_STORE_URL, help="s3://bucket/prefix or a directory (default: artifacts)")
+    parser.add_argument("--endpoint-url", default=ARTIFACT_S3_ENDPOINT_URL, help="S3-compatible endpoint, e.g. a local MinIO")
+    parser.add_argument("--compact-after-days", type=float, help="Pack jobs older than this into an archive")
+    parser.add_argument("--max-age-days", type=float, help="Delete jobs and archives older than this")
+    parser.add_argument("--max-size-mb", type=float, help="Delete the oldest jobs and archives beyond this total size")
+    args = parser.parse_args()
+
+    store = create_artifact_store(args.url, endpoint_url=args.endpoint_url)
+    if args.compact_after_days is not None:
+        archive_key = store.compact(args.compact_after_days * SECONDS_PER_DAY)
+        print(f"Compacted into {archive_key}" if archive_key else "Nothing to compact")
+    if args.max_age_days is not None or args.max_size_mb is not None:
+        deleted = store.enforce_retention(
+            None if args.max_age_days is None else args.max_age_days * SECONDS_PER_DAY,
+            None if args.max_size_mb is None else int(args.max_size_mb * 2 ** 20)
+        )
+        print(f"Deleted {len(deleted)} jobs and archives")
+
+
+if __name__ == "__main__":
+    main()
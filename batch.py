@@ -0,0 +1,275 @@
+"""
+Generate tailored resumes for many job descriptions from the command line.
+
+Job descriptions are read either from a directory (one .txt or .md file per job, the file
+name without its extension is used as the application ID) or from a JSONL file with one
+{"application_id": ..., "job_description": ...} object per line. Jobs without an
+application_id get one derived from the job description, so re-running the same input
+skips the jobs whose resume.pdf is already in the artifact store. Application IDs may only
+contain letters, digits, "_", "-" and dots between them; jobs with other IDs are skipped.
+Build intermediates are dropped after every successful compile, see artifact_store.py.
+
+Usage:
+    python batch.py job_descriptions/ --workers 8
+    python batch.py jobs.jsonl --workers 8 --llm-concurrency 4 --compile-concurrency 4
+    python batch.py jobs.jsonl --metrics-jsonl artifacts/metrics.jsonl --metrics-port 9464
+    python batch.py jobs.jsonl --profile-id jane-doe
+"""
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from artifact_store import ARTIFACT_STORE_URL, check_application_id, create_artifact_store
+from generate import (
+    COMPILE_ENGINE, GENERATION_BACKEND, GENERATION_BACKENDS, OUTPUT_BASE_PATH, generate_resume, get_profile_store
+)
+from latex_engine import COMPILE_ENGINES, CompileQueue
+from src.metrics import HistogramSink, JsonLinesSink, PrometheusSink, add_sink
+from src.router import get_model_router
+
+JOB_FILE_EXTENSIONS = (".txt", ".md")
+
+
+def _valid_application_id(application_id):
+    try:
+        check_application_id(application_id)
+    except ValueError:
+        return False
+    return True
+
+
+def load_jobs(source):
+    """
+    Load job descriptions from a directory or a JSONL file.
+
+    Parameters:
+    source (str): Path to a directory of job description files or to a JSONL file.
+
+    Returns:
+    list: (application_id, job_description) tuples in input order, with unique application IDs.
+    Repeated JSONL records are dropped, and records that reuse another job's application ID
+    get a "-2", "-3", ... suffix.
+    """
+    jobs = []
+    if os.path.isdir(source):
+        for file_name in sorted(os.listdir(source)):
+            application_id, extension = os.path.splitext(file_name)
+            if extension not in JOB_FILE_EXTENSIONS:
+                continue
+            if not _valid_application_id(application_id):
+                logging.warning(f"Skipping {file_name}: invalid application ID {application_id!r}")
+                continue
+            with open(os.path.join(source, file_name), "r") as f:
+                jobs.append((application_id, f.read()))
+        return jobs
+
+    descriptions = {}
+    with open(source, "r") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            job_description = record.get("job_description", "")
+            if not job_description.strip():
+                logging.warning(f"Skipping line {line_number} of {source}: empty job description")
+                continue
+            application_id = str(record.get("application_id") or uuid.uuid5(uuid.NAMESPACE_OID, job_description))
+            if not _valid_application_id(application_id):
+                logging.warning(f"Skipping line {line_number} of {source}: invalid application ID {application_id!r}")
+                continue
+            if application_id in descriptions:
+                if descriptions[application_id] == job_description:
+                    logging.warning(f"Skipping line {line_number} of {source}: duplicate of job {application_id}")
+                    continue
+                # Jobs sharing an ID would build in the same directory, so the later ones get a suffix
+                suffix = 2
+                while f"{application_id}-{suffix}" in descriptions:
+                    suffix += 1
+                logging.warning(
+                    f"Line {line_number} of {source} reuses application ID {application_id}, "
+                    f"using {application_id}-{suffix}"
+                )
+                application_id = f"{application_id}-{suffix}"
+            descriptions[application_id] = job_description
+            jobs.append((application_id, job_description))
+    return jobs
+
+
+def pdf_path_for(application_id):
+    """Return the path of the PDF generated for an application ID."""
+    return f"{OUTPUT_BASE_PATH}/{application_id}/resume.pdf"
+
+
+def run_job(
+    application_id, job_description, llm_limiter, compile_queue, backend=GENERATION_BACKEND, artifact_store=None,
+    profile_id=None
+):
+    """
+    Generate the resume for a single job and describe the outcome.
+
+    With an artifact_store, a compiled job is reduced to its kept artifacts and stored.
+
+    Returns:
+    dict: The manifest record of the job.
+    """
+    start = time.perf_counter()
+    record = {"application_id": application_id}
+    try:
+        pdf_path = generate_resume(
+            job_description, application_id,
+            llm_limiter=llm_limiter, compile_queue=compile_queue, backend=backend, profile_id=profile_id
+        )
+        if os.path.exists(pdf_path):
+            record.update(status="succeeded", pdf_path=pdf_path)
+            if artifact_store is not None:
+                artifact_store.finalize(application_id)
+        else:
+            record.update(status="failed", error="PDF compilation did not produce a PDF")
+    except Exception as e:
+        logging.exception(f"Resume generation failed for {application_id}")
+        record.update(status="failed", error=f"{type(e).__name__}: {e}")
+    record["seconds"] = round(time.perf_counter() - start, 3)
+    return record
+
+
+def run_batch(
+    jobs, manifest_path, workers=4, llm_concurrency=4, compile_concurrency=None,
+    compile_engine=COMPILE_ENGINE, backend=GENERATION_BACKEND, artifact_store=None, profile_id=None
+):
+    """
+    Generate resumes for all jobs on a bounded worker pool.
+
+    LLM calls are throttled by a semaphore and PDF compiles run on a separate process pool,
+    so a burst of compiles does not hold back the API calls of other jobs and vice versa.
+    Jobs whose PDF already exists are skipped. One record per job is appended to the
+    manifest as soon as the job finishes.
+
+    Parameters:
+    jobs (list): (application_id, job_description) tuples.
+    manifest_path (str): JSONL file the per-job status records are appended to.
+    workers (int): Number of jobs processed at once.
+    llm_concurrency (int): Number of jobs allowed in the LLM stage at once.
+    compile_concurrency (int, optional): Number of PDF compiles allowed at once. Defaults to the CPU count.
+    compile_engine (str): LaTeX engine used by the compile process pool.
+    backend (str): Tailoring backend passed to generate_resume, see GENERATION_BACKENDS.
+    artifact_store (ArtifactStore, optional): Where finished jobs are kept. Defaults to the
+    store configured by ARTIFACT_STORE_URL.
+    profile_id (str, optional): Stored candidate profile every job is tailored from. Its ID
+    prefixes the application IDs, so the same jobs can be run for several candidates.
+
+    Returns:
+    dict: Number of jobs per status.
+    """
+    artifact_store = artifact_store or create_artifact_store(work_dir=OUTPUT_BASE_PATH)
+    if profile_id is not None:
+        jobs = [(f"{profile_id}-{application_id}", job_description) for application_id, job_description in jobs]
+    llm_limiter = threading.Semaphore(llm_concurrency)
+    manifest_lock = threading.Lock()
+    counts = {"succeeded": 0, "failed": 0, "skipped": 0}
+
+    if os.path.dirname(manifest_path):
+        os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+
+    def record_result(record):
+        record["finished_at"] = datetime.now(timezone.utc).isoformat()
+        with manifest_lock:
+            counts[record["status"]] += 1
+            with open(manifest_path, "a") as manifest:
+                manifest.write(json.dumps(record) + "\n")
+        logging.info(f"[{sum(counts.values())}/{len(jobs)}] {record['application_id']}: {record['status']}")
+
+    pending = []
+    for application_id, job_description in jobs:
+        if artifact_store.exists(application_id):
+            record_result({"application_id": application_id, "status": "skipped", "pdf_path": pdf_path_for(application_id)})
+        else:
+            pending.append((application_id, job_description))
+
+    if not pending:
+        return counts
+
+    with CompileQueue(compile_concurrency, compile_engine) as compile_queue, \
+            ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(
+                run_job, application_id, job_description, llm_limiter, compile_queue, backend, artifact_store, profile_id
+            )
+            for application_id, job_description in pending
+        ]
+        for future in as_completed(futures):
+            record_result(future.result())
+
+    return counts
+
+
+def print_stage_summary(histogram):
+    """Print the count, p50, p95 and token totals of every recorded span."""
+    print(
+        f"{'span':<18} {'labels':<44} {'count':>6} {'p50':>9} {'p95':>9} {'tokens in/out':>15} {'cached in':>10}"
+    )
+    for row in histogram.summary():
+        labels = ",".join(f"{key}={value}" for key, value in row["labels"].items())
+        tokens = f"{row['prompt_tokens']}/{row['completion_tokens']}" if "prompt_tokens" in row else ""
+        cached = str(row.get("cached_prompt_tokens", ""))
+        print(
+            f"{row['span']:<18} {labels[:44]:<44} {row['count']:>6} "
+            f"{row['p50']:>8.3f}s {row['p95']:>8.3f}s {tokens:>15} {cached:>10}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="Directory of job description files or a JSONL file")
+    parser.add_argument("--workers", type=int, default=4, help="Number of jobs processed at once")
+    parser.add_argument("--llm-concurrency", type=int, default=4, help="Number of jobs in the LLM stage at once")
+    parser.add_argument(
+        "--compile-concurrency", type=int, default=None,
+        help="Number of PDF compiles at once (default: number of CPUs)"
+    )
+    parser.add_argument("--compile-engine", choices=COMPILE_ENGINES, default=COMPILE_ENGINE)
+    parser.add_argument(
+        "--backend", choices=GENERATION_BACKENDS, default=GENERATION_BACKEND,
+        help="Tailor with the LLM, with the local offline engine, or with the LLM falling back to offline"
+    )
+    parser.add_argument(
+        "--artifact-store", default=ARTIFACT_STORE_URL,
+        help=f"s3://bucket/prefix or a directory to keep finished jobs in (default: {OUTPUT_BASE_PATH})"
+    )
+    parser.add_argument("--profile-id", help="Stored candidate profile to tailor (default: assets/resume.yaml)")
+    parser.add_argument("--metrics-jsonl", help="Append every timing span to this JSON lines file")
+    parser.add_argument("--metrics-port", type=int, help="Serve Prometheus metrics on this port while the batch runs")
+    parser.add_argument(
+        "--manifest", default=f"{OUTPUT_BASE_PATH}/batch_manifest.jsonl",
+        help="JSONL file the per-job status records are appended to"
+    )
+    args = parser.parse_args()
+    if args.profile_id is not None and args.profile_id not in get_profile_store():
+        parser.error(f"Unknown profile {args.profile_id!r}, ingest it with ingest_profiles.py first")
+
+    histogram = add_sink(HistogramSink())
+    if args.metrics_jsonl:
+        add_sink(JsonLinesSink(args.metrics_jsonl))
+    if args.metrics_port is not None:
+        add_sink(PrometheusSink()).serve(args.metrics_port)
+
+    jobs = load_jobs(args.source)
+    logging.info(f"Loaded {len(jobs)} job descriptions from {args.source}")
+    counts = run_batch(
+        jobs, args.manifest, args.workers, args.llm_concurrency, args.compile_concurrency,
+        args.compile_engine, args.backend, create_artifact_store(args.artifact_store, work_dir=OUTPUT_BASE_PATH),
+        args.profile_id
+    )
+    print(f"Succeeded: {counts['succeeded']}, failed: {counts['failed']}, skipped: {counts['skipped']}")
+    tiers = get_model_router().tier_counts()
+    print("Section calls per model tier: " + ", ".join(f"{tier} {calls}" for tier, calls in tiers.items()))
+    print(f"Manifest written to {args.manifest}")
+    print_stage_summary(histogram)
+
+
+if __name__ == "__main__":
+    main()
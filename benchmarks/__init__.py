@@ -0,0 +1,17 @@
+"""
+Benchmarks of the resume generation pipeline.
+
+Every benchmark runs against a local fake of the OpenAI API, either the in-process
+fake_openai client or the HTTP mock_openai_server, and replays the canned model outputs under
+benchmarks/data/, so results are reproducible without an API key. Run them from the repository root:
+
+    python -m benchmarks.bench_end_to_end      # throughput, stage percentiles and peak memory
+    python -m benchmarks.bench_sections        # sequential versus concurrent section calls
+    python -m benchmarks.bench_streaming       # time to first streamed item
+    python -m benchmarks.bench_one_shot        # per-section versus one-shot tokens and latency
+    python -m benchmarks.bench_prompt_cache    # provider prompt prefix caching per prompt layout
+    python -m benchmarks.bench_prompt_tokens   # prompt tokens of the resume sections per encoding
+    python -m benchmarks.bench_scheduler       # rate limit scheduler under injected 429s
+    python -m benchmarks.bench_latex           # LaTeX compile engines
+    python -m benchmarks.bench_templates       # section template rendering
+"""
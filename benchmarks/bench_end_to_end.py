@@ -0,0 +1,165 @@
+"""
+End-to-end benchmark of generate.generate_resume against the in-process fake OpenAI client.
+
+Runs the full pipeline (resume load, LLM sections, LaTeX rendering and writing, and optionally
+the PDF compile) for 1, 10 and 100 concurrent generations, with and without PDF compilation.
+LLM calls replay the pinned benchmarks/data/<id>/model_outputs.json after a fixed latency, so results
+are reproducible and only depend on the code under test. For every scenario it reports the
+throughput, latency percentiles of the whole generation and of each stage span, and the peak
+traced Python memory. --json writes the results to a file for comparison across commits.
+
+Usage:
+    python -m benchmarks.bench_end_to_end
+    python -m benchmarks.bench_end_to_end --concurrency 1 10 --generations 50 --latency 0.2 --json results.json
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("OPENAI_API_KEY", "stub")
+
+import generate
+import src.llm
+from batch import load_jobs
+from benchmarks.fake_openai import AsyncStubCompletions, StubCompletions, load_canned_outputs, stub_client
+from src.cache import ResponseCache
+from src.metrics import HistogramSink, add_sink, remove_sink
+from src.scheduler import RateLimitScheduler
+
+CORPUS_PATH = "benchmarks/data/job_descriptions.jsonl"
+STAGE_SPANS = ("resume.load", "llm.call", "template.render", "file.write", "latex.compile")
+UNBOUNDED = 10 ** 9
+
+
+def install_fake_clients(canned_outputs, latency, jitter):
+    """Route every LLM call of generate.py and src/llm.py to the fake client."""
+    src.llm.set_client(stub_client(StubCompletions(canned_outputs, latency, jitter)))
+    src.llm.set_async_client_factory(lambda: stub_client(AsyncStubCompletions(canned_outputs, latency, jitter)))
+    src.llm.set_response_cache(ResponseCache(":memory:"))
+    for model in ("gpt-4o", "gpt-4o-mini"):
+        # The fake has no quota, keep the scheduler from throttling the measurements
+        src.llm.set_scheduler(model, RateLimitScheduler(UNBOUNDED, UNBOUNDED))
+
+
+def merge_spans(histogram, name):
+    """Pool the durations of every labelled series of a span, sorted."""
+    return sorted(
+        seconds
+        for (span_name, _), durations in histogram.durations.items() if span_name == name
+        for seconds in durations
+    )
+
+
+def percentile(durations, q):
+    if not durations:
+        return None
+    return durations[min(len(durations) - 1, int(q / 100 * len(durations)))]
+
+
+def run_scenario(jobs, concurrency, generations, compile_pdf, generate_kwargs):
+    """
+    Run generations resumes on concurrency threads and measure them.
+
+    Returns:
+    dict: Throughput, generation and stage latency percentiles, and peak memory of the scenario.
+    """
+    histogram = add_sink(HistogramSink())
+    output_base_path = tempfile.mkdtemp(prefix="bench-")
+    generate.OUTPUT_BASE_PATH = output_base_path
+    original_compile = generate.compile_resume_pdf
+    if not compile_pdf:
+        generate.compile_resume_pdf = lambda **kwargs: None
+
+    def run(index):
+        job_id, job_description = jobs[index % len(jobs)]
+        return generate.generate_resume(
+            job_description, f"{job_id}-{index}", bypass_cache=True, **generate_kwargs
+        )
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(run, range(generations)))
+        seconds = time.perf_counter() - start
+        _, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        generate.compile_resume_pdf = original_compile
+        remove_sink(histogram)
+        shutil.rmtree(output_base_path, ignore_errors=True)
+
+    result = {
+        "concurrency": concurrency,
+        "compile": compile_pdf,
+        "generations": generations,
+        "seconds": round(seconds, 3),
+        "throughput": round(generations / seconds, 3),
+        "peak_memory_mb": round(peak_bytes / 2 ** 20, 2),
+        "stages": {},
+    }
+    for name in ("generation",) + STAGE_SPANS:
+        durations = merge_spans(histogram, name)
+        if durations:
+            result["stages"][name] = {
+                "count": len(durations),
+                **{f"p{q}": round(percentile(durations, q), 6) for q in (50, 95, 99)},
+            }
+    return result
+
+
+def print_result(result):
+    generation = result["stages"].get("generation", {})
+    print(
+        f"concurrency {result['concurrency']:>3}  compile {'yes' if result['compile'] else 'no ':<3}  "
+        f"{result['generations']:>4} generations in {result['seconds']:7.2f}s  "
+        f"{result['throughput']:7.2f}/s  p50 {generation.get('p50', 0):.3f}s  p95 {generation.get('p95', 0):.3f}s  "
+        f"peak {result['peak_memory_mb']:.1f} MB"
+    )
+    for name in STAGE_SPANS:
+        stage = result["stages"].get(name)
+        if stage:
+            print(
+                f"    {name:<16} n={stage['count']:<6} p50 {stage['p50'] * 1000:9.3f}ms  "
+                f"p95 {stage['p95'] * 1000:9.3f}ms  p99 {stage['p99'] * 1000:9.3f}ms"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument(
+        "--generations", type=int, default=None,
+        help="Generations per scenario (default: 2x the concurrency, at least 10)"
+    )
+    parser.add_argument("--latency", type=float, default=0.5, help="Simulated seconds per LLM call")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Additional random seconds per LLM call")
+    parser.add_argument("--mode", choices=generate.GENERATION_MODES, default=generate.GENERATION_MODE)
+    parser.add_argument("--no-compile", action="store_true", help="Skip the scenarios with PDF compilation")
+    parser.add_argument("--json", help="Write the results to this file")
+    args = parser.parse_args()
+
+    install_fake_clients(load_canned_outputs(), args.latency, args.jitter)
+    jobs = load_jobs(CORPUS_PATH)
+    results = []
+    for compile_pdf in (False,) if args.no_compile else (False, True):
+        for concurrency in args.concurrency:
+            generations = args.generations or max(10, 2 * concurrency)
+            result = run_scenario(jobs, concurrency, generations, compile_pdf, {"mode": args.mode})
+            print_result(result)
+            results.append(result)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"latency": args.latency, "mode": args.mode, "results": results}, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
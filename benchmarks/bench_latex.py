@@ -0,0 +1,90 @@
+"""
+Benchmark the cold latexmk compile against the precompiled-preamble format compile.
+
+Renders a resume from canned model outputs once and compiles it repeatedly with each engine.
+The one-off format build is reported separately from the per-PDF times.
+
+Usage:
+    python -m benchmarks.bench_latex --runs 5
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+from latex_engine import FormatCompiler
+from src.responses import EducationResponse, ExperienceResponse, HeadingData, ProjectsResponse, SkillsResponse
+from utils import (
+    convert_tex_to_pdf,
+    write_custom_commands_dot_tex,
+    write_education_to_latex,
+    write_experience_to_latex,
+    write_heading_to_latex,
+    write_projects_to_latex,
+    write_resume_dot_tex,
+    write_skills_to_latex,
+)
+
+CANNED_OUTPUTS_PATH = "benchmarks/data/5c2b2828-c059-47db-9fce-ac86e8c4aafb/model_outputs.json"
+SAMPLE_HEADING = HeadingData(
+    name="John Doe", phone="+14161234567", email="john.doe@example.com", linkedin="johndoe123", github="johndoe123"
+)
+
+
+def write_sample_resume(latex_src_path):
+    """Write a complete resume.tex tree from the canned model outputs."""
+    with open(CANNED_OUTPUTS_PATH) as f:
+        outputs = json.load(f)
+    src_path = f"{latex_src_path}/src"
+    os.makedirs(src_path, exist_ok=True)
+    write_resume_dot_tex(latex_src_path)
+    write_custom_commands_dot_tex(latex_src_path)
+    write_heading_to_latex(SAMPLE_HEADING, f"{src_path}/heading.tex")
+    write_education_to_latex(EducationResponse.model_validate(outputs["education"]), f"{src_path}/education.tex")
+    write_skills_to_latex(SkillsResponse.model_validate(outputs["skills"]), f"{src_path}/skills.tex")
+    write_experience_to_latex(ExperienceResponse.model_validate(outputs["experience"]), f"{src_path}/experience.tex")
+    write_projects_to_latex(ProjectsResponse.model_validate(outputs["projects"]), f"{src_path}/projects.tex")
+    return f"{latex_src_path}/resume.tex"
+
+
+def time_runs(compile_func, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        compile_func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    # Paths in resume.tex are relative to the working directory, so build below it
+    work_dir = tempfile.mkdtemp(prefix="bench-latex-", dir=".")
+    try:
+        input_path = write_sample_resume(os.path.relpath(f"{work_dir}/latex_src"))
+        output_path = os.path.relpath(work_dir)
+
+        compiler = FormatCompiler(cache_dir=f"{work_dir}/formats")
+        start = time.perf_counter()
+        compiler.ensure_format()
+        format_build = time.perf_counter() - start
+
+        latexmk = time_runs(lambda: convert_tex_to_pdf(input_path, output_path), args.runs)
+        precompiled = time_runs(lambda: compiler.compile(input_path, output_path), args.runs)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"format build (one-off): {format_build:.3f}s")
+    print(f"latexmk:  median {statistics.median(latexmk):.3f}s  min {min(latexmk):.3f}s")
+    print(f"format:   median {statistics.median(precompiled):.3f}s  min {min(precompiled):.3f}s")
+    print(f"speedup:  {statistics.median(latexmk) / statistics.median(precompiled):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
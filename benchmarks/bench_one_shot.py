@@ -0,0 +1,130 @@
+"""
+Compare the per-section LLM path with the one-shot path on a fixed corpus of job descriptions.
+
+For every job description both paths are run and the input tokens, output tokens, latency and
+cost are reported from the completion usage, every call priced at the model the router picked
+for it. By default requests go to the local mock server, whose token counts are estimates (four
+characters per token); pass --base-url and a real OPENAI_API_KEY to measure the actual API.
+
+Usage:
+    python -m benchmarks.bench_one_shot
+    python -m benchmarks.bench_one_shot --base-url https://api.openai.com/v1
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from types import SimpleNamespace
+
+os.environ.setdefault("OPENAI_API_KEY", "stub")
+
+from openai import AsyncOpenAI
+
+from batch import load_jobs
+from benchmarks.mock_openai_server import start_mock_server
+from generate import (
+    RESUME_FILE_PATH,
+    ainvoke_llm_for_section,
+    ainvoke_sections,
+    build_one_shot_request,
+    build_section_requests,
+    load_resume_sections,
+)
+from src.cache import ResponseCache
+from src.llm import set_response_cache
+from src.prompts import generate_system_prompt
+from src.router import MODEL_PRICES
+
+CORPUS_PATH = "benchmarks/data/job_descriptions.jsonl"
+
+
+class UsageRecordingClient:
+    """Wraps an AsyncOpenAI client and records the usage of every parsed completion."""
+
+    def __init__(self, client):
+        self.client = client
+        self.usages = []
+        self.beta = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(parse=self.parse)))
+
+    async def parse(self, **kwargs):
+        completion = await self.client.beta.chat.completions.parse(**kwargs)
+        self.usages.append((kwargs["model"], completion.usage))
+        return completion
+
+    def totals(self):
+        prompt_tokens = sum(usage.prompt_tokens for _, usage in self.usages)
+        completion_tokens = sum(usage.completion_tokens for _, usage in self.usages)
+        cost = sum(
+            usage.prompt_tokens * MODEL_PRICES[model][0] + usage.completion_tokens * MODEL_PRICES[model][1]
+            for model, usage in self.usages
+        ) / 1_000_000
+        return prompt_tokens, completion_tokens, cost
+
+
+async def run_sections(client, system_prompt, job_description, resume_sections):
+    recorder = UsageRecordingClient(client)
+    start = time.perf_counter()
+    await ainvoke_sections(
+        system_prompt, build_section_requests(job_description, resume_sections), llm_client=recorder, bypass_cache=True
+    )
+    return (time.perf_counter() - start, *recorder.totals())
+
+
+async def run_one_shot(client, system_prompt, job_description, resume_sections):
+    recorder = UsageRecordingClient(client)
+    prompt_func, response_format, kwargs = build_one_shot_request(job_description, resume_sections)
+    start = time.perf_counter()
+    await ainvoke_llm_for_section(system_prompt, prompt_func, response_format, recorder, bypass_cache=True, **kwargs)
+    return (time.perf_counter() - start, *recorder.totals())
+
+
+async def run(base_url, jobs):
+    system_prompt = generate_system_prompt()
+    resume_sections, _ = load_resume_sections(RESUME_FILE_PATH)
+    results = {"sections": [], "one_shot": []}
+    async with AsyncOpenAI(base_url=base_url) as client:
+        for application_id, job_description in jobs:
+            results["sections"].append(await run_sections(client, system_prompt, job_description, resume_sections))
+            results["one_shot"].append(await run_one_shot(client, system_prompt, job_description, resume_sections))
+            sections, one_shot = results["sections"][-1], results["one_shot"][-1]
+            print(
+                f"{application_id:<28} sections {sections[0]:.2f}s {sections[1]:>5} in {sections[2]:>5} out  "
+                f"one-shot {one_shot[0]:.2f}s {one_shot[1]:>5} in {one_shot[2]:>5} out"
+            )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=CORPUS_PATH)
+    parser.add_argument("--base-url", default=None, help="API base URL. Defaults to a local mock server")
+    parser.add_argument("--latency", type=float, default=0.5, help="Mock server time to first token")
+    parser.add_argument("--seconds-per-token", type=float, default=0.002, help="Mock server generation time per token")
+    args = parser.parse_args()
+
+    set_response_cache(ResponseCache(":memory:"))
+    jobs = load_jobs(args.corpus)
+    server = None
+    base_url = args.base_url
+    if base_url is None:
+        server = start_mock_server(latency=args.latency, seconds_per_token=args.seconds_per_token)
+        base_url = server.base_url
+    try:
+        results = asyncio.run(run(base_url, jobs))
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    print()
+    for path, rows in results.items():
+        latencies, prompt_tokens, completion_tokens, costs = zip(*rows)
+        print(
+            f"{path:<9} median latency {statistics.median(latencies):.2f}s  "
+            f"input tokens {sum(prompt_tokens):>7}  output tokens {sum(completion_tokens):>6}  "
+            f"cost ${sum(costs):.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
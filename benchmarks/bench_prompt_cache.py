@@ -0,0 +1,99 @@
+"""
+Measure provider prompt prefix caching with each prompt layout.
+
+Runs the section LLM calls of a corpus of job descriptions against the in-process fake client,
+whose usage reports the tokens a provider-side prefix cache would serve (see
+fake_openai.PrefixCache), and compares the total, cached and uncached input tokens and the
+input cost of the "job_first" and "resume_first" layouts. Providers only cache prompts of at
+least 1024 tokens, far more than a section of the sample resume, so --resume-scale repeats
+every resume item to emulate a larger master resume.
+
+Usage:
+    python -m benchmarks.bench_prompt_cache
+    python -m benchmarks.bench_prompt_cache --resume-scale 1 --no-prerank
+"""
+import argparse
+import os
+
+os.environ.setdefault("OPENAI_API_KEY", "stub")
+
+import generate
+from batch import load_jobs
+from benchmarks.bench_end_to_end import CORPUS_PATH, install_fake_clients
+from benchmarks.fake_openai import load_canned_outputs
+from src.metrics import HistogramSink, add_sink, remove_sink
+from src.prompts import PROMPT_LAYOUTS, generate_system_prompt
+from src.retrieval import build_section_indexes, prerank_sections
+
+# USD per million input tokens for gpt-4o, uncached and cached
+INPUT_PRICE = 2.50
+CACHED_INPUT_PRICE = 1.25
+
+
+def scale_resume(resume_sections, scale):
+    """Repeat every item of the list sections scale times."""
+    return {
+        name: section * scale if isinstance(section, list) else section
+        for name, section in resume_sections.items()
+    }
+
+
+def run_layout(jobs, resume_sections, layout, prerank_top_k):
+    """
+    Run the section calls of every job with one prompt layout.
+
+    Returns:
+    dict: Prompt tokens, cached prompt tokens and input cost over all calls.
+    """
+    install_fake_clients(load_canned_outputs(), latency=0.0, jitter=0.0)
+    histogram = add_sink(HistogramSink())
+    indexes = build_section_indexes(resume_sections)
+    system_prompt = generate_system_prompt()
+    try:
+        for _, job_description in jobs:
+            sections = resume_sections
+            if prerank_top_k:
+                sections = prerank_sections(
+                    job_description, resume_sections, indexes, prerank_top_k,
+                    preserve_order=layout == "resume_first"
+                )
+            generate.invoke_sections(
+                system_prompt, generate.build_section_requests(job_description, sections, layout),
+                concurrent=False, bypass_cache=True
+            )
+    finally:
+        remove_sink(histogram)
+
+    totals = {"prompt_tokens": 0, "cached_prompt_tokens": 0}
+    for (name, _), values in histogram.totals.items():
+        if name == "llm.call":
+            for key in totals:
+                totals[key] += values.get(key, 0)
+    uncached = totals["prompt_tokens"] - totals["cached_prompt_tokens"]
+    totals["cost"] = (uncached * INPUT_PRICE + totals["cached_prompt_tokens"] * CACHED_INPUT_PRICE) / 1_000_000
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resume-scale", type=int, default=8, help="Repeat every resume item this many times")
+    parser.add_argument("--no-prerank", action="store_true", help="Send every resume item instead of the BM25 top-k")
+    args = parser.parse_args()
+
+    jobs = load_jobs(CORPUS_PATH)
+    resume_sections, _ = generate.load_resume_sections(generate.RESUME_FILE_PATH)
+    resume_sections = scale_resume(resume_sections, args.resume_scale)
+    prerank_top_k = None if args.no_prerank else generate.PRERANK_TOP_K
+
+    print(f"{len(jobs)} job descriptions, 4 section calls each, resume scale {args.resume_scale}")
+    for layout in PROMPT_LAYOUTS:
+        totals = run_layout(jobs, resume_sections, layout, prerank_top_k)
+        share = totals["cached_prompt_tokens"] / totals["prompt_tokens"] if totals["prompt_tokens"] else 0.0
+        print(
+            f"{layout:<13} input tokens {totals['prompt_tokens']:>8}  cached {totals['cached_prompt_tokens']:>8} "
+            f"({share:6.1%})  input cost ${totals['cost']:.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
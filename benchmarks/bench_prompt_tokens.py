@@ -0,0 +1,80 @@
+"""
+Count the prompt tokens of the resume sections with each prompt encoding.
+
+Encodes every section of the shipped resume.yaml with the "repr" and "compact" encodings of
+src/serialize.py and reports the tokens of the section text and of the complete section prompt
+(system prompt included) for the first job description of the corpus. Tokens are counted with
+tiktoken's o200k_base encoding, the tokenizer of gpt-4o, when it is installed and its vocabulary
+can be loaded, and otherwise estimated as the number of words and punctuation marks.
+
+Usage:
+    python -m benchmarks.bench_prompt_tokens
+    python -m benchmarks.bench_prompt_tokens --resume path/to/resume.yaml --layout job_first
+"""
+import argparse
+import os
+import re
+
+os.environ.setdefault("OPENAI_API_KEY", "stub")
+
+import generate
+from batch import load_jobs
+from benchmarks.bench_end_to_end import CORPUS_PATH
+from src.prompts import PROMPT_LAYOUTS, generate_system_prompt
+from src.serialize import encode_section
+
+
+def load_token_counter():
+    """
+    Return a function counting the tokens of a text and the name of the method it uses.
+    """
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding("o200k_base")
+        return (lambda text: len(encoding.encode(text))), "tiktoken o200k_base"
+    except Exception:
+        # tiktoken is missing or cannot download its vocabulary
+        pattern = re.compile(r"\w+|[^\w\s]")
+        return (lambda text: len(pattern.findall(text))), "estimate (words and punctuation marks)"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resume", default=generate.RESUME_FILE_PATH, help="Resume YAML file")
+    parser.add_argument("--layout", choices=PROMPT_LAYOUTS, default=generate.PROMPT_LAYOUT)
+    args = parser.parse_args()
+
+    count_tokens, method = load_token_counter()
+    resume_sections, _ = generate.load_resume_sections(args.resume)
+    _, job_description = load_jobs(CORPUS_PATH)[0]
+    system_prompt = generate_system_prompt()
+    print(f"Tokens counted with {method}, {args.layout} layout")
+    print(f"{'section':<12} {'repr':>7} {'compact':>8} {'saved':>7}   {'prompt repr':>11} {'compact':>8} {'saved':>7}")
+
+    totals = {"section": [0, 0], "prompt": [0, 0]}
+    for name, (prompt_func, _, kwargs) in generate.build_section_requests(
+        job_description, resume_sections, args.layout
+    ).items():
+        section_tokens, prompt_tokens = [], []
+        for encoding in ("repr", "compact"):
+            prompt = prompt_func(**dict(kwargs, encoding=encoding))
+            section_key = next(key for key in kwargs if key.startswith("user_"))
+            dedupe_across = ("items",) if name == "skills" else ()
+            section_tokens.append(count_tokens(encode_section(kwargs[section_key], encoding, dedupe_across)))
+            prompt_tokens.append(count_tokens(system_prompt) + count_tokens(prompt))
+        for key, counts in (("section", section_tokens), ("prompt", prompt_tokens)):
+            totals[key][0] += counts[0]
+            totals[key][1] += counts[1]
+        print(
+            f"{name:<12} {section_tokens[0]:>7} {section_tokens[1]:>8} {1 - section_tokens[1] / section_tokens[0]:>7.1%}   "
+            f"{prompt_tokens[0]:>11} {prompt_tokens[1]:>8} {1 - prompt_tokens[1] / prompt_tokens[0]:>7.1%}"
+        )
+    section, prompt = totals["section"], totals["prompt"]
+    print(
+        f"{'total':<12} {section[0]:>7} {section[1]:>8} {1 - section[1] / section[0]:>7.1%}   "
+        f"{prompt[0]:>11} {prompt[1]:>8} {1 - prompt[1] / prompt[0]:>7.1%}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Measure how the rate limit scheduler copes with a quota-enforcing, 429-injecting server.
+
+Fires a burst of concurrent structured-output requests at the local mock server, which enforces
+a requests-per-minute quota and rejects a fraction of requests at random with 429 and
+Retry-After. The run is repeated with the scheduler budgeted to the server's quota and with an
+unbounded budget (retries only), reporting throughput, 429s and failed requests.
+
+Usage:
+    python -m benchmarks.bench_scheduler --requests-per-minute 240 --requests 300
+"""
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "stub")
+
+from openai import AsyncOpenAI
+
+from benchmarks.mock_openai_server import start_mock_server
+from src.cache import ResponseCache
+from src.llm import ainvoke_mini, set_response_cache, set_scheduler
+from src.responses import SkillsResponse
+from src.scheduler import RateLimitScheduler
+
+UNBOUNDED = 10 ** 9
+
+
+async def run(base_url, requests, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    async with AsyncOpenAI(base_url=base_url, api_key="stub", max_retries=0) as llm_client:
+        async def request(index):
+            async with semaphore:
+                return await ainvoke_mini("system", f"prompt {index}", SkillsResponse, llm_client, bypass_cache=True)
+
+        return await asyncio.gather(*(request(index) for index in range(requests)))
+
+
+def measure(label, scheduler, args):
+    server = start_mock_server(
+        latency=args.latency, error_rate=args.error_rate,
+        requests_per_minute=args.requests_per_minute, retry_after=args.retry_after
+    )
+    set_scheduler("gpt-4o-mini", scheduler)
+    try:
+        start = time.perf_counter()
+        results = asyncio.run(run(server.base_url, args.requests, args.concurrency))
+        seconds = time.perf_counter() - start
+    finally:
+        server.shutdown()
+    failed = sum(result is None for result in results)
+    print(
+        f"{label:<10} {args.requests / seconds:7.2f} req/s  {seconds:7.2f}s  "
+        f"429s {server.rejected:<5} retries {scheduler.retries:<5} failed {failed}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=300, help="Number of requests in the burst")
+    parser.add_argument("--concurrency", type=int, default=32, help="Requests in flight at once")
+    parser.add_argument("--requests-per-minute", type=int, default=240, help="Quota enforced by the server")
+    parser.add_argument("--error-rate", type=float, default=0.05, help="Fraction of random 429s")
+    parser.add_argument("--retry-after", type=float, default=0.5, help="Retry-After of the random 429s")
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated seconds per completion")
+    args = parser.parse_args()
+
+    set_response_cache(ResponseCache(":memory:"))
+    measure("scheduled", RateLimitScheduler(args.requests_per_minute, UNBOUNDED, max_retries=10), args)
+    measure("unbounded", RateLimitScheduler(UNBOUNDED, UNBOUNDED, max_retries=10), args)
+
+
+if __name__ == "__main__":
+    main()
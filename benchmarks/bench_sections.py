@@ -0,0 +1,63 @@
+"""
+Benchmark the sequential and concurrent section fan-out in generate.py against a local stub client.
+
+Usage:
+    python -m benchmarks.bench_sections --latency 0.5 --runs 3
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "stub")
+
+from benchmarks.fake_openai import AsyncStubCompletions, StubCompletions, stub_client
+from generate import (
+    RESUME_FILE_PATH,
+    build_section_requests,
+    ainvoke_sections,
+    load_resume_sections,
+)
+from src.cache import ResponseCache
+from src.llm import invoke_omni, set_response_cache
+from src.prompts import generate_system_prompt
+
+CANNED_OUTPUTS_PATH = "benchmarks/data/5c2b2828-c059-47db-9fce-ac86e8c4aafb/model_outputs.json"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.5, help="Simulated seconds per LLM call")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--max-concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    # Keep the persistent response cache out of the measurements
+    set_response_cache(ResponseCache(":memory:"))
+    with open(CANNED_OUTPUTS_PATH) as f:
+        canned_outputs = json.load(f)
+    system_prompt = generate_system_prompt()
+    resume_sections, _ = load_resume_sections(RESUME_FILE_PATH)
+    section_requests = build_section_requests("Backend engineer", resume_sections)
+    sync_client = stub_client(StubCompletions(canned_outputs, args.latency))
+    async_client = stub_client(AsyncStubCompletions(canned_outputs, args.latency))
+
+    for run in range(args.runs):
+        start = time.perf_counter()
+        for prompt_func, response_format, kwargs in section_requests.values():
+            invoke_omni(system_prompt, prompt_func(**kwargs), response_format, llm_client=sync_client, bypass_cache=True)
+        sequential = time.perf_counter() - start
+
+        start = time.perf_counter()
+        asyncio.run(ainvoke_sections(
+            system_prompt, section_requests, args.max_concurrency, llm_client=async_client, bypass_cache=True
+        ))
+        concurrent = time.perf_counter() - start
+
+        print(f"run {run + 1}: sequential {sequential:.3f}s  concurrent {concurrent:.3f}s  "
+              f"speedup {sequential / concurrent:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Measure time to first useful output of streamed versus blocking structured outputs.
+
+Runs each section against the local mock streaming server and reports when the first list item
+(e.g. the first ExperienceItem) became available with astream_omni, compared with the time the
+blocking ainvoke_omni takes to return the whole response.
+
+Usage:
+    python -m benchmarks.bench_streaming --latency 2.0
+"""
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "stub")
+
+from openai import AsyncOpenAI
+
+from benchmarks.mock_openai_server import start_mock_server
+from src.cache import ResponseCache
+from src.llm import ainvoke_omni, astream_omni, set_response_cache
+from src.responses import EducationResponse, ExperienceResponse, ProjectsResponse, SkillsResponse
+
+RESPONSE_FORMATS = (ExperienceResponse, ProjectsResponse, EducationResponse, SkillsResponse)
+
+
+async def measure(llm_client, response_format):
+    start = time.perf_counter()
+    item_times = []
+    await astream_omni(
+        "system", "prompt", response_format, llm_client,
+        on_item=lambda item: item_times.append(time.perf_counter() - start), bypass_cache=True
+    )
+    streamed_total = time.perf_counter() - start
+
+    start = time.perf_counter()
+    await ainvoke_omni("system", "prompt", response_format, llm_client, bypass_cache=True)
+    blocking_total = time.perf_counter() - start
+    return item_times, streamed_total, blocking_total
+
+
+async def run(base_url):
+    async with AsyncOpenAI(base_url=base_url, api_key="stub") as llm_client:
+        # Warm up the connection pool so the first measurement does not pay for it
+        await ainvoke_omni("system", "prompt", SkillsResponse, llm_client, bypass_cache=True)
+        for response_format in RESPONSE_FORMATS:
+            item_times, streamed_total, blocking_total = await measure(llm_client, response_format)
+            first_item = f"{item_times[0]:.3f}s" if item_times else "n/a"
+            print(
+                f"{response_format.__name__:<20} items {len(item_times)}  first item {first_item}  "
+                f"streamed total {streamed_total:.3f}s  blocking total {blocking_total:.3f}s"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=2.0, help="Simulated seconds per completion")
+    parser.add_argument("--chunk-size", type=int, default=8, help="Characters per streamed chunk")
+    args = parser.parse_args()
+
+    set_response_cache(ResponseCache(":memory:"))
+    server = start_mock_server(latency=args.latency, chunk_size=args.chunk_size)
+    try:
+        asyncio.run(run(server.base_url))
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
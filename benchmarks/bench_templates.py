@@ -0,0 +1,62 @@
+"""
+Micro-benchmark section rendering: a jinja2.Template built per call versus the shared template registry.
+
+Usage:
+    python -m benchmarks.bench_templates --sections 5000
+"""
+import argparse
+import json
+import os
+import time
+
+from jinja2 import Template
+
+from src.responses import EducationResponse, ExperienceResponse, ProjectsResponse, SkillsResponse
+from utils import TEMPLATE_DIR, render_template, template_env
+
+CANNED_OUTPUTS_PATH = "benchmarks/data/5c2b2828-c059-47db-9fce-ac86e8c4aafb/model_outputs.json"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sections", type=int, default=5000, help="Number of sections rendered per path")
+    args = parser.parse_args()
+
+    with open(CANNED_OUTPUTS_PATH) as f:
+        outputs = json.load(f)
+    contexts = [
+        ("experience.tex.j2", {"experiences": ExperienceResponse.model_validate(outputs["experience"]).experiences}),
+        ("projects.tex.j2", {"projects": ProjectsResponse.model_validate(outputs["projects"]).projects}),
+        ("skills.tex.j2", {"skills": SkillsResponse.model_validate(outputs["skills"]).skills}),
+        ("education.tex.j2", {"education": EducationResponse.model_validate(outputs["education"]).education}),
+    ]
+    sources = {}
+    for template_name, _ in contexts:
+        with open(os.path.join(TEMPLATE_DIR, template_name)) as f:
+            sources[template_name] = f.read()
+    # Same delimiters as the registry, so both paths render identical output
+    delimiters = {
+        key: getattr(template_env, key)
+        for key in ("block_start_string", "block_end_string", "variable_start_string", "variable_end_string",
+                    "comment_start_string", "comment_end_string")
+    }
+
+    start = time.perf_counter()
+    for i in range(args.sections):
+        template_name, context = contexts[i % len(contexts)]
+        Template(sources[template_name], **delimiters).render(**context)
+    per_call = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(args.sections):
+        template_name, context = contexts[i % len(contexts)]
+        render_template(template_name, **context)
+    registry = time.perf_counter() - start
+
+    print(f"Template per call: {args.sections / per_call:10.0f} sections/s")
+    print(f"Template registry: {args.sections / registry:10.0f} sections/s")
+    print(f"speedup: {per_call / registry:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+In-process fake of client.beta.chat.completions.parse and, for async clients, .stream.
+
+Replays the canned section outputs of the pinned benchmarks/data/<id>/model_outputs.json files
+after a configurable delay, without any network I/O, so benchmarks measure the pipeline rather
+than the HTTP stack. Which canned resume is replayed is derived from the prompt, so repeated
+runs get the same responses. The usage of every completion reports the prompt tokens a
+provider-side prefix cache would have served, see PrefixCache.
+"""
+import asyncio
+import hashlib
+import json
+import random
+import threading
+import time
+import zlib
+from types import SimpleNamespace
+
+# Pinned, so the replayed outputs never depend on what earlier runs left on disk
+CANNED_OUTPUTS_PATHS = (
+    "benchmarks/data/5c2b2828-c059-47db-9fce-ac86e8c4aafb/model_outputs.json",
+    "benchmarks/data/9c16dc71-534f-4da6-b12d-3cb254341e99/model_outputs.json",
+)
+SECTION_KEYS = {
+    "EducationResponse": "education",
+    "ExperienceResponse": "experience",
+    "ProjectsResponse": "projects",
+    "SkillsResponse": "skills",
+}
+# Token counts of the fake are estimates, like those of mock_openai_server
+CHARS_PER_TOKEN = 4
+# OpenAI caches prompts of at least 1024 tokens, in increments of 128 tokens
+PREFIX_CACHE_MIN_TOKENS = 1024
+PREFIX_CACHE_BLOCK_TOKENS = 128
+
+
+class PrefixCache:
+    """
+    Simulates provider-side prompt prefix caching.
+
+    Every prompt is cut at the cacheable block boundaries, and the cached tokens of a request
+    are the longest boundary prefix some earlier request with the same model already sent.
+    """
+
+    def __init__(self, min_tokens=PREFIX_CACHE_MIN_TOKENS, block_tokens=PREFIX_CACHE_BLOCK_TOKENS):
+        self.min_tokens = min_tokens
+        self.block_tokens = block_tokens
+        self.prefixes = set()
+        self._lock = threading.Lock()
+
+    def lookup(self, model, prompt):
+        """Return the cached tokens of a prompt and make its prefixes available to later prompts."""
+        prompt_bytes = prompt.encode("utf-8")
+        digest = hashlib.sha256(model.encode("utf-8") + b"\0")
+        boundaries = range(self.min_tokens, len(prompt_bytes) // CHARS_PER_TOKEN + 1, self.block_tokens)
+        prefixes, offset = [], 0
+        for tokens in boundaries:
+            digest.update(prompt_bytes[offset:tokens * CHARS_PER_TOKEN])
+            offset = tokens * CHARS_PER_TOKEN
+            prefixes.append((tokens, digest.copy().digest()))
+        with self._lock:
+            cached_tokens = max((tokens for tokens, prefix in prefixes if prefix in self.prefixes), default=0)
+            self.prefixes.update(prefix for _, prefix in prefixes)
+        return cached_tokens
+
+
+def load_canned_outputs(paths=CANNED_OUTPUTS_PATHS):
+    """Load the given model_outputs.json files, in order."""
+    canned_outputs = []
+    for path in paths:
+        with open(path) as f:
+            canned_outputs.append(json.load(f))
+    return canned_outputs
+
+
+class StubCompletions:
+    """
+    Stands in for client.beta.chat.completions, replaying canned outputs after a fixed delay.
+
+    Parameters:
+    canned_outputs (dict or list): One model_outputs.json or several, keyed by section name.
+    latency (float): Seconds every call takes.
+    jitter (float): Additional uniformly distributed seconds per call.
+    prefix_cache (PrefixCache, optional): Simulated provider prompt cache, a fresh one by default.
+    """
+
+    def __init__(self, canned_outputs, latency, jitter=0.0, prefix_cache=None):
+        self.canned_outputs = canned_outputs if isinstance(canned_outputs, list) else [canned_outputs]
+        self.latency = latency
+        self.jitter = jitter
+        self.prefix_cache = prefix_cache or PrefixCache()
+        self.calls = 0
+
+    def _delay(self):
+        return self.latency + random.uniform(0, self.jitter)
+
+    def _completion(self, model, messages, response_format):
+        self.calls += 1
+        prompt = "".join(message["content"] for message in messages)
+        canned = self.canned_outputs[zlib.crc32(prompt.encode("utf-8")) % len(self.canned_outputs)]
+        if response_format.__name__ == "ResumeResponse":
+            payload = {key: canned[key] for key in SECTION_KEYS.values()}
+        else:
+            payload = canned[SECTION_KEYS[response_format.__name__]]
+        content = json.dumps(payload)
+        message = SimpleNamespace(parsed=response_format.model_validate(payload), content=content, refusal=None)
+        usage = SimpleNamespace(
+            prompt_tokens=len(prompt) // CHARS_PER_TOKEN,
+            completion_tokens=len(content) // CHARS_PER_TOKEN,
+            total_tokens=(len(prompt) + len(content)) // CHARS_PER_TOKEN,
+            prompt_tokens_details=SimpleNamespace(cached_tokens=self.prefix_cache.lookup(model, prompt)),
+        )
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+    def parse(self, model, messages, response_format, **options):
+        # Request options such as timeout do not apply to the in-process fake
+        time.sleep(self._delay())
+        return self._completion(model, messages, response_format)
+
+
+class AsyncStubCompletions(StubCompletions):
+    async def parse(self, model, messages, response_format, **options):
+        await asyncio.sleep(self._delay())
+        return self._completion(model, messages, response_format)
+
+    def stream(self, model, messages, response_format, **options):
+        """Stand in for client.beta.chat.completions.stream, see AsyncStubStream."""
+        return AsyncStubStream(self._completion(model, messages, response_format), self._delay())
+
+
+class AsyncStubStream:
+    """
+    Async context manager replaying a completion like a structured output stream.
+
+    The delay is spread evenly over the list items of the parsed response, and every step yields a
+    "content.delta" event whose parsed field holds the items received so far as plain dicts, like
+    the partial JSON the SDK parses while tokens arrive.
+    """
+
+    def __init__(self, completion, delay):
+        self.completion = completion
+        self.delay = delay
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        pass
+
+    async def __aiter__(self):
+        parsed = self.completion.choices[0].message.parsed
+        field_name = next(iter(type(parsed).model_fields))
+        items = [item.model_dump() for item in getattr(parsed, field_name)]
+        for count in range(1, len(items) + 1):
+            await asyncio.sleep(self.delay / max(len(items), 1))
+            yield SimpleNamespace(type="content.delta", parsed={field_name: items[:count]})
+
+    async def get_final_completion(self):
+        return self.completion
+
+
+class AsyncStubClient(SimpleNamespace):
+    """Async fake client that can be used like AsyncOpenAI, including as an async context manager."""
+
+    def __init__(self, completions):
+        super().__init__(beta=SimpleNamespace(chat=SimpleNamespace(completions=completions)))
+
+    async def close(self):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        pass
+
+
+def stub_client(completions):
+    """Wrap stub completions into an object shaped like OpenAI or AsyncOpenAI."""
+    if isinstance(completions, AsyncStubCompletions):
+        return AsyncStubClient(completions)
+    return SimpleNamespace(beta=SimpleNamespace(chat=SimpleNamespace(completions=completions)))
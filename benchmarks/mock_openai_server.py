@@ -0,0 +1,234 @@
+"""
+Local stand-in for the OpenAI chat completions endpoint.
+
+Replays the canned section outputs of a benchmarks/data/<id>/model_outputs.json file, either as a
+single completion or as a server-sent event stream split into small chunks, after a
+configurable delay plus an optional per-token generation time. Requests for the combined
+ResumeResponse get all sections at once. To exercise retries it can reject requests with 429
+and a Retry-After header, either at random or once a requests-per-minute quota is exceeded.
+Point a client at it with OpenAI(base_url=..., api_key="stub").
+
+Usage:
+    python -m benchmarks.mock_openai_server --port 8089 --latency 1.0
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CANNED_OUTPUTS_PATH = "benchmarks/data/5c2b2828-c059-47db-9fce-ac86e8c4aafb/model_outputs.json"
+SECTION_KEYS = {
+    "EducationResponse": "education",
+    "ExperienceResponse": "experience",
+    "ProjectsResponse": "projects",
+    "SkillsResponse": "skills",
+}
+
+
+def load_canned_outputs(path=CANNED_OUTPUTS_PATH):
+    """Load a model_outputs.json file, keyed by section name."""
+    with open(path) as f:
+        return json.load(f)
+
+
+class MockOpenAIHandler(BaseHTTPRequestHandler):
+    """Serves POST /v1/chat/completions from the server's canned outputs."""
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_error(404)
+            return
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        retry_after = self.server.admit()
+        if retry_after is not None:
+            self.send_json(
+                {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}},
+                status=429, headers={"retry-after-ms": str(int(retry_after * 1000))}
+            )
+            return
+        content = self.server.content_for(request)
+        prompt_tokens = sum(len(message["content"]) for message in request["messages"]) // 4
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(content) // 4,
+            "total_tokens": prompt_tokens + len(content) // 4,
+        }
+        if request.get("stream"):
+            self.stream_completion(request, content, usage)
+        else:
+            time.sleep(self.server.completion_seconds(content))
+            self.send_json({
+                "id": "chatcmpl-mock",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request["model"],
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content, "refusal": None},
+                    "finish_reason": "stop",
+                }],
+                "usage": usage,
+            })
+
+    def send_json(self, payload, status=200, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def stream_completion(self, request, content, usage):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        chunk_size = self.server.chunk_size
+        chunks = [content[i:i + chunk_size] for i in range(0, len(content), chunk_size)]
+        # Spread the latency over the chunks like a model emitting tokens at a steady rate
+        delay = self.server.completion_seconds(content) / max(len(chunks), 1)
+        for index, chunk in enumerate(chunks):
+            time.sleep(delay)
+            delta = {"content": chunk}
+            if index == 0:
+                delta["role"] = "assistant"
+            self.send_event(request, {"index": 0, "delta": delta, "finish_reason": None})
+        self.send_event(request, {"index": 0, "delta": {}, "finish_reason": "stop"}, usage)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+    def send_event(self, request, choice, usage=None):
+        chunk = {
+            "id": "chatcmpl-mock",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": request["model"],
+            "choices": [choice],
+        }
+        if usage is not None:
+            chunk["usage"] = usage
+        self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+        self.wfile.flush()
+
+
+class MockOpenAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Accept bursts of concurrent connections instead of resetting them
+    request_queue_size = 128
+
+    def __init__(
+        self, address, canned_outputs, latency=1.0, chunk_size=8, seconds_per_token=0.0,
+        error_rate=0.0, requests_per_minute=None, retry_after=1.0
+    ):
+        super().__init__(address, MockOpenAIHandler)
+        self.canned_outputs = canned_outputs
+        self.latency = latency
+        self.chunk_size = chunk_size
+        self.seconds_per_token = seconds_per_token
+        self.error_rate = error_rate
+        self.requests_per_minute = requests_per_minute
+        self.retry_after = retry_after
+        self.accepted = 0
+        self.rejected = 0
+        self._quota = requests_per_minute
+        self._quota_updated = time.monotonic()
+        self._admit_lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def admit(self):
+        """
+        Decide whether to serve a request or reject it with 429.
+
+        Returns:
+        float: Seconds the client should wait before retrying, or None if the request is admitted.
+        """
+        with self._admit_lock:
+            now = time.monotonic()
+            if random.random() < self.error_rate:
+                self.rejected += 1
+                return self.retry_after
+            if self.requests_per_minute is not None:
+                # Like the OpenAI limits, the quota replenishes continuously up to one minute's worth
+                rate = self.requests_per_minute / 60
+                self._quota = min(self.requests_per_minute, self._quota + (now - self._quota_updated) * rate)
+                self._quota_updated = now
+                if self._quota < 1:
+                    self.rejected += 1
+                    return (1 - self._quota) / rate
+                self._quota -= 1
+            self.accepted += 1
+            return None
+
+    def content_for(self, request):
+        """Return the canned JSON content matching the request's response_format schema."""
+        schema_name = request["response_format"]["json_schema"]["name"]
+        if schema_name == "ResumeResponse":
+            return json.dumps({key: self.canned_outputs[key] for key in SECTION_KEYS.values()})
+        return json.dumps(self.canned_outputs[SECTION_KEYS[schema_name]])
+
+    def completion_seconds(self, content):
+        """Simulated time to produce a completion, roughly four characters per token."""
+        return self.latency + self.seconds_per_token * len(content) / 4
+
+
+def start_mock_server(
+    latency=1.0, chunk_size=8, canned_outputs=None, port=0, seconds_per_token=0.0,
+    error_rate=0.0, requests_per_minute=None, retry_after=1.0
+):
+    """
+    Start a mock server on a background thread.
+
+    Parameters:
+    latency (float): Seconds until a completion finishes. Streams spread it over their chunks.
+    chunk_size (int): Characters of content per streamed chunk.
+    canned_outputs (dict, optional): Section outputs to replay. Defaults to CANNED_OUTPUTS_PATH.
+    port (int): Port to listen on. 0 picks a free port.
+    seconds_per_token (float): Additional generation time per completion token.
+    error_rate (float): Fraction of requests rejected with 429 at random.
+    requests_per_minute (int, optional): Quota above which requests are rejected with 429.
+    retry_after (float): Retry-After of the random 429s, in seconds.
+
+    Returns:
+    MockOpenAIServer: The running server. Call shutdown() to stop it.
+    """
+    server = MockOpenAIServer(
+        ("127.0.0.1", port), canned_outputs or load_canned_outputs(), latency, chunk_size, seconds_per_token,
+        error_rate, requests_per_minute, retry_after
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=1.0)
+    parser.add_argument("--chunk-size", type=int, default=8)
+    parser.add_argument("--seconds-per-token", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests rejected with 429")
+    parser.add_argument("--requests-per-minute", type=int, default=None, help="Quota enforced with 429s")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After of random 429s in seconds")
+    parser.add_argument("--canned-outputs", default=CANNED_OUTPUTS_PATH)
+    args = parser.parse_args()
+
+    server = MockOpenAIServer(
+        ("127.0.0.1", args.port), load_canned_outputs(args.canned_outputs),
+        args.latency, args.chunk_size, args.seconds_per_token,
+        args.error_rate, args.requests_per_minute, args.retry_after
+    )
+    print(f"Mock OpenAI server listening on {server.base_url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,40 @@
+import asyncio
+import contextlib
 import logging
 import os
+import threading
+import time
 import uuid
 import json
+from collections import OrderedDict
+from dataclasses import dataclass
 from typing import Dict, Any
-from src.llm import invoke_mini, invoke_omni
+from src.llm import create_async_client, get_async_client, in_llm_loop, run_on_llm_loop
 from src.prompts import (
+    PROMPT_LAYOUTS,
     generate_system_prompt,
     experience_prompt,
     education_prompt,
     projects_prompt,
-    skills_prompt
+    skills_prompt,
+    resume_prompt
 )
+from src.metrics import record, span
+from src.offline import invoke_offline
+from src.profiles import ProfileStore
+from src.retrieval import build_section_indexes, prerank_sections
+from src.router import get_model_router
+from src.serialize import PROMPT_ENCODINGS
 from src.responses import (
     ExperienceItem, ExperienceResponse,
     EducationResponse, EducationItem,
     SkillItem, SkillsResponse,
-    HeadingData, ProjectItem, ProjectsResponse
+    HeadingData, ProjectItem, ProjectsResponse,
+    ResumeResponse
 )
+from artifact_store import check_application_id
+from latex_engine import compile_resume_pdf
 from utils import (
-    convert_tex_to_pdf,
     write_education_to_latex,
     write_experience_to_latex,
     write_heading_to_latex,
@@ -26,6 +42,8 @@ from utils import (
     write_skills_to_latex,
     write_resume_dot_tex,
     write_custom_commands_dot_tex,
+    render_resume_document,
+    write_resume_document,
     load_resume_data,
     extract_education_section,
     extract_experience_section,
@@ -37,10 +55,42 @@ logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(
 # Constants
 RESUME_FILE_PATH = "assets/resume.yaml"
 OUTPUT_BASE_PATH = "artifacts"
+# Maximum number of section LLM calls in flight at once for a single resume
+SECTION_CONCURRENCY = 4
+# Seconds a single section call may take. Section completions take seconds, so a stalled request is
+# cut and retried long before OPENAI_TIMEOUT, which still bounds the much longer one-shot call.
+SECTION_TIMEOUT = 60.0
+# "format" compiles against a precompiled preamble, "latexmk" runs a cold latexmk build
+COMPILE_ENGINE = "format"
+# "single" writes the whole resume as one in-memory rendered resume.tex, "multi" writes resume.tex,
+# custom-commands.tex and one src/*.tex file per section, which is handy for debugging templates
+RESUME_LAYOUT = "single"
+RESUME_LAYOUTS = ("single", "multi")
+# Stages of iter_resume_stages that carry a parsed LLM section
+SECTION_STAGES = ("education", "experience", "projects", "skills")
+# "sections" makes one LLM call per section, "one_shot" a single call for the whole resume
+GENERATION_MODE = "sections"
+GENERATION_MODES = ("sections", "one_shot")
+# "openai" tailors every section with the LLM, "offline" with the local keyword engine of
+# src/offline.py, and "fallback" uses the LLM but tailors failed sections offline.
+GENERATION_BACKEND = "openai"
+GENERATION_BACKENDS = ("openai", "offline", "fallback")
+# Number of candidates per section passed to the LLM after local BM25 pre-ranking against the job
+# description. Keeps prompts small for large master resumes while leaving the LLM a choice.
+PRERANK_TOP_K = {"experience": 4, "projects": 4}
+# Order of the user prompts, see PROMPT_LAYOUTS in src/prompts.py. "resume_first" keeps the
+# instructions and resume data a byte-stable prefix across jobs for provider prompt caching.
+PROMPT_LAYOUT = "resume_first"
+# How resume sections are written into the prompts, see src/serialize.py. "compact" drops empty
+# fields, duplicate skills and the quotes and braces of the Python repr.
+PROMPT_ENCODING = "compact"
+# Number of profiles whose validated heading and retrieval indexes are kept in memory
+PROFILE_CACHE_SIZE = 256
 
 def load_and_extract_resume_data(file_path):
     """Load resume data and extract relevant sections."""
-    resume_data = load_resume_data(file_path)
+    with span("resume.load"):
+        resume_data = load_resume_data(file_path)
     return {
         'education': extract_education_section(resume_data),
         'experience': extract_experience_section(resume_data),
@@ -49,17 +99,488 @@ def load_and_extract_resume_data(file_path):
         'heading': extract_heading_section(resume_data)
     }
 
-def invoke_llm_for_section(system_prompt, prompt_func, response_format, **kwargs):
-    """Invoke the LLM for a specific section."""
-    return invoke_omni(
-        system_prompt=system_prompt,
-        prompt=prompt_func(**kwargs),
-        response_format=response_format
+# Parsed resume files keyed on absolute path, see load_resume_sections
+_resume_sections_cache = {}
+_resume_sections_lock = threading.Lock()
+
+def _load_resume(file_path):
+    """
+    Load, validate and index a resume file, memoized per file.
+
+    The cache entry is keyed on the file path and invalidated whenever the file's mtime or size
+    changes, so edits to the YAML are picked up while repeated generations skip parsing,
+    validation and indexing entirely.
+
+    Returns:
+    tuple: (sections dict, validated HeadingData, retrieval indexes of build_section_indexes).
+    """
+    key = os.path.abspath(file_path)
+    stat = os.stat(key)
+    version = (stat.st_mtime_ns, stat.st_size)
+    with _resume_sections_lock:
+        cached = _resume_sections_cache.get(key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    loaded = _prepare_resume(load_and_extract_resume_data(file_path))
+    with _resume_sections_lock:
+        _resume_sections_cache[key] = (version, loaded)
+    return loaded
+
+def _prepare_resume(resume_sections):
+    """Validate the heading of extracted resume sections and build their retrieval indexes."""
+    heading_output = HeadingData.model_validate(resume_sections['heading'])
+    return resume_sections, heading_output, build_section_indexes(resume_sections)
+
+def load_resume_sections(file_path):
+    """
+    Load the extracted resume sections and the validated heading, memoized per file.
+
+    The returned objects are shared between callers and must not be mutated.
+
+    Parameters:
+    file_path (str): The path to the resume YAML file.
+
+    Returns:
+    tuple: The sections dict of load_and_extract_resume_data and the validated HeadingData.
+    """
+    resume_sections, heading_output, _ = _load_resume(file_path)
+    return resume_sections, heading_output
+
+def load_resume_indexes(file_path):
+    """
+    Load the precomputed retrieval indexes of a resume file, memoized like load_resume_sections.
+
+    Parameters:
+    file_path (str): The path to the resume YAML file.
+
+    Returns:
+    dict: Section name mapped to its BM25Index.
+    """
+    return _load_resume(file_path)[2]
+
+_profile_store = None
+# Prepared profiles keyed on profile ID, least recently used first, see load_profile
+_profile_cache = OrderedDict()
+_profile_cache_lock = threading.Lock()
+
+def get_profile_store():
+    """Return the process-wide profile store, creating it on first use."""
+    global _profile_store
+    if _profile_store is None:
+        _profile_store = ProfileStore()
+    return _profile_store
+
+def set_profile_store(store):
+    """Replace the process-wide profile store, e.g. with one on another database file."""
+    global _profile_store
+    _profile_store = store
+    with _profile_cache_lock:
+        _profile_cache.clear()
+
+def ingest_resume_file(file_path, profile_id=None, store=None):
+    """
+    Extract the sections of a resume YAML file and store them as a profile.
+
+    Parameters:
+    file_path (str): The path to the resume YAML file.
+    profile_id (str, optional): Identifier of the candidate. Defaults to the file name without extension.
+    store (ProfileStore, optional): The store to ingest into. Defaults to get_profile_store().
+
+    Returns:
+    str: The profile ID.
+
+    Raises:
+    pydantic.ValidationError: If the heading of the resume is incomplete.
+    """
+    profile_id = profile_id or os.path.splitext(os.path.basename(file_path))[0]
+    resume_sections = load_and_extract_resume_data(file_path)
+    # Reject broken resumes at ingestion rather than at their first generation
+    HeadingData.model_validate(resume_sections['heading'])
+    if (store or get_profile_store()).put(profile_id, resume_sections, source=os.path.abspath(file_path)):
+        logging.info(f"Ingested profile {profile_id} from {file_path}")
+    return profile_id
+
+def load_profile(profile_id):
+    """
+    Load the sections, validated heading and retrieval indexes of a stored profile.
+
+    Prepared profiles are kept in memory, keyed on the profile ID and invalidated when the
+    stored digest changes, so a repeated generation costs one primary key lookup. The returned
+    objects are shared between callers and must not be mutated.
+
+    Parameters:
+    profile_id (str): Identifier of the candidate.
+
+    Returns:
+    tuple: (sections dict, validated HeadingData, retrieval indexes of build_section_indexes).
+
+    Raises:
+    KeyError: If the profile does not exist.
+    """
+    store = get_profile_store()
+    digest = store.digest(profile_id)
+    if digest is None:
+        raise KeyError(f"Unknown profile {profile_id!r}")
+    with _profile_cache_lock:
+        cached = _profile_cache.get(profile_id)
+        if cached is not None and cached[0] == digest:
+            _profile_cache.move_to_end(profile_id)
+            return cached[1]
+
+    with span("resume.load", source="profile"):
+        stored = store.get(profile_id)
+    if stored is None:
+        raise KeyError(f"Unknown profile {profile_id!r}")
+    resume_sections, digest = stored
+    loaded = _prepare_resume(resume_sections)
+    with _profile_cache_lock:
+        _profile_cache[profile_id] = (digest, loaded)
+        _profile_cache.move_to_end(profile_id)
+        while len(_profile_cache) > PROFILE_CACHE_SIZE:
+            _profile_cache.popitem(last=False)
+    return loaded
+
+def invoke_llm_for_section(system_prompt, prompt_func, response_format, bypass_cache=False, timeout=SECTION_TIMEOUT, **kwargs):
+    """Invoke the LLM for a specific section on the model picked by the model router."""
+    return get_model_router().invoke(
+        system_prompt, prompt_func, response_format, bypass_cache=bypass_cache, timeout=timeout, **kwargs
+    )
+
+async def ainvoke_llm_for_section(
+    system_prompt, prompt_func, response_format, llm_client, bypass_cache=False, timeout=SECTION_TIMEOUT, **kwargs
+):
+    """Asynchronously invoke the LLM for a specific section on the model picked by the model router."""
+    return await get_model_router().ainvoke(
+        system_prompt, prompt_func, response_format, llm_client, bypass_cache=bypass_cache, timeout=timeout, **kwargs
+    )
+
+def build_section_requests(job_description, resume_sections, layout=PROMPT_LAYOUT, encoding=PROMPT_ENCODING):
+    """
+    Build the LLM request for each resume section.
+
+    Parameters:
+    job_description (str): The job description to tailor the resume to.
+    resume_sections (dict): Sections returned by load_and_extract_resume_data.
+    layout (str): Prompt layout, see PROMPT_LAYOUTS.
+    encoding (str): Encoding of the resume sections in the prompts, see PROMPT_ENCODINGS.
+
+    Returns:
+    dict: Section name mapped to a (prompt_func, response_format, prompt_kwargs) tuple.
+    """
+    return {
+        'education': (education_prompt, EducationResponse, {
+            'job_description': job_description, 'user_education': resume_sections['education'],
+            'layout': layout, 'encoding': encoding
+        }),
+        'experience': (experience_prompt, ExperienceResponse, {
+            'job_description': job_description, 'user_experience': resume_sections['experience'], 'num_experiences': 2,
+            'layout': layout, 'encoding': encoding
+        }),
+        'projects': (projects_prompt, ProjectsResponse, {
+            'job_description': job_description, 'user_projects': resume_sections['projects'], 'num_projects': 2,
+            'layout': layout, 'encoding': encoding
+        }),
+        'skills': (skills_prompt, SkillsResponse, {
+            'job_description': job_description, 'user_skills': resume_sections['skills'],
+            'layout': layout, 'encoding': encoding
+        }),
+    }
+
+def build_one_shot_request(job_description, resume_sections, layout=PROMPT_LAYOUT, encoding=PROMPT_ENCODING):
+    """
+    Build a single LLM request covering every resume section.
+
+    The job description and system prompt are sent once instead of once per section.
+
+    Parameters:
+    job_description (str): The job description to tailor the resume to.
+    resume_sections (dict): Sections returned by load_and_extract_resume_data.
+    layout (str): Prompt layout, see PROMPT_LAYOUTS.
+    encoding (str): Encoding of the resume sections in the prompt, see PROMPT_ENCODINGS.
+
+    Returns:
+    tuple: (prompt_func, response_format, prompt_kwargs) like the values of build_section_requests.
+    """
+    return (resume_prompt, ResumeResponse, {
+        'job_description': job_description,
+        'user_education': resume_sections['education'],
+        'user_experience': resume_sections['experience'],
+        'user_projects': resume_sections['projects'],
+        'user_skills': resume_sections['skills'],
+        'num_experiences': 2,
+        'num_projects': 2,
+        'layout': layout,
+        'encoding': encoding,
+    })
+
+def iter_one_shot_sections(system_prompt, one_shot_request, bypass_cache=False):
+    """
+    Invoke the LLM once for the whole resume and yield its sections like iter_sections.
+
+    Parameters:
+    system_prompt (str): The system prompt.
+    one_shot_request (tuple): Output of build_one_shot_request.
+    bypass_cache (bool): Force a fresh LLM sample instead of reusing a cached response.
+
+    Yields:
+    tuple: (section name, parsed response, seconds the combined call took).
+    """
+    prompt_func, response_format, kwargs = one_shot_request
+    start = time.perf_counter()
+    # The whole resume takes several times as long as a section, so only the client-wide OPENAI_TIMEOUT applies
+    resume_output = invoke_llm_for_section(
+        system_prompt, prompt_func, response_format, bypass_cache=bypass_cache, timeout=None, **kwargs
+    )
+    seconds = time.perf_counter() - start
+    for name in SECTION_STAGES:
+        yield name, getattr(resume_output, name) if resume_output is not None else None, seconds
+
+def iter_offline_sections(system_prompt, section_requests):
+    """
+    Tailor all sections with the local offline engine and yield them like iter_sections.
+
+    Parameters:
+    system_prompt (str): The system prompt shared by all sections.
+    section_requests (dict): Output of build_section_requests.
+
+    Yields:
+    tuple: (section name, tailored response, seconds the section took).
+    """
+    for name, (prompt_func, response_format, kwargs) in section_requests.items():
+        start = time.perf_counter()
+        output = invoke_offline(system_prompt, prompt_func, response_format, **kwargs)
+        yield name, output, time.perf_counter() - start
+
+def with_offline_fallback(system_prompt, section_results, section_requests):
+    """
+    Replace the sections the LLM failed on with the output of the offline engine.
+
+    Parameters:
+    system_prompt (str): The system prompt shared by all sections.
+    section_results (iterable): (name, output, seconds) tuples of iter_sections or iter_one_shot_sections.
+    section_requests (dict): Output of build_section_requests for the same resume.
+
+    Yields:
+    tuple: The section results, with every missing section output tailored offline.
+    """
+    with contextlib.closing(section_results):
+        for name, output, seconds in section_results:
+            if output is None and name in section_requests:
+                logging.warning(f"LLM call for the {name} section failed, tailoring it offline")
+                prompt_func, response_format, kwargs = section_requests[name]
+                start = time.perf_counter()
+                output = invoke_offline(system_prompt, prompt_func, response_format, **kwargs)
+                seconds += time.perf_counter() - start
+            yield name, output, seconds
+
+async def astream_sections(
+    system_prompt,
+    section_requests,
+    max_concurrency=SECTION_CONCURRENCY,
+    llm_client=None,
+    bypass_cache=False,
+    stream_items=False
+):
+    """
+    Invoke the LLM for all sections concurrently and yield each section as soon as it is parsed.
+
+    The sections are independent of each other, so the wall-clock time is roughly that of the
+    slowest section rather than the sum of all of them. With stream_items, completions are also
+    streamed token by token and every list item of a section (e.g. each ExperienceItem) is yielded
+    as "<section>.item" as soon as it is complete, ahead of the section itself.
+
+    Parameters:
+    system_prompt (str): The system prompt shared by all sections.
+    section_requests (dict): Output of build_section_requests.
+    max_concurrency (int): Maximum number of LLM calls in flight at once.
+    llm_client (AsyncOpenAI, optional): Async client to use. Defaults to the shared client on the shared
+    LLM event loop (see src/llm.py), elsewhere a new one is created and closed.
+    bypass_cache (bool): Force fresh LLM samples instead of reusing cached responses.
+    stream_items (bool): Stream the completions and also yield each completed list item.
+
+    Yields:
+    tuple: (section name or "<section>.item", parsed response or item, seconds since the section
+    started) in completion order.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    results = asyncio.Queue()
+
+    async def invoke(client, name, prompt_func, response_format, kwargs):
+        start = time.perf_counter()
+        async with semaphore:
+            if stream_items:
+                output = await get_model_router().astream(
+                    system_prompt, prompt_func, response_format, client,
+                    on_item=lambda item: results.put_nowait((f"{name}.item", item, time.perf_counter() - start)),
+                    bypass_cache=bypass_cache, timeout=SECTION_TIMEOUT, **kwargs
+                )
+            else:
+                output = await ainvoke_llm_for_section(
+                    system_prompt, prompt_func, response_format, client, bypass_cache=bypass_cache, **kwargs
+                )
+        results.put_nowait((name, output, time.perf_counter() - start))
+
+    async def stream(client):
+        tasks = [
+            asyncio.ensure_future(invoke(client, name, prompt_func, response_format, kwargs))
+            for name, (prompt_func, response_format, kwargs) in section_requests.items()
+        ]
+        try:
+            remaining = len(tasks)
+            while remaining:
+                result = await results.get()
+                if result[0] in section_requests:
+                    remaining -= 1
+                yield result
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    if llm_client is None and in_llm_loop():
+        llm_client = get_async_client()
+    if llm_client is not None:
+        async for result in stream(llm_client):
+            yield result
+        return
+    async with create_async_client() as client:
+        async for result in stream(client):
+            yield result
+
+async def ainvoke_sections(system_prompt, section_requests, max_concurrency=SECTION_CONCURRENCY, llm_client=None, bypass_cache=False):
+    """
+    Invoke the LLM for all sections concurrently, see astream_sections.
+
+    Returns:
+    dict: Section name mapped to the parsed response.
+    """
+    outputs = {}
+    async for name, output, _ in astream_sections(system_prompt, section_requests, max_concurrency, llm_client, bypass_cache):
+        outputs[name] = output
+    return {name: outputs[name] for name in section_requests}
+
+async def _next_or_none(stream):
+    """Returns the next item of an async generator, or None once it is exhausted."""
+    try:
+        return await stream.__anext__()
+    except StopAsyncIteration:
+        return None
+
+def iter_sections(
+    system_prompt,
+    section_requests,
+    concurrent=True,
+    max_concurrency=SECTION_CONCURRENCY,
+    bypass_cache=False,
+    stream_items=False
+):
+    """
+    Invoke the LLM for all sections and yield each one as soon as it is parsed.
+
+    Parameters:
+    system_prompt (str): The system prompt shared by all sections.
+    section_requests (dict): Output of build_section_requests.
+    concurrent (bool): Fan the calls out on an event loop instead of running them sequentially.
+    max_concurrency (int): Maximum number of LLM calls in flight at once when concurrent.
+    bypass_cache (bool): Force fresh LLM samples instead of reusing cached responses.
+    stream_items (bool): Also yield each completed list item, see astream_sections. Only used when concurrent.
+
+    Yields:
+    tuple: (section name, parsed response, seconds the section took).
+    """
+    if not concurrent:
+        for name, (prompt_func, response_format, kwargs) in section_requests.items():
+            start = time.perf_counter()
+            output = invoke_llm_for_section(system_prompt, prompt_func, response_format, bypass_cache=bypass_cache, **kwargs)
+            yield name, output, time.perf_counter() - start
+        return
+
+    # Drive the async stream on the shared LLM event loop so synchronous callers on every worker
+    # thread consume it lazily and reuse the keep-alive connections of one async client
+    stream = astream_sections(
+        system_prompt, section_requests, max_concurrency, bypass_cache=bypass_cache, stream_items=stream_items
     )
+    try:
+        while True:
+            result = run_on_llm_loop(_next_or_none(stream))
+            if result is None:
+                break
+            yield result
+    finally:
+        run_on_llm_loop(stream.aclose())
+
+def invoke_sections(system_prompt, section_requests, concurrent=True, max_concurrency=SECTION_CONCURRENCY, bypass_cache=False):
+    """
+    Invoke the LLM for all sections, either concurrently or one after another.
+
+    Parameters:
+    system_prompt (str): The system prompt shared by all sections.
+    section_requests (dict): Output of build_section_requests.
+    concurrent (bool): Fan the calls out on an event loop instead of running them sequentially.
+    max_concurrency (int): Maximum number of LLM calls in flight at once when concurrent.
+    bypass_cache (bool): Force fresh LLM samples instead of reusing cached responses.
+
+    Returns:
+    dict: Section name mapped to the parsed response.
+    """
+    outputs = {
+        name: output
+        for name, output, _ in iter_sections(system_prompt, section_requests, concurrent, max_concurrency, bypass_cache)
+    }
+    return {name: outputs[name] for name in section_requests}
 
 def write_section_to_latex(write_func, data, file_path):
     """Write a section to a LaTeX file."""
-    write_func(data, file_path)
+    with span("file.write", file=os.path.basename(file_path)):
+        write_func(data, file_path)
+
+def write_latex_sources(
+    output_path,
+    heading_output,
+    education_output,
+    skills_output,
+    experience_output,
+    projects_output,
+    layout=RESUME_LAYOUT
+):
+    """
+    Write the LaTeX sources of a resume.
+
+    Parameters:
+    output_path (str): The latex_src directory of the job.
+    heading_output (HeadingData): The heading section.
+    education_output (EducationResponse): The education section.
+    skills_output (SkillsResponse): The skills section.
+    experience_output (ExperienceResponse): The experience section.
+    projects_output (ProjectsResponse): The projects section.
+    layout (str): "single" for one self-contained resume.tex, "multi" for one file per section.
+
+    Returns:
+    str: The path of the resume.tex to compile.
+    """
+    if layout not in RESUME_LAYOUTS:
+        raise ValueError(f"Unknown resume layout {layout!r}, expected one of {RESUME_LAYOUTS}")
+
+    if layout == "single":
+        logging.info(f"WRITING single-document resume.tex to path: {output_path}/resume.tex")
+        document = render_resume_document(
+            heading_output, education_output, skills_output, experience_output, projects_output
+        )
+        return write_resume_document(document, output_path)
+
+    src_path = f"{output_path}/src"
+    os.makedirs(src_path, exist_ok=True)
+    logging.info(f"WRITING resume.tex to path: {output_path}/resume.tex")
+    write_resume_dot_tex(output_path)
+    logging.info(f"WRITING custom-commands.tex to path: {output_path}/custom-commands.tex")
+    write_custom_commands_dot_tex(output_path)
+    write_section_to_latex(write_heading_to_latex, heading_output, f"{src_path}/heading.tex")
+    write_section_to_latex(write_education_to_latex, education_output, f"{src_path}/education.tex")
+    write_section_to_latex(write_skills_to_latex, skills_output, f"{src_path}/skills.tex")
+    write_section_to_latex(write_experience_to_latex, experience_output, f"{src_path}/experience.tex")
+    write_section_to_latex(write_projects_to_latex, projects_output, f"{src_path}/projects.tex")
+    return f"{output_path}/resume.tex"
 
 def save_outputs_to_json(
     education_output: EducationResponse,
@@ -88,72 +609,182 @@ def save_outputs_to_json(
 
     # Write the combined dictionary to a JSON file
     try:
-        with open(output_path, "w") as json_file:
+        with span("file.write", file="model_outputs.json"), open(output_path, "w") as json_file:
             json.dump(combined_outputs, json_file, indent=4)
         print(f"All outputs successfully saved to {output_path}")
     except Exception as e:
         print(f"An error occurred while saving outputs to JSON: {e}")
 
-def generate_resume(job_description, application_id):
+@dataclass
+class StageEvent:
+    """A finished stage of a resume generation, see iter_resume_stages."""
+    stage: str
+    seconds: float
+    output: Any = None
+
+def iter_resume_stages(
+    job_description,
+    application_id,
+    concurrent=True,
+    max_concurrency=SECTION_CONCURRENCY,
+    bypass_cache=False,
+    llm_limiter=None,
+    compile_limiter=None,
+    compile_engine=COMPILE_ENGINE,
+    compile_queue=None,
+    layout=RESUME_LAYOUT,
+    stream_items=False,
+    mode=GENERATION_MODE,
+    prerank_top_k=PRERANK_TOP_K,
+    backend=GENERATION_BACKEND,
+    profile_id=None,
+    prompt_layout=PROMPT_LAYOUT,
+    prompt_encoding=PROMPT_ENCODING
+):
+    """
+    Generate a tailored resume PDF for a job description, yielding each stage as it finishes.
+
+    Stages are yielded in pipeline order: "load" (resume data, output is the HeadingData), one
+    event per LLM section in SECTION_STAGES as soon as its structured output is parsed (output is
+    the parsed response), "latex" (sources written, output is the resume.tex path), and finally
+    "compile" (output is the PDF path). The PDF compile only starts once every section is in.
+    With stream_items, each completed list item of a section is also yielded as "<section>.item"
+    before the section event itself.
+
+    Parameters:
+    job_description (str): The job description to tailor the resume to.
+    application_id (str): Identifier of the generation, used as the artifacts directory name.
+    concurrent (bool): Invoke the section LLM calls concurrently.
+    max_concurrency (int): Maximum number of section LLM calls in flight at once.
+    bypass_cache (bool): Force fresh LLM samples instead of reusing cached responses.
+    llm_limiter (context manager, optional): Held while the LLM calls run, e.g. a shared threading.Semaphore.
+    compile_limiter (context manager, optional): Held while the PDF compiles.
+    compile_engine (str): LaTeX engine passed to compile_resume_pdf.
+    compile_queue (CompileQueue, optional): Process pool to run the compile on. Its engine takes precedence.
+    layout (str): LaTeX source layout passed to write_latex_sources.
+    stream_items (bool): Stream the section completions token by token and yield their items.
+    mode (str): "sections" for one LLM call per section, "one_shot" for a single call for all of them.
+    prerank_top_k (dict, optional): Candidates per section kept by local pre-ranking. None sends every item.
+    backend (str): "openai", "offline" or "fallback", see GENERATION_BACKENDS.
+    profile_id (str, optional): Stored profile of the candidate, see ingest_resume_file. Defaults
+    to the resume at RESUME_FILE_PATH.
+    prompt_layout (str): Order of the user prompts, see PROMPT_LAYOUTS.
+    prompt_encoding (str): Encoding of the resume sections in the prompts, see PROMPT_ENCODINGS.
+
+    Yields:
+    StageEvent: The finished stage, how long it took and its output.
+
+    Raises:
+    RuntimeError: If the LLM failed to produce a section and backend is "openai".
+    KeyError: If profile_id is not a stored profile.
+    """
+    if mode not in GENERATION_MODES:
+        raise ValueError(f"Unknown generation mode {mode!r}, expected one of {GENERATION_MODES}")
+    if backend not in GENERATION_BACKENDS:
+        raise ValueError(f"Unknown generation backend {backend!r}, expected one of {GENERATION_BACKENDS}")
+    if prompt_layout not in PROMPT_LAYOUTS:
+        raise ValueError(f"Unknown prompt layout {prompt_layout!r}, expected one of {PROMPT_LAYOUTS}")
+    if prompt_encoding not in PROMPT_ENCODINGS:
+        raise ValueError(f"Unknown prompt encoding {prompt_encoding!r}, expected one of {PROMPT_ENCODINGS}")
+
+    # The application ID names the artifacts directory
+    check_application_id(application_id)
+
     # Load and extract resume data
-    job_description = job_description
+    generation_start = time.perf_counter()
     job_id = application_id
     logging.info(f"GENERATING RESUME for JOB_ID: {job_id}")
-    resume_sections = load_and_extract_resume_data(RESUME_FILE_PATH)
-    heading_output = HeadingData.model_validate(resume_sections['heading'])
+    start = time.perf_counter()
+    if profile_id is not None:
+        resume_sections, heading_output, resume_indexes = load_profile(profile_id)
+    else:
+        resume_sections, heading_output, resume_indexes = _load_resume(RESUME_FILE_PATH)
     logging.info(f"HEADING SECTION: {heading_output}")
-    # Get job description and ID from user
-    
-    
+    if prerank_top_k:
+        # In resume order, so the section only varies with the selection, not with the scores
+        resume_sections = prerank_sections(
+            job_description, resume_sections, resume_indexes, prerank_top_k,
+            preserve_order=prompt_layout == "resume_first"
+        )
+
     # Prepare output paths
     output_path = f"{OUTPUT_BASE_PATH}/{job_id}/latex_src"
-    src_path = f"{output_path}/src"
 
     logging.info(f"output_path: {output_path}")
-    logging.info(f"src path: {src_path}")
-    os.makedirs(src_path, exist_ok=True)
-    logging.info(f"Directories created: {output_path}, {src_path}")
+    os.makedirs(output_path, exist_ok=True)
+    logging.info(f"Directory created: {output_path}")
+    yield StageEvent("load", time.perf_counter() - start, heading_output)
+
     # Invoke LLM for each section
     system_prompt = generate_system_prompt()
-    education_output = invoke_llm_for_section(
-        system_prompt, education_prompt, EducationResponse,
-        job_description=job_description, user_education=resume_sections['education']
-    )
-    logging.info(f"EDUCATION: {education_output}")
-    experience_output = invoke_llm_for_section(
-        system_prompt, experience_prompt, ExperienceResponse,
-        job_description=job_description, user_experience=resume_sections['experience'], num_experiences=2
-    )
-    logging.info(f"EXPERIENCE: {experience_output}")
-    projects_output = invoke_llm_for_section(
-        system_prompt, projects_prompt, ProjectsResponse,
-        job_description=job_description, user_projects=resume_sections['projects'], num_projects=2
-    )
-    logging.info(f"PROJECTS: {projects_output}")
-    skills_output = invoke_llm_for_section(
-        system_prompt, skills_prompt, SkillsResponse,
-        job_description=job_description, user_skills=resume_sections['skills']
-    )
-    logging.info(f"SKILLS: {skills_output}")
+    section_requests = build_section_requests(job_description, resume_sections, prompt_layout, prompt_encoding)
+    if backend == "offline":
+        section_results = iter_offline_sections(system_prompt, section_requests)
+    elif mode == "one_shot":
+        section_results = iter_one_shot_sections(
+            system_prompt, build_one_shot_request(job_description, resume_sections, prompt_layout, prompt_encoding), bypass_cache
+        )
+    else:
+        section_results = iter_sections(
+            system_prompt, section_requests, concurrent, max_concurrency, bypass_cache, stream_items
+        )
+    if backend == "fallback":
+        section_results = with_offline_fallback(system_prompt, section_results, section_requests)
+    section_outputs = {}
+    # Close the section stream here even if a section fails, so its calls on the shared LLM event
+    # loop are cancelled now rather than wherever the traceback happens to be released
+    with llm_limiter or contextlib.nullcontext(), contextlib.closing(section_results):
+        for name, output, seconds in section_results:
+            if name in SECTION_STAGES:
+                if output is None:
+                    raise RuntimeError(
+                        f"The LLM did not return the {name} section of {job_id}, see the logged API error. "
+                        f"Use backend='fallback' to tailor failed sections offline."
+                    )
+                logging.info(f"{name.upper()}: {output}")
+                section_outputs[name] = output
+            yield StageEvent(name, seconds, output)
+    education_output = section_outputs['education']
+    experience_output = section_outputs['experience']
+    projects_output = section_outputs['projects']
+    skills_output = section_outputs['skills']
 
+    start = time.perf_counter()
     json_path = f"{OUTPUT_BASE_PATH}/{job_id}/model_outputs.json"
     save_outputs_to_json(
         education_output, experience_output, projects_output, skills_output, json_path
     )
 
-    
     # Write LaTeX files
-    logging.info(f"WRITING resume.tex to path: {output_path}/resume.tex")
-    write_resume_dot_tex(output_path)
-    logging.info(f"WRITING custom-commands.tex to path: {output_path}/custom-commands.tex")
-    write_custom_commands_dot_tex(output_path)
-    write_section_to_latex(write_heading_to_latex, heading_output, f"{src_path}/heading.tex")
-    write_section_to_latex(write_education_to_latex, education_output, f"{src_path}/education.tex")
-    write_section_to_latex(write_skills_to_latex, skills_output, f"{src_path}/skills.tex")
-    write_section_to_latex(write_experience_to_latex, experience_output, f"{src_path}/experience.tex")
-    write_section_to_latex(write_projects_to_latex, projects_output, f"{src_path}/projects.tex")
+    tex_path = write_latex_sources(
+        output_path, heading_output, education_output, skills_output, experience_output, projects_output, layout
+    )
+    yield StageEvent("latex", time.perf_counter() - start, tex_path)
 
     # Convert LaTeX to PDF
-    convert_tex_to_pdf(input_path=f"{output_path}/resume.tex", output_path=f"{OUTPUT_BASE_PATH}/{job_id}")
+    start = time.perf_counter()
+    with compile_limiter or contextlib.nullcontext():
+        engine = compile_queue.engine if compile_queue is not None else compile_engine
+        with span("latex.compile", engine=engine):
+            if compile_queue is not None:
+                compile_queue.compile(input_path=tex_path, output_path=f"{OUTPUT_BASE_PATH}/{job_id}")
+            else:
+                compile_resume_pdf(input_path=tex_path, output_path=f"{OUTPUT_BASE_PATH}/{job_id}", engine=compile_engine)
+    yield StageEvent("compile", time.perf_counter() - start, f"{OUTPUT_BASE_PATH}/{job_id}/resume.pdf")
+    record("generation", time.perf_counter() - generation_start, {"mode": mode, "backend": backend})
 
-    return f"artifacts/{job_id}/resume.pdf"
+def generate_resume(job_description, application_id, **kwargs):
+    """
+    Generate a tailored resume PDF for a job description.
+
+    Parameters:
+    job_description (str): The job description to tailor the resume to.
+    application_id (str): Identifier of the generation, used as the artifacts directory name.
+    **kwargs: Options of iter_resume_stages.
+
+    Returns:
+    str: The path of the generated PDF.
+    """
+    for event in iter_resume_stages(job_description, application_id, **kwargs):
+        pass
+    return event.output
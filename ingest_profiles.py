@@ -0,0 +1,74 @@
+"""
+Ingest candidate resumes into the profile store.
+
+Every resume YAML file (or every .yaml/.yml file of a directory) is parsed once and its
+extracted sections are stored under a profile ID, by default the file name without its
+extension. Generations then look the profile up by ID, see generate.load_profile, instead of
+reading assets/resume.yaml. Re-ingesting an unchanged file is a no-op.
+
+Usage:
+    python ingest_profiles.py profiles/
+    python ingest_profiles.py assets/resume.yaml --profile-id john-doe
+    python ingest_profiles.py --list
+"""
+import argparse
+import logging
+import os
+from generate import get_profile_store, ingest_resume_file, set_profile_store
+from src.profiles import DEFAULT_PROFILES_PATH, ProfileStore
+
+PROFILE_FILE_EXTENSIONS = (".yaml", ".yml")
+
+
+def find_resume_files(sources):
+    """
+    Expand files and directories into the resume YAML files they contain.
+
+    Parameters:
+    sources (list): Paths to resume YAML files or directories of them.
+
+    Returns:
+    list: Paths of the resume YAML files in input order.
+    """
+    file_paths = []
+    for source in sources:
+        if os.path.isdir(source):
+            file_paths.extend(
+                os.path.join(source, file_name) for file_name in sorted(os.listdir(source))
+                if os.path.splitext(file_name)[1] in PROFILE_FILE_EXTENSIONS
+            )
+        else:
+            file_paths.append(source)
+    return file_paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("sources", nargs="*", help="Resume YAML files or directories of them")
+    parser.add_argument("--profile-id", help="Profile ID of a single ingested file (default: the file name)")
+    parser.add_argument("--db", default=DEFAULT_PROFILES_PATH, help="SQLite database of the profile store")
+    parser.add_argument("--list", action="store_true", help="Print the stored profile IDs")
+    args = parser.parse_args()
+
+    set_profile_store(ProfileStore(args.db))
+    file_paths = find_resume_files(args.sources)
+    if args.profile_id and len(file_paths) != 1:
+        parser.error("--profile-id requires exactly one resume file")
+
+    failed = 0
+    for file_path in file_paths:
+        try:
+            ingest_resume_file(file_path, args.profile_id)
+        except Exception as e:
+            logging.error(f"Could not ingest {file_path}: {e}")
+            failed += 1
+    if file_paths:
+        print(f"Ingested {len(file_paths) - failed} of {len(file_paths)} resumes into {args.db}")
+
+    if args.list:
+        for profile_id in get_profile_store().profile_ids():
+            print(profile_id)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+import glob
+import hashlib
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from utils import RESUME_PREAMBLE, convert_tex_to_pdf, remove_build_intermediates
+
+FORMAT_CACHE_DIR = ".cache/latex_formats"
+PDF_STORE_DIR = ".cache/pdf_store"
+# Bounds of the PDF store; the least recently used PDFs are evicted first
+PDF_STORE_MAX_BYTES = 256 * 2 ** 20
+PDF_STORE_MAX_AGE_SECONDS = 30 * 24 * 3600
+COMPILE_ENGINES = ("format", "latexmk")
+
+
+class FormatCompiler:
+    """
+    Compiles resumes against a precompiled format of the fixed resume preamble.
+
+    A plain latexmk run starts TeX cold and loads fontawesome5, lato, hyperref and every other
+    package of the preamble for each resume. Here the preamble is dumped once into a format file
+    with mylatexformat, and each resume is compiled with a single pdflatex pass that loads the
+    dumped memory image instead of re-reading the packages. The format is keyed on a hash of the
+    preamble, so changing RESUME_PREAMBLE rebuilds it automatically.
+    """
+
+    def __init__(self, preamble=RESUME_PREAMBLE, cache_dir=FORMAT_CACHE_DIR):
+        self.preamble = preamble
+        self.cache_dir = os.path.abspath(cache_dir)
+        digest = hashlib.sha256(preamble.encode("utf-8")).hexdigest()[:16]
+        self.format_name = f"resume-preamble-{digest}"
+        self._lock = threading.Lock()
+
+    @property
+    def format_path(self):
+        return os.path.join(self.cache_dir, f"{self.format_name}.fmt")
+
+    def ensure_format(self):
+        """
+        Builds the preamble format file unless it already exists.
+
+        The format is built in a scratch directory and atomically moved into the cache, so
+        concurrent processes never load a partially written format.
+        """
+        if os.path.exists(self.format_path):
+            return self.format_path
+        with self._lock:
+            if os.path.exists(self.format_path):
+                return self.format_path
+            os.makedirs(self.cache_dir, exist_ok=True)
+            build_dir = tempfile.mkdtemp(dir=self.cache_dir)
+            try:
+                with open(os.path.join(build_dir, "preamble.tex"), "w") as f:
+                    f.write(self.preamble + "\\begin{document}\n\\end{document}\n")
+                subprocess.run(
+                    [
+                        "pdflatex", "-ini", "-interaction=nonstopmode", "-halt-on-error",
+                        f"-jobname={self.format_name}", "&pdflatex", "mylatexformat.ltx", "preamble.tex"
+                    ],
+                    cwd=build_dir, check=True, stdout=subprocess.DEVNULL
+                )
+                os.replace(os.path.join(build_dir, f"{self.format_name}.fmt"), self.format_path)
+                logging.info(f"Precompiled resume preamble into {self.format_path}")
+            finally:
+                shutil.rmtree(build_dir, ignore_errors=True)
+        return self.format_path
+
+    def compile(self, input_path, output_path):
+        """
+        Compiles a resume.tex whose preamble matches the precompiled one.
+
+        The build runs inside output_path and its intermediates are removed afterwards.
+
+        Parameters:
+        input_path (str): The path to the LaTeX source file.
+        output_path (str): The directory the resume.pdf should be written to.
+
+        Raises:
+        subprocess.CalledProcessError: If the format build or the compile fails.
+        """
+        self.ensure_format()
+        # Formats are looked up on TEXFORMATS, the trailing separator keeps the default search path
+        env = dict(os.environ, TEXFORMATS=self.cache_dir + os.pathsep)
+        os.makedirs(output_path, exist_ok=True)
+        try:
+            subprocess.run(
+                [
+                    "pdflatex", f"-fmt={self.format_name}", "-interaction=nonstopmode", "-halt-on-error",
+                    f"-output-directory={output_path}", "-jobname=resume", input_path
+                ],
+                env=env, check=True, stdout=subprocess.DEVNULL
+            )
+        finally:
+            remove_build_intermediates(output_path)
+
+
+_format_compiler = FormatCompiler()
+
+
+class PdfStore:
+    """
+    Content-addressed store of compiled resumes.
+
+    A PDF is stored under the hash of the LaTeX sources it was built from, so a document that
+    was compiled before, e.g. after a regenerate that produced the same sections or in a repeated
+    batch run, is served by copying the stored PDF instead of running TeX again. Every hit marks
+    the PDF as used, and after every put the least recently used PDFs are evicted until the store
+    is within max_bytes and nothing is older than max_age_seconds.
+
+    Parameters:
+    store_dir (str): Directory of the stored PDFs.
+    max_bytes (int, optional): Maximum total size of the store.
+    max_age_seconds (float, optional): Maximum time since a PDF was last used.
+    """
+
+    def __init__(self, store_dir=PDF_STORE_DIR, max_bytes=PDF_STORE_MAX_BYTES, max_age_seconds=PDF_STORE_MAX_AGE_SECONDS):
+        self.store_dir = store_dir
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+
+    @staticmethod
+    def source_digest(input_path):
+        """
+        Hashes the LaTeX sources of a resume.
+
+        Covers resume.tex and, for the multi-file layout, custom-commands.tex and src/*.tex
+        next to it. The multi-file resume.tex inputs the other files by the path of the job's
+        source directory, so that path is left out of the hash and identical documents of
+        different jobs share one digest.
+
+        Parameters:
+        input_path (str): The path to resume.tex.
+
+        Returns:
+        str: Hex digest of the file names and contents.
+        """
+        source_dir = os.path.dirname(os.path.abspath(input_path))
+        # Longest first, as the relative spellings are suffixes of the absolute path
+        job_paths = sorted(
+            {source_dir, os.path.relpath(source_dir), os.path.dirname(input_path)} - {""}, key=len, reverse=True
+        )
+        paths = [os.path.abspath(input_path)]
+        paths += sorted(glob.glob(os.path.join(source_dir, "custom-commands.tex")))
+        paths += sorted(glob.glob(os.path.join(source_dir, "src", "*.tex")))
+        digest = hashlib.sha256()
+        for path in paths:
+            with open(path, "rb") as f:
+                content = f.read()
+            for job_path in job_paths:
+                content = content.replace(job_path.encode("utf-8"), b"<source_dir>")
+            digest.update(f"{os.path.relpath(path, source_dir)}\0{len(content)}\0".encode("utf-8"))
+            digest.update(content)
+        return digest.hexdigest()
+
+    def path_for(self, digest):
+        return os.path.join(self.store_dir, f"{digest}.pdf")
+
+    def fetch(self, digest, pdf_path):
+        """
+        Places the stored PDF of a digest at pdf_path.
+
+        Returns:
+        bool: Whether the store had a PDF for the digest.
+        """
+        stored_path = self.path_for(digest)
+        try:
+            # Mark the PDF as recently used for the eviction
+            os.utime(stored_path)
+        except FileNotFoundError:
+            return False
+        _atomic_copy(stored_path, pdf_path)
+        return True
+
+    def put(self, digest, pdf_path):
+        """Adds a freshly compiled PDF to the store and evicts what no longer fits."""
+        os.makedirs(self.store_dir, exist_ok=True)
+        _atomic_copy(pdf_path, self.path_for(digest))
+        self.evict()
+
+    def evict(self, now=None):
+        """
+        Deletes the PDFs unused for max_age_seconds, then the least recently used ones until the
+        store fits into max_bytes.
+
+        Parameters:
+        now (float, optional): Current time, defaults to time.time().
+
+        Returns:
+        int: The number of deleted PDFs.
+        """
+        now = time.time() if now is None else now
+        entries = []
+        for path in glob.glob(os.path.join(self.store_dir, "*.pdf")):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        total_bytes = sum(size for _, size, _ in entries)
+        deleted = 0
+        for mtime, size, path in entries:
+            too_old = self.max_age_seconds is not None and now - mtime > self.max_age_seconds
+            too_big = self.max_bytes is not None and total_bytes > self.max_bytes
+            if not (too_old or too_big):
+                continue
+            try:
+                os.remove(path)
+                deleted += 1
+            except FileNotFoundError:
+                pass
+            total_bytes -= size
+        return deleted
+
+
+def _atomic_copy(source, destination):
+    """
+    Atomically places a copy of source at destination.
+
+    The store and the artifacts never share an inode, as TeX rewrites an existing resume.pdf in
+    place and would otherwise corrupt the stored copy.
+    """
+    directory = os.path.dirname(os.path.abspath(destination))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".pdf.tmp")
+    os.close(fd)
+    try:
+        shutil.copyfile(source, tmp_path)
+        os.replace(tmp_path, destination)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+_pdf_store = PdfStore()
+
+
+def compile_resume_pdf(input_path, output_path, engine="format", use_store=True):
+    """
+    Convert a resume LaTeX source file to a PDF with the chosen engine.
+
+    The "format" engine falls back to latexmk if the format cannot be built or used, e.g.
+    because mylatexformat is not installed. With use_store, sources that were compiled before
+    are served from the PDF store without running TeX.
+
+    Parameters:
+    input_path (str): The path to the LaTeX source file.
+    output_path (str): The path where the output PDF should be saved.
+    engine (str): "format" for the precompiled preamble or "latexmk" for a cold latexmk build.
+    use_store (bool): Reuse and record PDFs in the content-addressed PDF store.
+    """
+    if engine not in COMPILE_ENGINES:
+        raise ValueError(f"Unknown compile engine {engine!r}, expected one of {COMPILE_ENGINES}")
+
+    pdf_path = os.path.join(output_path, "resume.pdf")
+    digest = None
+    if use_store:
+        try:
+            digest = _pdf_store.source_digest(input_path)
+            if _pdf_store.fetch(digest, pdf_path):
+                print(f"PDF served from the PDF store at {output_path}")
+                return
+        except OSError as e:
+            logging.warning(f"PDF store lookup failed, compiling: {e}")
+
+    previous_pdf = _file_version(pdf_path)
+    _compile(input_path, output_path, engine)
+
+    # Only store PDFs this build produced, not a stale one left over from a failed compile
+    if digest is not None and _file_version(pdf_path) not in (None, previous_pdf):
+        try:
+            _pdf_store.put(digest, pdf_path)
+        except OSError as e:
+            logging.warning(f"Could not add {pdf_path} to the PDF store: {e}")
+
+
+def _file_version(path):
+    """Returns the inode and mtime of a file, or None if it does not exist."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns
+
+
+def _compile(input_path, output_path, engine):
+    if engine == "format":
+        try:
+            _format_compiler.compile(input_path, output_path)
+            print(f"PDF successfully generated at {output_path}")
+            return
+        except (subprocess.CalledProcessError, OSError) as e:
+            logging.warning(f"Precompiled format build failed, falling back to latexmk: {e}")
+
+    convert_tex_to_pdf(input_path, output_path)
+
+
+class CompileQueue:
+    """
+    Compiles many resumes at once on a pool of worker processes.
+
+    Every build is confined to its own output directory (see convert_tex_to_pdf), so up to
+    max_workers resumes can compile in parallel without clobbering each other.
+    """
+
+    def __init__(self, max_workers=None, engine="format", use_store=True):
+        if engine not in COMPILE_ENGINES:
+            raise ValueError(f"Unknown compile engine {engine!r}, expected one of {COMPILE_ENGINES}")
+        self.engine = engine
+        self.use_store = use_store
+        if engine == "format":
+            # Build the shared format up front instead of racing to build it in every worker
+            try:
+                _format_compiler.ensure_format()
+            except (subprocess.CalledProcessError, OSError) as e:
+                logging.warning(f"Could not precompile the resume preamble: {e}")
+        self._executor = ProcessPoolExecutor(max_workers=max_workers or os.cpu_count())
+
+    def submit(self, input_path, output_path):
+        """
+        Queues a compile.
+
+        Parameters:
+        input_path (str): The path to the LaTeX source file.
+        output_path (str): The path where the output PDF should be saved.
+
+        Returns:
+        concurrent.futures.Future: Resolves once the compile has finished.
+        """
+        return self._executor.submit(compile_resume_pdf, input_path, output_path, self.engine, self.use_store)
+
+    def compile(self, input_path, output_path):
+        """Queues a compile and waits for it to finish."""
+        self.submit(input_path, output_path).result()
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
@@ -0,0 +1,335 @@
+"""
+HTTP job service in front of generate_resume.
+
+Job descriptions are submitted with POST /jobs and queued on a local work queue that a fixed
+pool of workers drains, so generations never run inside a UI request and concurrent users are
+served in submission order. Clients poll GET /jobs/{id}, or subscribe to GET /jobs/{id}/events
+for a server-sent event per finished stage. Finished resumes are served by reference: the PDF
+from GET /jobs/{id}/pdf and a first-page PNG preview, rendered once per job, from
+GET /jobs/{id}/thumbnail.png. Both are kept in the artifact store configured by
+ARTIFACT_STORE_URL, see artifact_store.py.
+
+Usage:
+    uvicorn service:app --port 8000
+    RESUME_SERVICE_WORKERS=8 uvicorn service:app --port 8000
+"""
+import asyncio
+import json
+import logging
+import os
+import subprocess
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, StreamingResponse
+from pydantic import BaseModel
+
+from artifact_store import check_application_id, create_artifact_store
+from generate import COMPILE_ENGINE, OUTPUT_BASE_PATH, get_profile_store, iter_resume_stages
+from latex_engine import CompileQueue
+from src.config import load_env
+from utils import render_pdf_thumbnail
+
+load_env()
+
+SERVICE_WORKERS = int(os.getenv("RESUME_SERVICE_WORKERS", 4))
+MAX_QUEUED_JOBS = int(os.getenv("RESUME_SERVICE_MAX_QUEUED_JOBS", 1000))
+# Finished jobs kept in memory for status queries. Their PDFs stay available in the artifact store regardless.
+MAX_FINISHED_JOBS = 1000
+THUMBNAIL_WIDTH = 600
+# Artifacts of an application ID never change, a regenerate gets a new ID
+ARTIFACT_CACHE_CONTROL = "public, max-age=86400, immutable"
+JOB_STATUSES = ("queued", "running", "succeeded", "failed")
+
+
+class JobRequest(BaseModel):
+    job_description: str
+    bypass_cache: bool = False
+    # Stored candidate profile to tailor, see ingest_profiles.py. None uses assets/resume.yaml.
+    profile_id: Optional[str] = None
+
+
+@dataclass
+class Job:
+    """A submitted generation and the stage events it has produced so far."""
+    application_id: str
+    job_description: str
+    bypass_cache: bool = False
+    profile_id: Optional[str] = None
+    status: str = "queued"
+    error: Optional[str] = None
+    events: List[dict] = field(default_factory=list)
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    # Set and replaced whenever the job changes, see JobManager._notify
+    changed: asyncio.Event = field(default_factory=asyncio.Event)
+
+    @property
+    def finished(self):
+        return self.status in ("succeeded", "failed")
+
+    def summary(self, after=0):
+        """
+        Describe the job for the API.
+
+        Parameters:
+        after (int): Number of events the client already has.
+
+        Returns:
+        dict: Status, error, PDF path and the events from index after onwards.
+        """
+        return {
+            "application_id": self.application_id,
+            "profile_id": self.profile_id,
+            "status": self.status,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "pdf_url": f"/jobs/{self.application_id}/pdf" if self.status == "succeeded" else None,
+            "thumbnail_url": f"/jobs/{self.application_id}/thumbnail.png" if self.status == "succeeded" else None,
+            "events": self.events[after:],
+            "next_event": len(self.events),
+        }
+
+
+def serialize_event(event):
+    """Convert a StageEvent into a JSON-compatible dict."""
+    output = event.output
+    if isinstance(output, BaseModel):
+        output = output.model_dump()
+    return {"stage": event.stage, "seconds": round(event.seconds, 3), "output": output}
+
+
+class JobManager:
+    """
+    Queues jobs and runs them on a pool of worker threads.
+
+    Each worker takes the oldest queued job and runs iter_resume_stages in its own thread.
+    Stage events are handed back to the event loop as they happen, so subscribers see every
+    section as soon as it is parsed. PDF compiles of all workers share one process pool.
+    """
+
+    def __init__(self, workers=SERVICE_WORKERS, max_queued=MAX_QUEUED_JOBS, compile_engine=COMPILE_ENGINE, artifact_store=None):
+        self.workers = workers
+        self.jobs = {}
+        self.queue = asyncio.Queue(max_queued)
+        self.compile_engine = compile_engine
+        self.artifact_store = artifact_store or create_artifact_store(work_dir=OUTPUT_BASE_PATH)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="resume-worker")
+        self._compile_queue = None
+        self._tasks = []
+
+    async def start(self):
+        self._compile_queue = CompileQueue(engine=self.compile_engine)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if self._compile_queue is not None:
+            self._compile_queue.shutdown(wait=False)
+
+    def submit(self, job_description, bypass_cache=False, profile_id=None):
+        """
+        Queue a job.
+
+        Parameters:
+        job_description (str): The job description to tailor the resume to.
+        bypass_cache (bool): Force fresh LLM samples instead of reusing cached responses.
+        profile_id (str, optional): Stored candidate profile to tailor.
+
+        Returns:
+        Job: The queued job.
+
+        Raises:
+        asyncio.QueueFull: If MAX_QUEUED_JOBS jobs are already waiting.
+        """
+        job = Job(str(uuid.uuid4()), job_description, bypass_cache, profile_id)
+        self.queue.put_nowait(job)
+        self.jobs[job.application_id] = job
+        self._forget_finished_jobs()
+        return job
+
+    def _forget_finished_jobs(self):
+        finished = [job for job in self.jobs.values() if job.finished]
+        for job in sorted(finished, key=lambda job: job.finished_at)[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job.application_id]
+
+    def _notify(self, job):
+        changed, job.changed = job.changed, asyncio.Event()
+        changed.set()
+
+    def _publish(self, job, event):
+        job.events.append(event)
+        self._notify(job)
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self.queue.get()
+            job.status = "running"
+            self._notify(job)
+            try:
+                compiled = await loop.run_in_executor(self._executor, self._run, loop, job)
+                job.status = "succeeded" if compiled else "failed"
+                if job.status == "failed":
+                    job.error = "PDF compilation did not produce a PDF"
+            except Exception as e:
+                logging.exception(f"Resume generation failed for {job.application_id}")
+                job.status = "failed"
+                job.error = f"{type(e).__name__}: {e}"
+            finally:
+                job.finished_at = time.time()
+                self._notify(job)
+                self.queue.task_done()
+
+    def _run(self, loop, job):
+        for event in iter_resume_stages(
+            job.job_description, job.application_id,
+            bypass_cache=job.bypass_cache, compile_queue=self._compile_queue, stream_items=True,
+            profile_id=job.profile_id
+        ):
+            loop.call_soon_threadsafe(self._publish, job, serialize_event(event))
+        if not os.path.exists(f"{OUTPUT_BASE_PATH}/{job.application_id}/resume.pdf"):
+            return False
+        # Render the preview while still on the worker thread, so the first request finds it cached.
+        # finalize stores it with the other kept artifacts.
+        ensure_thumbnail(job.application_id, self.artifact_store, store=False)
+        self.artifact_store.finalize(job.application_id)
+        return True
+
+
+def ensure_thumbnail(application_id, artifact_store, store=True):
+    """
+    Render the first-page preview of a job's PDF unless it is already stored.
+
+    Parameters:
+    application_id (str): The application ID of the job.
+    artifact_store (ArtifactStore): The store of the job's artifacts.
+    store (bool): Save a newly rendered thumbnail to the artifact store. Pass False for jobs that
+    are not finalized yet, finalize stores the thumbnail along with the other artifacts.
+
+    Returns:
+    str: The local path of the thumbnail, or None if there is no PDF or it could not be rendered.
+    """
+    thumbnail_path = artifact_store.fetch(application_id, "thumbnail.png")
+    if thumbnail_path is not None:
+        return thumbnail_path
+    pdf_path = artifact_store.fetch(application_id, "resume.pdf")
+    if pdf_path is None:
+        return None
+    thumbnail_path = os.path.join(os.path.dirname(pdf_path), "thumbnail.png")
+    try:
+        render_pdf_thumbnail(pdf_path, thumbnail_path, THUMBNAIL_WIDTH)
+    except (subprocess.CalledProcessError, OSError) as e:
+        logging.warning(f"Could not render the thumbnail of {pdf_path}: {e}")
+        return None
+    if store:
+        artifact_store.save(application_id, "thumbnail.png")
+    return thumbnail_path
+
+
+manager = JobManager()
+
+
+@asynccontextmanager
+async def lifespan(app):
+    await manager.start()
+    try:
+        yield
+    finally:
+        await manager.stop()
+
+
+app = FastAPI(title="Resume generation service", lifespan=lifespan)
+
+
+def check_job_id(application_id):
+    """Rejects application IDs from URLs before they reach the job table or the artifact store."""
+    try:
+        check_application_id(application_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def get_job(application_id):
+    check_job_id(application_id)
+    job = manager.jobs.get(application_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job {application_id}")
+    return job
+
+
+@app.post("/jobs", status_code=202)
+async def create_job(request: JobRequest):
+    if not request.job_description.strip():
+        raise HTTPException(status_code=422, detail="The job description is empty")
+    if request.profile_id is not None and request.profile_id not in get_profile_store():
+        raise HTTPException(status_code=404, detail=f"Unknown profile {request.profile_id}")
+    try:
+        job = manager.submit(request.job_description, request.bypass_cache, request.profile_id)
+    except asyncio.QueueFull:
+        raise HTTPException(status_code=503, detail="Too many queued jobs, retry later", headers={"Retry-After": "30"})
+    return {"application_id": job.application_id, "status": job.status, "queue_position": manager.queue.qsize()}
+
+
+@app.get("/jobs/{application_id}")
+async def read_job(application_id: str, after: int = 0):
+    return get_job(application_id).summary(after)
+
+
+@app.get("/jobs/{application_id}/events")
+async def stream_job_events(application_id: str, after: int = 0):
+    job = get_job(application_id)
+
+    async def events():
+        index = after
+        while True:
+            # Take the change signal before reading, so an update in between is not missed
+            changed = job.changed
+            for event in job.events[index:]:
+                yield f"data: {json.dumps(event)}\n\n"
+            index = len(job.events)
+            if job.finished:
+                yield f"event: status\ndata: {json.dumps(job.summary(index))}\n\n"
+                return
+            await changed.wait()
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+def ensure_finished(application_id):
+    check_job_id(application_id)
+    job = manager.jobs.get(application_id)
+    if job is not None and not job.finished:
+        raise HTTPException(status_code=409, detail=f"Job {application_id} is still {job.status}")
+
+
+@app.get("/jobs/{application_id}/pdf")
+async def read_job_pdf(application_id: str, download: bool = False):
+    ensure_finished(application_id)
+    pdf_path = await run_in_threadpool(manager.artifact_store.fetch, application_id, "resume.pdf")
+    if pdf_path is None:
+        raise HTTPException(status_code=404, detail=f"No PDF for job {application_id}")
+    return FileResponse(
+        pdf_path, media_type="application/pdf", filename="resume.pdf",
+        content_disposition_type="attachment" if download else "inline",
+        headers={"Cache-Control": ARTIFACT_CACHE_CONTROL}
+    )
+
+
+@app.get("/jobs/{application_id}/thumbnail.png")
+async def read_job_thumbnail(application_id: str):
+    ensure_finished(application_id)
+    thumbnail_path = await run_in_threadpool(ensure_thumbnail, application_id, manager.artifact_store)
+    if thumbnail_path is None:
+        raise HTTPException(status_code=404, detail=f"No preview for job {application_id}")
+    return FileResponse(thumbnail_path, media_type="image/png", headers={"Cache-Control": ARTIFACT_CACHE_CONTROL})
@@ -0,0 +1,97 @@
+"""
+Client of the resume generation service in service.py.
+"""
+import json
+import os
+import httpx
+from src.config import load_env
+
+load_env()
+
+RESUME_SERVICE_URL = os.getenv("RESUME_SERVICE_URL", "http://127.0.0.1:8000")
+# Artifacts are fetched by the user's browser, which may reach the service under another address
+RESUME_SERVICE_PUBLIC_URL = os.getenv("RESUME_SERVICE_PUBLIC_URL", RESUME_SERVICE_URL)
+# Generations take tens of seconds, so event streams are allowed to idle much longer than requests
+REQUEST_TIMEOUT = httpx.Timeout(10.0, read=300.0)
+
+
+def submit_job(job_description, bypass_cache=False, base_url=RESUME_SERVICE_URL, profile_id=None):
+    """
+    Queue a resume generation.
+
+    Parameters:
+    job_description (str): The job description to tailor the resume to.
+    bypass_cache (bool): Force fresh LLM samples instead of reusing cached responses.
+    base_url (str): URL of the service.
+    profile_id (str, optional): Stored candidate profile to tailor. Defaults to the service's resume.yaml.
+
+    Returns:
+    str: The application ID of the queued job.
+
+    Raises:
+    httpx.HTTPStatusError: If the service rejects the job, e.g. because its queue is full or the profile is unknown.
+    """
+    response = httpx.post(
+        f"{base_url}/jobs",
+        json={"job_description": job_description, "bypass_cache": bypass_cache, "profile_id": profile_id},
+        timeout=REQUEST_TIMEOUT
+    )
+    response.raise_for_status()
+    return response.json()["application_id"]
+
+
+def iter_job_events(application_id, base_url=RESUME_SERVICE_URL):
+    """
+    Subscribe to the stage events of a job.
+
+    Parameters:
+    application_id (str): The application ID returned by submit_job.
+    base_url (str): URL of the service.
+
+    Yields:
+    dict: The stage events ({"stage", "seconds", "output"}) as they happen, followed by a final
+    {"stage": "status", ...} with the job summary once the job has finished.
+    """
+    with httpx.stream("GET", f"{base_url}/jobs/{application_id}/events", timeout=REQUEST_TIMEOUT) as response:
+        response.raise_for_status()
+        event_type = "message"
+        for line in response.iter_lines():
+            if line.startswith("event: "):
+                event_type = line[len("event: "):]
+            elif line.startswith("data: "):
+                payload = json.loads(line[len("data: "):])
+                if event_type == "status":
+                    yield {"stage": "status", "seconds": 0.0, "output": payload}
+                    return
+                yield payload
+            elif not line:
+                event_type = "message"
+
+
+def pdf_url(application_id, download=False, public_url=RESUME_SERVICE_PUBLIC_URL):
+    """
+    Build the browser-facing URL of a job's PDF.
+
+    Parameters:
+    application_id (str): The application ID returned by submit_job.
+    download (bool): Ask the browser to save the PDF instead of displaying it.
+    public_url (str): URL of the service as seen from the user's browser.
+
+    Returns:
+    str: The URL of the PDF.
+    """
+    return f"{public_url}/jobs/{application_id}/pdf" + ("?download=true" if download else "")
+
+
+def thumbnail_url(application_id, public_url=RESUME_SERVICE_PUBLIC_URL):
+    """
+    Build the browser-facing URL of a job's first-page preview.
+
+    Parameters:
+    application_id (str): The application ID returned by submit_job.
+    public_url (str): URL of the service as seen from the user's browser.
+
+    Returns:
+    str: The URL of the PNG thumbnail.
+    """
+    return f"{public_url}/jobs/{application_id}/thumbnail.png"
@@ -0,0 +1,153 @@
+import functools
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pydantic import BaseModel
+
+DEFAULT_CACHE_PATH = ".cache/llm_responses.sqlite3"
+DEFAULT_TTL_SECONDS = 7 * 24 * 60 * 60
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+@functools.lru_cache(maxsize=None)
+def schema_hash(response_format):
+    """
+    Hashes the JSON schema of a Pydantic response model.
+
+    Generating the schema is far more expensive than the rest of a cache lookup and model
+    classes do not change at runtime, so the hash is computed once per class.
+
+    Args:
+        response_format (BaseModel): A Pydantic model class.
+
+    Returns:
+        str: Hex digest that changes whenever the schema changes.
+    """
+    schema = json.dumps(response_format.model_json_schema(), sort_keys=True)
+    return hashlib.sha256(schema.encode("utf-8")).hexdigest()
+
+
+def make_cache_key(model, system_prompt, prompt, response_format):
+    """
+    Builds the content address of an LLM request.
+
+    Args:
+        model (str): The model name.
+        system_prompt (str): The system-level instructions for the model.
+        prompt (str): The rendered user prompt.
+        response_format (BaseModel): The Pydantic model class used for structured output.
+
+    Returns:
+        str: Hex digest identifying the request.
+    """
+    material = json.dumps([model, system_prompt, prompt, schema_hash(response_format)])
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Persistent SQLite cache of parsed structured LLM responses.
+
+    Entries expire after ttl_seconds and the least recently used entries are evicted
+    once the stored payloads exceed max_bytes.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl_seconds=DEFAULT_TTL_SECONDS, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    payload TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+
+    def get(self, key, response_format):
+        """
+        Looks up a cached response.
+
+        Args:
+            key (str): Cache key from make_cache_key.
+            response_format (BaseModel): Pydantic model class to validate the payload into.
+
+        Returns:
+            BaseModel: The cached response, or None on a miss or expired entry.
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT payload, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            payload, created_at = row
+            if self.ttl_seconds is not None and now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        try:
+            return response_format.model_validate_json(payload)
+        except ValueError as e:
+            logging.warning(f"Discarding unreadable cache entry {key}: {e}")
+            self.delete(key)
+            return None
+
+    def put(self, key, response: BaseModel):
+        """
+        Stores a parsed response and evicts entries beyond the TTL and size bounds.
+
+        Args:
+            key (str): Cache key from make_cache_key.
+            response (BaseModel): The parsed response to store.
+        """
+        payload = response.model_dump_json()
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, payload, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, payload, len(payload), now, now),
+            )
+            self._evict(now)
+
+    def delete(self, key):
+        """Removes a single entry."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def clear(self):
+        """Removes every entry."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+
+    def _evict(self, now):
+        if self.ttl_seconds is not None:
+            self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+        if self.max_bytes is None:
+            return
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = []
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at"):
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", evicted)
@@ -0,0 +1,14 @@
+import functools
+from dotenv import load_dotenv
+
+
+@functools.cache
+def load_env():
+    """
+    Loads the .env file into the environment, once per process.
+
+    Every module that reads settings from the environment calls this before reading them, so
+    values in .env apply no matter which module is imported first. Variables that are already
+    set in the environment take precedence over .env.
+    """
+    load_dotenv()
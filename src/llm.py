@@ -1,69 +1,453 @@
-from openai import OpenAI
+import asyncio
+import httpx
+from openai import OpenAI, AsyncOpenAI
 import logging
-from pydantic import BaseModel
-from dotenv import load_dotenv
+import typing
+from pydantic import BaseModel, ValidationError
 import os
+import threading
+from src.cache import ResponseCache, make_cache_key
+from src.config import load_env
+from src.metrics import record_usage, span
+from src.scheduler import (
+    DEFAULT_REQUESTS_PER_MINUTE,
+    DEFAULT_TOKENS_PER_MINUTE,
+    RateLimitScheduler,
+    estimate_tokens
+)
 
-load_dotenv()
+OMNI_MODEL = "gpt-4o"
+MINI_MODEL = "gpt-4o-mini"
+# Connection pool of every client. Keep-alive connections are kept for as many requests as can be
+# in flight at once (batch workers times section calls), so busy workers reuse warm connections.
+DEFAULT_MAX_CONNECTIONS = 64
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 64
+DEFAULT_KEEPALIVE_EXPIRY = 30.0
+# Seconds a request may take and seconds to establish a connection; the SDK default is 10 minutes
+DEFAULT_TIMEOUT = 120.0
+DEFAULT_CONNECT_TIMEOUT = 5.0
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+_client = None
+_client_lock = threading.Lock()
+_async_client_factory = None
+_async_client = None
+_llm_loop = None
+_llm_loop_lock = threading.Lock()
 
-def invoke_omni(system_prompt, prompt, response_format):
+_response_cache = None
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+def get_response_cache():
+    """
+    Returns the process-wide response cache, creating it on first use.
+
+    Returns:
+        ResponseCache: The shared cache.
+    """
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache()
+    return _response_cache
+
+def set_response_cache(cache):
+    """
+    Replaces the process-wide response cache.
+
+    Args:
+        cache (ResponseCache): The cache to use from now on.
+    """
+    global _response_cache
+    _response_cache = cache
+
+def get_scheduler(model):
+    """
+    Returns the process-wide rate limit scheduler of a model, creating it on first use.
+
+    OpenAI rate limits apply per model. The budgets are read from the OPENAI_REQUESTS_PER_MINUTE
+    and OPENAI_TOKENS_PER_MINUTE environment variables and default to the tier 1 limits of GPT-4o.
+
+    Args:
+        model (str): The model name, e.g. "gpt-4o".
+
+    Returns:
+        RateLimitScheduler: The shared scheduler of the model.
+    """
+    with _schedulers_lock:
+        if model not in _schedulers:
+            load_env()
+            _schedulers[model] = RateLimitScheduler(
+                requests_per_minute=int(os.getenv("OPENAI_REQUESTS_PER_MINUTE", DEFAULT_REQUESTS_PER_MINUTE)),
+                tokens_per_minute=int(os.getenv("OPENAI_TOKENS_PER_MINUTE", DEFAULT_TOKENS_PER_MINUTE))
+            )
+        return _schedulers[model]
+
+def set_scheduler(model, scheduler):
+    """
+    Replaces the rate limit scheduler of a model.
+
+    Args:
+        model (str): The model name, e.g. "gpt-4o".
+        scheduler (RateLimitScheduler): The scheduler to use from now on.
+    """
+    with _schedulers_lock:
+        _schedulers[model] = scheduler
+
+def _cache_lookup(model, system_prompt, prompt, response_format, bypass_cache):
+    """Returns the cache key of a request and its cached response, if any."""
+    cache_key = make_cache_key(model, system_prompt, prompt, response_format)
+    if bypass_cache:
+        return cache_key, None
+    return cache_key, get_response_cache().get(cache_key, response_format)
+
+def _cache_store(cache_key, parsed):
+    """Stores a parsed response, ignoring refusals and failures."""
+    if parsed is not None:
+        get_response_cache().put(cache_key, parsed)
+
+def _float_env(name, default):
+    value = os.getenv(name)
+    return float(value) if value else default
+
+def client_settings():
+    """
+    Returns the connection pool limits and timeouts of the OpenAI clients.
+
+    Read from the OPENAI_MAX_CONNECTIONS, OPENAI_MAX_KEEPALIVE_CONNECTIONS, OPENAI_KEEPALIVE_EXPIRY,
+    OPENAI_TIMEOUT and OPENAI_CONNECT_TIMEOUT environment variables, after loading .env.
+
+    Returns:
+        tuple: (httpx.Limits, httpx.Timeout)
+    """
+    load_env()
+    max_connections = int(_float_env("OPENAI_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS))
+    limits = httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=min(
+            max_connections, int(_float_env("OPENAI_MAX_KEEPALIVE_CONNECTIONS", DEFAULT_MAX_KEEPALIVE_CONNECTIONS))
+        ),
+        keepalive_expiry=_float_env("OPENAI_KEEPALIVE_EXPIRY", DEFAULT_KEEPALIVE_EXPIRY)
+    )
+    timeout = httpx.Timeout(
+        _float_env("OPENAI_TIMEOUT", DEFAULT_TIMEOUT), connect=_float_env("OPENAI_CONNECT_TIMEOUT", DEFAULT_CONNECT_TIMEOUT)
+    )
+    return limits, timeout
+
+def get_client():
+    """
+    Returns the process-wide OpenAI client, creating it on first use.
+
+    The client and its connection pool are thread-safe and shared by every synchronous call, so
+    concurrent workers reuse keep-alive connections instead of opening one per request.
+
+    Returns:
+        OpenAI: The shared client.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            limits, timeout = client_settings()
+            # Retries are handled by the rate limit scheduler, which also honors the quota of other callers
+            _client = OpenAI(
+                api_key=os.getenv("OPENAI_API_KEY"),
+                max_retries=0,
+                timeout=timeout,
+                http_client=httpx.Client(limits=limits, timeout=timeout)
+            )
+        return _client
+
+def set_client(client):
+    """
+    Replaces the process-wide OpenAI client, e.g. with a local fake for tests and benchmarks.
+
+    Args:
+        client (OpenAI): The client to use from now on, or None to build the default one again on next use.
+    """
+    global _client
+    with _client_lock:
+        _client = client
+
+def create_async_client():
+    """
+    Creates a new async OpenAI client.
+
+    Async clients hold a connection pool bound to the event loop they are first used on, so
+    callers running their own event loop (e.g. asyncio.run) create one and close it when done.
+    Calls on the shared LLM event loop use get_async_client instead. The pool has the limits and
+    timeouts of client_settings.
+
+    Returns:
+        AsyncOpenAI: A fresh async client, or whatever the factory set with set_async_client_factory returns.
+    """
+    if _async_client_factory is not None:
+        return _async_client_factory()
+    limits, timeout = client_settings()
+    return AsyncOpenAI(
+        api_key=os.getenv("OPENAI_API_KEY"),
+        max_retries=0,
+        timeout=timeout,
+        http_client=httpx.AsyncClient(limits=limits, timeout=timeout)
+    )
+
+def set_async_client_factory(factory):
+    """
+    Replaces how create_async_client builds async clients, e.g. with a local fake for tests and benchmarks.
+
+    Args:
+        factory (callable): Called without arguments to create a client, or None for the default AsyncOpenAI.
+    """
+    global _async_client_factory, _async_client
+    with _llm_loop_lock:
+        _async_client_factory = factory
+        previous, _async_client = _async_client, None
+    if previous is not None:
+        run_on_llm_loop(previous.close())
+
+def get_llm_loop():
+    """
+    Returns the process-wide event loop of the async LLM calls, starting its thread on first use.
+
+    Synchronous callers on any thread submit their concurrent LLM calls to this one long-lived
+    loop with run_on_llm_loop, so they all share the keep-alive connections of get_async_client
+    instead of building and tearing down a connection pool per generation.
+
+    Returns:
+        asyncio.AbstractEventLoop: The shared loop, running on a daemon thread.
     """
-    Invokes GPT-4o with a mandatory structured output.
+    global _llm_loop
+    with _llm_loop_lock:
+        if _llm_loop is None:
+            _llm_loop = asyncio.new_event_loop()
+            threading.Thread(target=_llm_loop.run_forever, name="llm-event-loop", daemon=True).start()
+        return _llm_loop
+
+def in_llm_loop():
+    """Returns whether the caller runs on the shared LLM event loop."""
+    try:
+        return asyncio.get_running_loop() is _llm_loop
+    except RuntimeError:
+        return False
+
+def run_on_llm_loop(coroutine):
+    """
+    Runs a coroutine on the shared LLM event loop and waits for its result.
+
+    Args:
+        coroutine (coroutine): The coroutine to run. Must not be called from the loop itself.
+
+    Returns:
+        Any: The result of the coroutine. Its exceptions are raised in the caller.
+    """
+    return asyncio.run_coroutine_threadsafe(coroutine, get_llm_loop()).result()
+
+def get_async_client():
+    """
+    Returns the process-wide async client, creating it with create_async_client on first use.
+
+    Its connection pool is bound to the shared LLM event loop, so it may only be used by
+    coroutines running there (see run_on_llm_loop).
+
+    Returns:
+        AsyncOpenAI: The shared async client.
+    """
+    global _async_client
+    with _llm_loop_lock:
+        if _async_client is None:
+            _async_client = create_async_client()
+        return _async_client
+
+def _parse_request(model, system_prompt, prompt, response_format, timeout):
+    """Returns the keyword arguments of a structured output request."""
+    request = {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": prompt},
+        ],
+        "response_format": response_format,
+    }
+    if timeout is not None:
+        request["timeout"] = timeout
+    return request
+
+def _check_response_format(response_format):
+    if not response_format or not issubclass(response_format, BaseModel):
+        raise ValueError("A valid response_format inheriting from BaseModel must be provided.")
+
+def invoke(model, system_prompt, prompt, response_format, llm_client=None, bypass_cache=False, timeout=None):
+    """
+    Invokes a model with a mandatory structured output.
 
     Args:
+        model (str): The model name, e.g. OMNI_MODEL or MINI_MODEL.
         system_prompt (str): The system-level instructions for the model.
         prompt (str): The user's input prompt.
         response_format (BaseModel): A Pydantic model class for enforcing structured output.
+        llm_client (OpenAI, optional): Client to use instead of the shared one, see get_client.
+        bypass_cache (bool): Skip the cache lookup and force a fresh sample. The fresh response is still cached.
+        timeout (float, optional): Seconds this request may take, overriding OPENAI_TIMEOUT.
 
     Returns:
-        BaseModel: Parsed structured response as per the response_format.
+        BaseModel: Parsed structured response as per the response_format, or None on error.
     """
-    if not response_format or not issubclass(response_format, BaseModel):
-        raise ValueError("A valid response_format inheriting from BaseModel must be provided.")
+    _check_response_format(response_format)
 
+    cache_key, cached = _cache_lookup(model, system_prompt, prompt, response_format, bypass_cache)
+    if cached is not None:
+        return cached
+
+    request = _parse_request(model, system_prompt, prompt, response_format, timeout)
     try:
-        completion = client.beta.chat.completions.parse(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": prompt},
-            ],
-            response_format=response_format,
-        )
-        return completion.choices[0].message.parsed
+        with span("llm.call", model=model, response_format=response_format.__name__) as values:
+            completion = get_scheduler(model).call(
+                lambda: (llm_client or get_client()).beta.chat.completions.parse(**request),
+                estimate_tokens(system_prompt, prompt)
+            )
+            record_usage(values, getattr(completion, "usage", None))
+        parsed = completion.choices[0].message.parsed
+        _cache_store(cache_key, parsed)
+        return parsed
     except Exception as e:
         logging.error(f"Error invoking OpenAI API: {e}")
         return None
-    
 
-def invoke_mini(system_prompt, prompt, response_format):
+async def ainvoke(model, system_prompt, prompt, response_format, llm_client, bypass_cache=False, timeout=None):
     """
-    Invokes GPT-4o-mini with a mandatory structured output.
+    Asynchronously invokes a model with a mandatory structured output.
 
     Args:
+        model (str): The model name, e.g. OMNI_MODEL or MINI_MODEL.
         system_prompt (str): The system-level instructions for the model.
         prompt (str): The user's input prompt.
         response_format (BaseModel): A Pydantic model class for enforcing structured output.
+        llm_client (AsyncOpenAI): Async client, see create_async_client.
+        bypass_cache (bool): Skip the cache lookup and force a fresh sample. The fresh response is still cached.
+        timeout (float, optional): Seconds this request may take, overriding OPENAI_TIMEOUT.
 
     Returns:
-        BaseModel: Parsed structured response as per the response_format.
+        BaseModel: Parsed structured response as per the response_format, or None on error.
     """
-    if not response_format or not issubclass(response_format, BaseModel):
-        raise ValueError("A valid response_format inheriting from BaseModel must be provided.")
+    _check_response_format(response_format)
+
+    cache_key, cached = _cache_lookup(model, system_prompt, prompt, response_format, bypass_cache)
+    if cached is not None:
+        return cached
 
+    request = _parse_request(model, system_prompt, prompt, response_format, timeout)
     try:
-        completion = client.beta.chat.completions.parse(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": prompt},
-            ],
-            response_format=response_format,
-        )
-        return completion.choices[0].message.parsed
+        with span("llm.call", model=model, response_format=response_format.__name__) as values:
+            completion = await get_scheduler(model).acall(
+                lambda: llm_client.beta.chat.completions.parse(**request),
+                estimate_tokens(system_prompt, prompt)
+            )
+            record_usage(values, getattr(completion, "usage", None))
+        parsed = completion.choices[0].message.parsed
+        _cache_store(cache_key, parsed)
+        return parsed
     except Exception as e:
         logging.error(f"Error invoking OpenAI API: {e}")
         return None
 
+def invoke_omni(system_prompt, prompt, response_format, llm_client=None, bypass_cache=False, timeout=None):
+    """Invokes GPT-4o with a mandatory structured output, see invoke."""
+    return invoke(OMNI_MODEL, system_prompt, prompt, response_format, llm_client, bypass_cache, timeout)
+
+def invoke_mini(system_prompt, prompt, response_format, llm_client=None, bypass_cache=False, timeout=None):
+    """Invokes GPT-4o-mini with a mandatory structured output, see invoke."""
+    return invoke(MINI_MODEL, system_prompt, prompt, response_format, llm_client, bypass_cache, timeout)
+
+async def ainvoke_omni(system_prompt, prompt, response_format, llm_client, bypass_cache=False, timeout=None):
+    """Asynchronously invokes GPT-4o with a mandatory structured output, see ainvoke."""
+    return await ainvoke(OMNI_MODEL, system_prompt, prompt, response_format, llm_client, bypass_cache, timeout)
+
+async def ainvoke_mini(system_prompt, prompt, response_format, llm_client, bypass_cache=False, timeout=None):
+    """Asynchronously invokes GPT-4o-mini with a mandatory structured output, see ainvoke."""
+    return await ainvoke(MINI_MODEL, system_prompt, prompt, response_format, llm_client, bypass_cache, timeout)
+
+
+def _list_field(response_format):
+    """Returns the name and item model of the list field wrapped by a section response model."""
+    field_name, field = next(iter(response_format.model_fields.items()))
+    return field_name, typing.get_args(field.annotation)[0]
+
+
+def _emit_completed_items(partial, field_name, item_model, emitted, on_item):
+    """
+    Passes the newly completed list items of a partially parsed response to on_item.
+
+    An item is complete once the model has started on the next one, so every item except
+    the last one of the partial list is final.
+
+    Returns:
+        int: The number of items emitted so far.
+    """
+    items = (partial or {}).get(field_name) or []
+    while emitted < len(items) - 1:
+        try:
+            item = item_model.model_validate(items[emitted])
+        except ValidationError:
+            break
+        on_item(item)
+        emitted += 1
+    return emitted
+
+
+async def astream_omni(system_prompt, prompt, response_format, llm_client, on_item=None, bypass_cache=False, timeout=None):
+    """
+    Invokes GPT-4o with a mandatory structured output, streaming the completion.
+
+    The response is parsed incrementally while tokens arrive and on_item is called with every
+    element of the response's list field (e.g. each ExperienceItem of an ExperienceResponse) as
+    soon as it is complete, so rendering can start before the whole completion has been received.
+
+    Args:
+        system_prompt (str): The system-level instructions for the model.
+        prompt (str): The user's input prompt.
+        response_format (BaseModel): A section response model from src/responses.py wrapping a single list field.
+        llm_client (AsyncOpenAI): Async client, see create_async_client.
+        on_item (callable, optional): Called with each completed list item, in order.
+        bypass_cache (bool): Skip the cache lookup and force a fresh sample. The fresh response is still cached.
+        timeout (float, optional): Seconds this request may take, overriding OPENAI_TIMEOUT.
+
+    Returns:
+        BaseModel: Parsed structured response as per the response_format, or None on error.
+    """
+    _check_response_format(response_format)
+
+    field_name, item_model = _list_field(response_format)
+    on_item = on_item or (lambda item: None)
+
+    cache_key, cached = _cache_lookup(OMNI_MODEL, system_prompt, prompt, response_format, bypass_cache)
+    if cached is not None:
+        for item in getattr(cached, field_name):
+            on_item(item)
+        return cached
+
+    emitted = 0
+
+    async def stream_completion():
+        nonlocal emitted
+        async with llm_client.beta.chat.completions.stream(
+            **_parse_request(OMNI_MODEL, system_prompt, prompt, response_format, timeout)
+        ) as stream:
+            async for event in stream:
+                if event.type == "content.delta":
+                    emitted = _emit_completed_items(event.parsed, field_name, item_model, emitted, on_item)
+            return await stream.get_final_completion()
+
+    try:
+        # Items already passed to on_item cannot be taken back, so only retry streams that failed before the first one
+        with span("llm.call", model=OMNI_MODEL, response_format=response_format.__name__, stream="true") as values:
+            completion = await get_scheduler(OMNI_MODEL).acall(
+                stream_completion, estimate_tokens(system_prompt, prompt), retryable=lambda: emitted == 0
+            )
+            record_usage(values, getattr(completion, "usage", None))
+        parsed = completion.choices[0].message.parsed
+        if parsed is not None:
+            for item in getattr(parsed, field_name)[emitted:]:
+                on_item(item)
+        _cache_store(cache_key, parsed)
+        return parsed
+    except Exception as e:
+        logging.error(f"Error invoking OpenAI API: {e}")
+        return None
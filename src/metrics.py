@@ -0,0 +1,276 @@
+import bisect
+import contextlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Upper bounds in seconds of the Prometheus histogram buckets, from template renders to LLM calls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_sinks = []
+_sinks_lock = threading.Lock()
+
+
+def add_sink(sink):
+    """
+    Registers a metrics sink. Every recorded span is passed to all registered sinks.
+
+    Args:
+        sink: An object with a record(name, seconds, labels, values) method.
+
+    Returns:
+        The sink, for chaining.
+    """
+    global _sinks
+    with _sinks_lock:
+        # Copy on write so record() can iterate without taking the lock
+        _sinks = _sinks + [sink]
+    return sink
+
+
+def remove_sink(sink):
+    """Unregisters a metrics sink."""
+    global _sinks
+    with _sinks_lock:
+        _sinks = [registered for registered in _sinks if registered is not sink]
+
+
+def record(name, seconds, labels=None, values=None):
+    """
+    Passes a finished span to every registered sink.
+
+    Args:
+        name (str): The span name, e.g. "llm.call".
+        seconds (float): How long the span took.
+        labels (dict, optional): Low-cardinality string labels, e.g. {"model": "gpt-4o"}.
+        values (dict, optional): Numeric values measured during the span, e.g. token counts.
+    """
+    for sink in _sinks:
+        sink.record(name, seconds, labels or {}, values or {})
+
+
+@contextlib.contextmanager
+def span(name, **labels):
+    """
+    Times a block and records it as a span.
+
+    The block can add numeric values to the yielded dict, e.g. the token counts of an LLM call.
+    Spans that raise are recorded with an error="true" label.
+
+    Args:
+        name (str): The span name, e.g. "llm.call".
+        **labels (str): Low-cardinality labels of the span.
+
+    Yields:
+        dict: Values to record with the span.
+    """
+    values = {}
+    start = time.perf_counter()
+    try:
+        yield values
+    except BaseException:
+        labels["error"] = "true"
+        raise
+    finally:
+        if _sinks:
+            record(name, time.perf_counter() - start, labels, values)
+
+
+def record_usage(values, usage):
+    """
+    Adds the token counts of a completion's usage to the values of a span.
+
+    Prompt tokens the provider served from its prompt prefix cache are recorded separately as
+    cached_prompt_tokens, so the uncached share is prompt_tokens - cached_prompt_tokens.
+
+    Args:
+        values (dict): The dict yielded by span.
+        usage (CompletionUsage, optional): The usage of the completion.
+    """
+    if usage is not None:
+        values["prompt_tokens"] = usage.prompt_tokens
+        values["completion_tokens"] = usage.completion_tokens
+        details = getattr(usage, "prompt_tokens_details", None)
+        values["cached_prompt_tokens"] = getattr(details, "cached_tokens", None) or 0
+
+
+def _series_key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+class HistogramSink:
+    """
+    Keeps every span duration in memory and reports percentiles per span name and labels.
+    """
+
+    def __init__(self):
+        self.durations = {}
+        self.totals = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds, labels, values):
+        key = _series_key(name, labels)
+        with self._lock:
+            bisect.insort(self.durations.setdefault(key, []), seconds)
+            totals = self.totals.setdefault(key, {})
+            for value_name, value in values.items():
+                totals[value_name] = totals.get(value_name, 0) + value
+
+    def percentile(self, name, q, **labels):
+        """
+        Returns a duration percentile of a span.
+
+        Args:
+            name (str): The span name.
+            q (float): The percentile between 0 and 100.
+            **labels (str): The labels of the series.
+
+        Returns:
+            float: The nearest-rank percentile in seconds, or None if nothing was recorded.
+        """
+        with self._lock:
+            durations = self.durations.get(_series_key(name, labels))
+            if not durations:
+                return None
+            return durations[min(len(durations) - 1, int(q / 100 * len(durations)))]
+
+    def summary(self):
+        """
+        Summarizes every series.
+
+        Returns:
+            list: One dict per series with the span name, labels, count, p50, p95, max and value totals.
+        """
+        with self._lock:
+            rows = []
+            for (name, labels), durations in sorted(self.durations.items()):
+                count = len(durations)
+                rows.append({
+                    "span": name,
+                    "labels": dict(labels),
+                    "count": count,
+                    "p50": durations[int(0.5 * count)],
+                    "p95": durations[min(count - 1, int(0.95 * count))],
+                    "max": durations[-1],
+                    **self.totals[(name, labels)],
+                })
+            return rows
+
+
+class JsonLinesSink:
+    """Appends every span as one JSON object per line to a file."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a")
+
+    def record(self, name, seconds, labels, values):
+        line = json.dumps({"span": name, "seconds": round(seconds, 6), "time": time.time(), **labels, **values})
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class PrometheusSink:
+    """
+    Aggregates spans into Prometheus histograms and counters.
+
+    Durations are exported as resume_span_seconds histograms and span values as
+    resume_span_value_total counters, both labelled with the span name and its labels.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.histograms = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+        self._server = None
+
+    def record(self, name, seconds, labels, values):
+        key = _series_key(name, labels)
+        with self._lock:
+            histogram = self.histograms.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+            index = bisect.bisect_left(self.buckets, seconds)
+            if index < len(self.buckets):
+                histogram[0][index] += 1
+            histogram[1] += seconds
+            histogram[2] += 1
+            for value_name, value in values.items():
+                counter_key = (key, value_name)
+                self.counters[counter_key] = self.counters.get(counter_key, 0) + value
+
+    def render(self):
+        """
+        Renders all metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: The exposition text.
+        """
+        lines = ["# TYPE resume_span_seconds histogram"]
+        with self._lock:
+            for (name, labels), (counts, total, count) in sorted(self.histograms.items()):
+                label_text = _format_labels((("span", name),) + labels)
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    lines.append(f'resume_span_seconds_bucket{{{label_text},le="{bound}"}} {cumulative}')
+                lines.append(f'resume_span_seconds_bucket{{{label_text},le="+Inf"}} {count}')
+                lines.append(f"resume_span_seconds_sum{{{label_text}}} {total}")
+                lines.append(f"resume_span_seconds_count{{{label_text}}} {count}")
+            lines.append("# TYPE resume_span_value_total counter")
+            for ((name, labels), value_name), value in sorted(self.counters.items()):
+                label_text = _format_labels((("span", name),) + labels + (("value", value_name),))
+                lines.append(f"resume_span_value_total{{{label_text}}} {value}")
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port, host="127.0.0.1"):
+        """
+        Serves the metrics on http://host:port/metrics from a background thread.
+
+        Args:
+            port (int): Port to listen on. 0 picks a free port.
+            host (str): Interface to listen on.
+
+        Returns:
+            ThreadingHTTPServer: The running server.
+        """
+        sink = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.rstrip("/") != "/metrics":
+                    self.send_error(404)
+                    return
+                body = sink.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self._server
+
+    def close(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server = None
+
+
+def _format_labels(labels):
+    escaped = (
+        (key, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for key, value in labels
+    )
+    return ",".join(f'{key}="{value}"' for key, value in escaped)
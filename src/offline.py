@@ -0,0 +1,181 @@
+from src.responses import (
+    EducationItem, EducationResponse,
+    ExperienceItem, ExperienceResponse,
+    ProjectItem, ProjectsResponse,
+    ResumeResponse,
+    SkillItem, SkillsResponse
+)
+from src.retrieval import item_text, tokenize
+
+MAX_COURSEWORK = 8
+MAX_TOOLS = 5
+MAX_PROJECT_SKILLS = 5
+
+
+def flatten(values):
+    """
+    Flattens nested lists of strings, e.g. project descriptions written as a YAML list.
+
+    Args:
+        values (list): Strings or lists of strings.
+
+    Returns:
+        list: The strings in order.
+    """
+    flat = []
+    for value in values:
+        if isinstance(value, (list, tuple)):
+            flat.extend(flatten(value))
+        elif value:
+            flat.append(str(value))
+    return flat
+
+
+def stringify(item):
+    """
+    Converts the scalar fields of a resume item to strings.
+
+    YAML reads unquoted values like `gpa: 3.8` or `duration: 2023` as numbers and empty values
+    as None, which the string fields of the response models reject.
+
+    Args:
+        item (dict): A resume item as loaded from YAML.
+
+    Returns:
+        dict: The item with every scalar field as a string, lists left as they are.
+    """
+    return {
+        key: value if isinstance(value, (list, tuple)) else "" if value is None else str(value)
+        for key, value in item.items()
+    }
+
+
+def overlap(text, job_terms):
+    """
+    Counts the terms of a text that also occur in the job description.
+
+    Args:
+        text (str): The text to score.
+        job_terms (set): Terms of the job description, see tokenize.
+
+    Returns:
+        int: Number of matching term occurrences.
+    """
+    return sum(1 for term in tokenize(text) if term in job_terms)
+
+
+def rank_by_overlap(values, job_terms, key=str):
+    """
+    Orders values by their overlap with the job description.
+
+    The sort is stable, so values without any match keep the order of the resume.
+
+    Args:
+        values (list): The values to order.
+        job_terms (set): Terms of the job description.
+        key (callable): Maps a value to the text it is scored on.
+
+    Returns:
+        list: The values, best match first.
+    """
+    return sorted(values, key=lambda value: -overlap(key(value), job_terms))
+
+
+def select_top(items, job_terms, limit):
+    """
+    Selects the limit items that best match the job description, keeping their resume order.
+
+    Args:
+        items (list): Extracted resume items.
+        job_terms (set): Terms of the job description.
+        limit (int): Number of items to select.
+
+    Returns:
+        list: The selected items.
+    """
+    ranked = sorted(range(len(items)), key=lambda i: -overlap(item_text(items[i]), job_terms))
+    return [items[i] for i in sorted(ranked[:limit])]
+
+
+def tailor_education(job_terms, user_education):
+    """Keeps every degree and lists up to MAX_COURSEWORK courses, those matching the job description first."""
+    return EducationResponse(education=[
+        EducationItem(**dict(
+            stringify(edu),
+            relevant_coursework=rank_by_overlap(flatten(edu["relevant_coursework"]), job_terms)[:MAX_COURSEWORK]
+        ))
+        for edu in user_education
+    ])
+
+
+def tailor_experience(job_terms, user_experience, num_experiences=2):
+    """Selects the best matching experiences and orders their tools and responsibilities by relevance."""
+    return ExperienceResponse(experiences=[
+        ExperienceItem(**dict(
+            stringify(exp),
+            tools=rank_by_overlap(flatten(exp["tools"]), job_terms)[:MAX_TOOLS],
+            responsibilities=rank_by_overlap(flatten(exp["responsibilities"]), job_terms)
+        ))
+        for exp in select_top(user_experience, job_terms, num_experiences)
+    ])
+
+
+def tailor_projects(job_terms, user_projects, num_projects=2):
+    """Selects the best matching projects and orders their skills and descriptions by relevance."""
+    return ProjectsResponse(projects=[
+        ProjectItem(**dict(
+            stringify(project),
+            skills=rank_by_overlap(flatten(project["skills"]), job_terms)[:MAX_PROJECT_SKILLS],
+            descriptions=rank_by_overlap(flatten(project["descriptions"]), job_terms)
+        ))
+        for project in select_top(user_projects, job_terms, num_projects)
+    ])
+
+
+def tailor_skills(job_terms, user_skills):
+    """Keeps every category and lists the skills matching the job description first."""
+    return SkillsResponse(skills=[
+        SkillItem(category=stringify(skill)["category"], items=rank_by_overlap(flatten(skill["items"]), job_terms))
+        for skill in user_skills
+    ])
+
+
+def invoke_offline(system_prompt, prompt_func, response_format, bypass_cache=False, **kwargs):
+    """
+    Tailors a resume section locally, without calling an LLM.
+
+    Takes the same arguments as invoke_llm_for_section in generate.py and returns the same
+    response models, but selects and orders the resume items by keyword and skill overlap with
+    the job description instead of prompting a model. The output is deterministic and takes
+    milliseconds, which makes it suitable for bulk drafts and as a fallback when the API fails.
+
+    Args:
+        system_prompt (str): Unused, accepted for signature compatibility.
+        prompt_func (callable): Unused, accepted for signature compatibility.
+        response_format (BaseModel): The section response model to produce.
+        bypass_cache (bool): Unused, accepted for signature compatibility.
+        **kwargs: The prompt arguments of the section, e.g. job_description and user_experience.
+
+    Returns:
+        BaseModel: The tailored section as an instance of response_format.
+
+    Raises:
+        ValueError: If response_format is not one of the section response models.
+    """
+    job_terms = set(tokenize(kwargs["job_description"]))
+    if response_format is EducationResponse:
+        return tailor_education(job_terms, kwargs["user_education"])
+    if response_format is ExperienceResponse:
+        return tailor_experience(job_terms, kwargs["user_experience"], kwargs.get("num_experiences", 2))
+    if response_format is ProjectsResponse:
+        return tailor_projects(job_terms, kwargs["user_projects"], kwargs.get("num_projects", 2))
+    if response_format is SkillsResponse:
+        return tailor_skills(job_terms, kwargs["user_skills"])
+    if response_format is ResumeResponse:
+        return ResumeResponse(
+            education=tailor_education(job_terms, kwargs["user_education"]),
+            experience=tailor_experience(job_terms, kwargs["user_experience"], kwargs.get("num_experiences", 2)),
+            projects=tailor_projects(job_terms, kwargs["user_projects"], kwargs.get("num_projects", 2)),
+            skills=tailor_skills(job_terms, kwargs["user_skills"])
+        )
+    raise ValueError(f"No offline engine for response format {response_format.__name__}")
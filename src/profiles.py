@@ -0,0 +1,124 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from src.config import load_env
+
+load_env()
+
+DEFAULT_PROFILES_PATH = os.getenv("RESUME_PROFILES_DB", ".cache/profiles.sqlite3")
+
+
+def sections_digest(resume_sections):
+    """
+    Hashes the extracted sections of a resume.
+
+    Args:
+        resume_sections (dict): The sections of load_and_extract_resume_data.
+
+    Returns:
+        str: Hex digest that changes whenever any section changes.
+    """
+    payload = json.dumps(resume_sections, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ProfileStore:
+    """
+    SQLite store of the extracted resume sections of many candidates.
+
+    Every profile is one row keyed on its profile ID, holding the precomputed output of the
+    extract_*_section functions as JSON, so a lookup is a single primary key read no matter how
+    many profiles are loaded and never parses YAML. Each row carries a digest of its sections,
+    which lets callers keep derived data (validated models, retrieval indexes) in memory and
+    only rebuild it when the profile was re-ingested with different content.
+    """
+
+    def __init__(self, path=DEFAULT_PROFILES_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS profiles (
+                    profile_id TEXT PRIMARY KEY,
+                    sections TEXT NOT NULL,
+                    digest TEXT NOT NULL,
+                    source TEXT,
+                    updated_at REAL NOT NULL
+                ) WITHOUT ROWID
+                """
+            )
+
+    def put(self, profile_id, resume_sections, source=None):
+        """
+        Adds or replaces a profile.
+
+        Args:
+            profile_id (str): Identifier of the candidate.
+            resume_sections (dict): The sections of load_and_extract_resume_data.
+            source (str, optional): Where the sections were ingested from, e.g. the YAML path.
+
+        Returns:
+            bool: Whether the stored sections changed.
+        """
+        digest = sections_digest(resume_sections)
+        payload = json.dumps(resume_sections, separators=(",", ":"))
+        with self._lock, self._conn:
+            if self._digest(profile_id) == digest:
+                return False
+            self._conn.execute(
+                "INSERT OR REPLACE INTO profiles (profile_id, sections, digest, source, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (profile_id, payload, digest, source, time.time()),
+            )
+        return True
+
+    def get(self, profile_id):
+        """
+        Looks up the sections of a profile.
+
+        Args:
+            profile_id (str): Identifier of the candidate.
+
+        Returns:
+            tuple: (sections dict, digest), or None if the profile does not exist.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT sections, digest FROM profiles WHERE profile_id = ?", (profile_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def digest(self, profile_id):
+        """Returns the digest of a profile's sections, or None if the profile does not exist."""
+        with self._lock:
+            return self._digest(profile_id)
+
+    def _digest(self, profile_id):
+        row = self._conn.execute("SELECT digest FROM profiles WHERE profile_id = ?", (profile_id,)).fetchone()
+        return None if row is None else row[0]
+
+    def __contains__(self, profile_id):
+        return self.digest(profile_id) is not None
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM profiles").fetchone()[0]
+
+    def profile_ids(self):
+        """Returns every profile ID in sorted order."""
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT profile_id FROM profiles ORDER BY profile_id")]
+
+    def delete(self, profile_id):
+        """Removes a profile."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM profiles WHERE profile_id = ?", (profile_id,))
@@ -1,3 +1,17 @@
+from src.serialize import encode_section
+
+# Order of the parts of the user prompt. "job_first" puts the job description before the resume
+# data. "resume_first" puts the instructions, schema and resume data first and the job description
+# last, so every job sends the same leading bytes for a resume section and the provider's prompt
+# prefix cache can serve them at the discounted cached-input price.
+PROMPT_LAYOUTS = ("job_first", "resume_first")
+
+
+def _check_layout(layout):
+    if layout not in PROMPT_LAYOUTS:
+        raise ValueError(f"Unknown prompt layout {layout!r}, expected one of {PROMPT_LAYOUTS}")
+
+
 def generate_system_prompt():
     """Generates a system prompt for the LLM."""
     return """
@@ -8,8 +22,10 @@ def generate_system_prompt():
     Ensure that your responses are accurate, concise, and directly relevant to the job description provided.
     """
 
-def experience_prompt(job_description, user_experience, num_experiences=2):
-    """Generates a prompt for the experience section."""
+def experience_prompt(job_description, user_experience, num_experiences=2, layout="job_first", encoding="repr"):
+    """Generates a prompt for the experience section in one of the PROMPT_LAYOUTS and PROMPT_ENCODINGS."""
+    _check_layout(layout)
+    user_experience = encode_section(user_experience, encoding)
     
     schema_instruction = """
     {
@@ -22,6 +38,22 @@ def experience_prompt(job_description, user_experience, num_experiences=2):
     }
     """
     
+    if layout == "resume_first":
+        return f"""
+    Please select up to {num_experiences} work experiences from my resume that are most relevant to the job description at the end.
+    Output the selected experiences in JSON format adhering to the following schema:
+
+    {schema_instruction}
+
+    Ensure the output is a valid JSON array with each element representing an experience adhering to the specified schema.
+
+    My work experience:
+    {user_experience}
+
+    Job Description:
+    {job_description}
+    """
+
     prompt = f"""
     Job Description:
     {job_description}
@@ -38,8 +70,10 @@ def experience_prompt(job_description, user_experience, num_experiences=2):
     """
     return prompt
 
-def projects_prompt(job_description, user_projects, num_projects=2):
-    """Generates a prompt for the projects section."""
+def projects_prompt(job_description, user_projects, num_projects=2, layout="job_first", encoding="repr"):
+    """Generates a prompt for the projects section in one of the PROMPT_LAYOUTS and PROMPT_ENCODINGS."""
+    _check_layout(layout)
+    user_projects = encode_section(user_projects, encoding)
     
     schema_instruction = """
     {
@@ -49,6 +83,22 @@ def projects_prompt(job_description, user_projects, num_projects=2):
     }
     """
     
+    if layout == "resume_first":
+        return f"""
+    Please select up to {num_projects} projects from my resume that are most relevant to the job description at the end.
+    Output the selected projects in JSON format adhering to the following schema:
+
+    {schema_instruction}
+
+    Ensure the output is a valid JSON array with each element representing a project adhering to the specified schema.
+
+    My projects:
+    {user_projects}
+
+    Job Description:
+    {job_description}
+    """
+
     prompt = f"""
     Job Description:
     {job_description}
@@ -65,8 +115,10 @@ def projects_prompt(job_description, user_projects, num_projects=2):
     """
     return prompt
 
-def skills_prompt(job_description, user_skills):
-    """Generates a prompt for the skills section."""
+def skills_prompt(job_description, user_skills, layout="job_first", encoding="repr"):
+    """Generates a prompt for the skills section in one of the PROMPT_LAYOUTS and PROMPT_ENCODINGS."""
+    _check_layout(layout)
+    user_skills = encode_section(user_skills, encoding, dedupe_across=("items",))
     
     schema_instruction = """
     {
@@ -75,6 +127,22 @@ def skills_prompt(job_description, user_skills):
     }
     """
     
+    if layout == "resume_first":
+        return f"""
+    Please select the most relevant skills from each category in my resume that match the job description at the end.
+    Output the selected skills in JSON format adhering to the following schema:
+
+    {schema_instruction}
+
+    Ensure the output is a valid JSON array with each element representing a skill category adhering to the specified schema.
+
+    My skills:
+    {user_skills}
+
+    Job Description:
+    {job_description}
+    """
+
     prompt = f"""
     Job Description:
     {job_description}
@@ -91,8 +159,10 @@ def skills_prompt(job_description, user_skills):
     """
     return prompt
 
-def education_prompt(job_description, user_education):
-    """Generates a prompt for the education section."""
+def education_prompt(job_description, user_education, layout="job_first", encoding="repr"):
+    """Generates a prompt for the education section in one of the PROMPT_LAYOUTS and PROMPT_ENCODINGS."""
+    _check_layout(layout)
+    user_education = encode_section(user_education, encoding)
     
     schema_instruction = """
     {
@@ -105,6 +175,22 @@ def education_prompt(job_description, user_education):
     }
     """
     
+    if layout == "resume_first":
+        return f"""
+    Please select up to 8 relevant courses for each of my education from my education history that match the job description at the end.
+    Output my education details in JSON format adhering to the following schema:
+
+    {schema_instruction}
+
+    Ensure the output is a valid JSON array with each element representing an education entry adhering to the specified schema.
+
+    My education:
+    {user_education}
+
+    Job Description:
+    {job_description}
+    """
+
     prompt = f"""
     Job Description:
     {job_description}
@@ -119,4 +205,119 @@ def education_prompt(job_description, user_education):
 
     Ensure the output is a valid JSON array with each element representing an education entry adhering to the specified schema.
     """
-    return prompt
\ No newline at end of file
+    return prompt
+
+def resume_prompt(
+    job_description, user_education, user_experience, user_projects, user_skills, num_experiences=2, num_projects=2,
+    layout="job_first", encoding="repr"
+):
+    """Generates a single prompt covering every section of the resume in one of the PROMPT_LAYOUTS and PROMPT_ENCODINGS."""
+    _check_layout(layout)
+    user_education = encode_section(user_education, encoding)
+    user_experience = encode_section(user_experience, encoding)
+    user_projects = encode_section(user_projects, encoding)
+    user_skills = encode_section(user_skills, encoding, dedupe_across=("items",))
+    
+    schema_instruction = """
+    {
+        "education": {
+            "education": [
+                {
+                    "university": "Name of the university",
+                    "duration": "Years attended",
+                    "degree": "Degree earned",
+                    "location": "Location of the university",
+                    "gpa": "Grade point average",
+                    "relevant_coursework": ["List of relevant courses upto to 8"]
+                }
+            ]
+        },
+        "experience": {
+            "experiences": [
+                {
+                    "company": "Name of the company",
+                    "duration": "Employment period",
+                    "role": "Your role at the company",
+                    "location": "Location of the company",
+                    "tools": ["List of tools used. Include atmost 5 tools."],
+                    "responsibilities": ["List of responsibilities"]
+                }
+            ]
+        },
+        "projects": {
+            "projects": [
+                {
+                    "title": "Project title",
+                    "skills": ["List of skills used in the project. Include atmost 5 skills."],
+                    "descriptions": ["Description of the project"]
+                }
+            ]
+        },
+        "skills": {
+            "skills": [
+                {
+                    "category": "Skill category",
+                    "items": ["List of skills in this category. Include atleast 5 skills for each category."]
+                }
+            ]
+        }
+    }
+    """
+    
+    if layout == "resume_first":
+        return f"""
+    Tailor every section of my resume to the job description at the end:
+    - Education: select up to 8 relevant courses for each of my education entries.
+    - Experience: select up to {num_experiences} work experiences that are most relevant.
+    - Projects: select up to {num_projects} projects that are most relevant.
+    - Skills: select the most relevant skills from each category.
+    Output the whole resume in JSON format adhering to the following schema:
+
+    {schema_instruction}
+
+    Ensure the output is a valid JSON object with one key per section, each adhering to the specified schema.
+
+    My education:
+    {user_education}
+
+    My work experience:
+    {user_experience}
+
+    My projects:
+    {user_projects}
+
+    My skills:
+    {user_skills}
+
+    Job Description:
+    {job_description}
+    """
+
+    prompt = f"""
+    Job Description:
+    {job_description}
+
+    My education:
+    {user_education}
+
+    My work experience:
+    {user_experience}
+
+    My projects:
+    {user_projects}
+
+    My skills:
+    {user_skills}
+
+    Tailor every section of my resume to the job description:
+    - Education: select up to 8 relevant courses for each of my education entries.
+    - Experience: select up to {num_experiences} work experiences that are most relevant.
+    - Projects: select up to {num_projects} projects that are most relevant.
+    - Skills: select the most relevant skills from each category.
+    Output the whole resume in JSON format adhering to the following schema:
+
+    {schema_instruction}
+
+    Ensure the output is a valid JSON object with one key per section, each adhering to the specified schema.
+    """
+    return prompt
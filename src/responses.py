@@ -45,3 +45,9 @@ class HeadingData(BaseModel):
     linkedin: str
     github: str
 
+
+class ResumeResponse(BaseModel):
+    education: EducationResponse
+    experience: ExperienceResponse
+    projects: ProjectsResponse
+    skills: SkillsResponse
@@ -0,0 +1,149 @@
+import re
+import numpy as np
+from scipy import sparse
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9+#]+)*")
+STOP_WORDS = frozenset("""
+a an and are as at be by for from has have in into is it its of on or our that the their this to
+using was we were will with you your
+""".split())
+
+
+def tokenize(text):
+    """
+    Splits text into lowercase terms, keeping tokens like "c++", "c#" and "node.js" intact.
+
+    Args:
+        text (str): The text to tokenize.
+
+    Returns:
+        list: The terms of the text without stop words.
+    """
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOP_WORDS]
+
+
+def item_text(item):
+    """
+    Flattens all string values of an extracted resume item into one text.
+
+    Args:
+        item (dict): An item returned by one of the extract_*_section functions.
+
+    Returns:
+        str: The concatenated text of the item.
+    """
+    parts = []
+    for value in item.values():
+        if isinstance(value, str):
+            parts.append(value)
+        elif isinstance(value, (list, tuple)):
+            parts.extend(str(element) for element in value)
+    return " ".join(parts)
+
+
+class BM25Index:
+    """
+    Okapi BM25 index over a fixed list of resume items.
+
+    The document side of BM25 is folded into one sparse (items x terms) weight matrix when the
+    index is built, so scoring a job description is a single sparse matrix-vector product.
+    """
+
+    def __init__(self, items, k1=1.5, b=0.75):
+        self.vocabulary = {}
+        rows, cols = [], []
+        documents = [tokenize(item_text(item)) for item in items]
+        for row, terms in enumerate(documents):
+            for term in terms:
+                rows.append(row)
+                cols.append(self.vocabulary.setdefault(term, len(self.vocabulary)))
+        shape = (len(documents), len(self.vocabulary))
+        term_frequencies = sparse.csr_matrix(
+            (np.ones(len(rows)), (rows, cols)), shape=shape
+        )
+        term_frequencies.sum_duplicates()
+
+        lengths = np.array([len(terms) for terms in documents], dtype=float)
+        average_length = lengths.mean() if len(lengths) and lengths.mean() > 0 else 1.0
+        document_frequencies = np.bincount(term_frequencies.indices, minlength=shape[1])
+        idf = np.log1p((shape[0] - document_frequencies + 0.5) / (document_frequencies + 0.5))
+
+        # BM25 term weight tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / average_length)) * idf
+        weights = term_frequencies.tocoo()
+        norms = k1 * (1 - b + b * lengths[weights.row] / average_length)
+        data = weights.data * (k1 + 1) / (weights.data + norms) * idf[weights.col]
+        self.weights = sparse.csr_matrix((data, (weights.row, weights.col)), shape=shape)
+
+    def __len__(self):
+        return self.weights.shape[0]
+
+    def scores(self, query):
+        """
+        Scores every item against a query.
+
+        Args:
+            query (str): The query text, e.g. a job description.
+
+        Returns:
+            numpy.ndarray: One BM25 score per item.
+        """
+        columns = [self.vocabulary[term] for term in tokenize(query) if term in self.vocabulary]
+        query_vector = np.bincount(columns, minlength=len(self.vocabulary)).astype(float)
+        return self.weights @ query_vector
+
+    def top_k(self, query, k):
+        """
+        Selects the k items that best match a query.
+
+        Args:
+            query (str): The query text, e.g. a job description.
+            k (int): Number of items to select.
+
+        Returns:
+            list: Indices of the selected items in their original order.
+        """
+        if k >= len(self):
+            return list(range(len(self)))
+        scores = self.scores(query)
+        # Stable sort so ties keep the resume's own ordering
+        best = np.argsort(-scores, kind="stable")[:k]
+        return sorted(best.tolist())
+
+
+def build_section_indexes(resume_sections, section_names=("experience", "projects")):
+    """
+    Builds a BM25 index for each list section of the extracted resume.
+
+    Args:
+        resume_sections (dict): Sections returned by load_and_extract_resume_data.
+        section_names (tuple): Sections to index.
+
+    Returns:
+        dict: Section name mapped to its BM25Index.
+    """
+    return {name: BM25Index(resume_sections[name]) for name in section_names}
+
+
+def prerank_sections(job_description, resume_sections, indexes, top_k, preserve_order=False):
+    """
+    Keeps only the items of each indexed section that best match the job description.
+
+    Args:
+        job_description (str): The job description to match against.
+        resume_sections (dict): Sections returned by load_and_extract_resume_data. Not modified.
+        indexes (dict): Output of build_section_indexes for the same sections.
+        top_k (dict): Section name mapped to the number of candidates to keep.
+        preserve_order (bool): Keep the selected items in resume order instead of by score, so
+            a section serializes to the same text for every job that selects the same items.
+
+    Returns:
+        dict: A shallow copy of resume_sections with the indexed sections narrowed down.
+    """
+    ranked_sections = dict(resume_sections)
+    for name, k in top_k.items():
+        if name in indexes:
+            selected = indexes[name].top_k(job_description, k)
+            if preserve_order:
+                selected = sorted(selected)
+            ranked_sections[name] = [resume_sections[name][i] for i in selected]
+    return ranked_sections
@@ -0,0 +1,308 @@
+import logging
+import os
+import threading
+import time
+from src.config import load_env
+from src.llm import MINI_MODEL, OMNI_MODEL, ainvoke, astream_omni, invoke
+from src.metrics import record
+from src.responses import (
+    EducationResponse,
+    ExperienceResponse,
+    ProjectsResponse,
+    ResumeResponse,
+    SkillsResponse
+)
+from src.scheduler import estimate_tokens
+
+# USD per million (input, output) tokens
+MODEL_PRICES = {MINI_MODEL: (0.15, 0.60), OMNI_MODEL: (2.50, 10.00)}
+# Starting points of the per-model latency estimates, refined from observed calls
+DEFAULT_LATENCY_SECONDS = {MINI_MODEL: 3.0, OMNI_MODEL: 6.0}
+DEFAULT_OUTPUT_TOKENS = 400
+# Weight of the latest observation in the running latency and output size estimates
+ESTIMATE_SMOOTHING = 0.2
+# Sections that are near-mechanical selections from the resume and start on the mini model
+DEFAULT_MINI_SECTIONS = ("education", "skills")
+# Share of the selected skills that must appear in the resume
+MIN_KNOWN_SKILL_SHARE = 0.5
+
+
+def section_name(response_format):
+    """Returns the section a response model belongs to, e.g. "experience" for ExperienceResponse."""
+    return response_format.__name__.removesuffix("Response").lower()
+
+
+def _known(values):
+    return {str(value).strip().casefold() for value in values}
+
+
+def quality_problems(response, kwargs):
+    """
+    Checks a parsed section response against the resume data it was selected from.
+
+    The heuristics catch the typical failures of a small model on selection tasks: empty
+    selections, more items than requested, and entries or skills that are not in the resume.
+    Checks that need the source items are skipped when the prompt received pre-encoded text.
+
+    Args:
+        response (BaseModel): The parsed response of a section or of the whole resume.
+        kwargs (dict): The prompt arguments of the request, e.g. user_experience and num_experiences.
+
+    Returns:
+        list: Descriptions of the problems found, empty if the response looks acceptable.
+    """
+    problems = []
+    if isinstance(response, ResumeResponse):
+        for name in ("education", "experience", "projects", "skills"):
+            problems += [f"{name}: {problem}" for problem in quality_problems(getattr(response, name), kwargs)]
+        return problems
+
+    if isinstance(response, EducationResponse):
+        items, source, key, limit = response.education, kwargs.get("user_education"), "university", None
+    elif isinstance(response, ExperienceResponse):
+        items, source, key, limit = response.experiences, kwargs.get("user_experience"), "company", kwargs.get("num_experiences")
+    elif isinstance(response, ProjectsResponse):
+        items, source, key, limit = response.projects, kwargs.get("user_projects"), "title", kwargs.get("num_projects")
+    elif isinstance(response, SkillsResponse):
+        items, source, key, limit = response.skills, kwargs.get("user_skills"), None, None
+    else:
+        return problems
+
+    if not items:
+        return ["no items selected"]
+    if limit is not None and len(items) > limit:
+        problems.append(f"{len(items)} items selected, at most {limit} requested")
+    if not isinstance(source, list):
+        return problems
+
+    if key is not None:
+        known = _known(entry.get(key, "") for entry in source)
+        unknown = [getattr(item, key) for item in items if getattr(item, key).strip().casefold() not in known]
+        if unknown:
+            problems.append(f"{key} not in the resume: {', '.join(unknown)}")
+    else:
+        selected = [skill for item in items for skill in item.items]
+        if any(not item.items for item in items):
+            problems.append("empty skill category")
+        known = _known(skill for entry in source for skill in entry.get("items", []))
+        if selected and sum(skill.strip().casefold() in known for skill in selected) / len(selected) < MIN_KNOWN_SKILL_SHARE:
+            problems.append("most selected skills are not in the resume")
+    return problems
+
+
+class ModelRouter:
+    """
+    Routes each section call to gpt-4o-mini or gpt-4o within cost and latency budgets.
+
+    Sections in mini_sections start on the mini model. Every other section goes to gpt-4o unless
+    its estimated cost or latency on gpt-4o exceeds the per-call budget, in which case it is
+    tried on mini as well. A mini response that failed to parse or validate, or that fails the
+    quality_problems heuristics, is escalated to gpt-4o regardless of the budgets, since a
+    missing section fails the whole resume. Latency and output size estimates are running
+    averages of the observed calls.
+
+    Args:
+        mini_sections (tuple): Sections that start on the mini model.
+        max_cost_per_call (float, optional): Estimated USD a single gpt-4o call may cost.
+        max_latency_per_call (float, optional): Estimated seconds a single gpt-4o call may take.
+    """
+
+    def __init__(self, mini_sections=DEFAULT_MINI_SECTIONS, max_cost_per_call=None, max_latency_per_call=None):
+        self.mini_sections = frozenset(mini_sections)
+        self.max_cost_per_call = max_cost_per_call
+        self.max_latency_per_call = max_latency_per_call
+        self._latency = dict(DEFAULT_LATENCY_SECONDS)
+        self._output_tokens = {}
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def estimate_cost(self, model, section, system_prompt, prompt):
+        """Returns the estimated USD cost of a call."""
+        input_price, output_price = MODEL_PRICES[model]
+        input_tokens = estimate_tokens(system_prompt, prompt, completion_tokens=0)
+        output_tokens = self._output_tokens.get(section, DEFAULT_OUTPUT_TOKENS)
+        return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+    def estimate_latency(self, model):
+        """Returns the running average latency of a model in seconds."""
+        return self._latency[model]
+
+    def choose(self, section, system_prompt, prompt):
+        """
+        Picks the model a section call starts on.
+
+        Args:
+            section (str): The section name, see section_name.
+            system_prompt (str): The system prompt of the call.
+            prompt (str): The rendered user prompt of the call.
+
+        Returns:
+            str: MINI_MODEL or OMNI_MODEL.
+        """
+        if section in self.mini_sections:
+            return MINI_MODEL
+        over_cost = (
+            self.max_cost_per_call is not None
+            and self.estimate_cost(OMNI_MODEL, section, system_prompt, prompt) > self.max_cost_per_call
+        )
+        over_latency = self.max_latency_per_call is not None and self.estimate_latency(OMNI_MODEL) > self.max_latency_per_call
+        return MINI_MODEL if over_cost or over_latency else OMNI_MODEL
+
+    def _observe(self, model, section, seconds, response):
+        with self._lock:
+            self._latency[model] += ESTIMATE_SMOOTHING * (seconds - self._latency[model])
+            if response is not None:
+                output_tokens = len(response.model_dump_json()) // 4
+                previous = self._output_tokens.get(section, DEFAULT_OUTPUT_TOKENS)
+                self._output_tokens[section] = previous + ESTIMATE_SMOOTHING * (output_tokens - previous)
+
+    def _accept(self, section, response, kwargs):
+        """Returns whether a mini response can be used, logging why it cannot."""
+        if response is None:
+            logging.warning(f"{MINI_MODEL} failed on the {section} section, escalating to {OMNI_MODEL}")
+            return False
+        problems = quality_problems(response, kwargs)
+        if problems:
+            logging.warning(f"Escalating the {section} section to {OMNI_MODEL}: {'; '.join(problems)}")
+            return False
+        return True
+
+    def _served(self, section, model, escalated, seconds):
+        with self._lock:
+            key = (model, escalated)
+            self._counts[key] = self._counts.get(key, 0) + 1
+        record("llm.route", seconds, {"section": section, "model": model, "escalated": str(escalated).lower()})
+
+    def invoke(self, system_prompt, prompt_func, response_format, llm_client=None, bypass_cache=False, timeout=None, **kwargs):
+        """
+        Invokes the LLM for a section on the routed model, see invoke_llm_for_section in generate.py.
+
+        timeout bounds every call, including the escalated one, see invoke in src/llm.py.
+
+        Returns:
+            BaseModel: The parsed response, or None if every tier failed.
+        """
+        section = section_name(response_format)
+        prompt = prompt_func(**kwargs)
+        start = time.perf_counter()
+        if self.choose(section, system_prompt, prompt) == MINI_MODEL:
+            response = invoke(MINI_MODEL, system_prompt, prompt, response_format, llm_client, bypass_cache, timeout)
+            self._observe(MINI_MODEL, section, time.perf_counter() - start, response)
+            if self._accept(section, response, kwargs):
+                self._served(section, MINI_MODEL, False, time.perf_counter() - start)
+                return response
+            escalated = True
+        else:
+            escalated = False
+        omni_start = time.perf_counter()
+        response = invoke(OMNI_MODEL, system_prompt, prompt, response_format, llm_client, bypass_cache, timeout)
+        self._observe(OMNI_MODEL, section, time.perf_counter() - omni_start, response)
+        self._served(section, OMNI_MODEL, escalated, time.perf_counter() - start)
+        return response
+
+    async def ainvoke(self, system_prompt, prompt_func, response_format, llm_client, bypass_cache=False, timeout=None, **kwargs):
+        """Asynchronous version of invoke."""
+        section = section_name(response_format)
+        prompt = prompt_func(**kwargs)
+        start = time.perf_counter()
+        if self.choose(section, system_prompt, prompt) == MINI_MODEL:
+            response = await ainvoke(MINI_MODEL, system_prompt, prompt, response_format, llm_client, bypass_cache, timeout)
+            self._observe(MINI_MODEL, section, time.perf_counter() - start, response)
+            if self._accept(section, response, kwargs):
+                self._served(section, MINI_MODEL, False, time.perf_counter() - start)
+                return response
+            escalated = True
+        else:
+            escalated = False
+        omni_start = time.perf_counter()
+        response = await ainvoke(OMNI_MODEL, system_prompt, prompt, response_format, llm_client, bypass_cache, timeout)
+        self._observe(OMNI_MODEL, section, time.perf_counter() - omni_start, response)
+        self._served(section, OMNI_MODEL, escalated, time.perf_counter() - start)
+        return response
+
+    async def astream(
+        self, system_prompt, prompt_func, response_format, llm_client, on_item=None, bypass_cache=False, timeout=None, **kwargs
+    ):
+        """
+        Streaming version of ainvoke, see astream_omni in src/llm.py.
+
+        gpt-4o calls are streamed. A mini response is only passed to on_item once it has passed
+        the quality checks, since items already emitted cannot be taken back on escalation.
+        """
+        section = section_name(response_format)
+        prompt = prompt_func(**kwargs)
+        start = time.perf_counter()
+        if self.choose(section, system_prompt, prompt) == MINI_MODEL:
+            response = await ainvoke(MINI_MODEL, system_prompt, prompt, response_format, llm_client, bypass_cache, timeout)
+            self._observe(MINI_MODEL, section, time.perf_counter() - start, response)
+            if self._accept(section, response, kwargs):
+                if on_item is not None:
+                    field_name = next(iter(response_format.model_fields))
+                    for item in getattr(response, field_name):
+                        on_item(item)
+                self._served(section, MINI_MODEL, False, time.perf_counter() - start)
+                return response
+            escalated = True
+        else:
+            escalated = False
+        omni_start = time.perf_counter()
+        response = await astream_omni(system_prompt, prompt, response_format, llm_client, on_item, bypass_cache, timeout)
+        self._observe(OMNI_MODEL, section, time.perf_counter() - omni_start, response)
+        self._served(section, OMNI_MODEL, escalated, time.perf_counter() - start)
+        return response
+
+    def tier_counts(self):
+        """
+        Returns how many section calls each tier served.
+
+        Returns:
+            dict: Calls served by MINI_MODEL, by OMNI_MODEL directly, and by OMNI_MODEL after
+            escalation from the mini model ("escalated").
+        """
+        with self._lock:
+            return {
+                MINI_MODEL: self._counts.get((MINI_MODEL, False), 0),
+                OMNI_MODEL: self._counts.get((OMNI_MODEL, False), 0),
+                "escalated": self._counts.get((OMNI_MODEL, True), 0),
+            }
+
+
+def _float_env(name):
+    value = os.getenv(name)
+    return float(value) if value else None
+
+
+_model_router = None
+
+
+def get_model_router():
+    """
+    Returns the process-wide model router, creating it on first use.
+
+    Configured by the RESUME_MINI_SECTIONS (comma-separated, default "education,skills"),
+    RESUME_MAX_COST_PER_CALL and RESUME_MAX_LATENCY_PER_CALL environment variables.
+
+    Returns:
+        ModelRouter: The shared router.
+    """
+    global _model_router
+    if _model_router is None:
+        load_env()
+        mini_sections = os.getenv("RESUME_MINI_SECTIONS", ",".join(DEFAULT_MINI_SECTIONS))
+        _model_router = ModelRouter(
+            mini_sections=tuple(name.strip() for name in mini_sections.split(",") if name.strip()),
+            max_cost_per_call=_float_env("RESUME_MAX_COST_PER_CALL"),
+            max_latency_per_call=_float_env("RESUME_MAX_LATENCY_PER_CALL"),
+        )
+    return _model_router
+
+
+def set_model_router(router):
+    """
+    Replaces the process-wide model router.
+
+    Args:
+        router (ModelRouter): The router to use from now on.
+    """
+    global _model_router
+    _model_router = router
@@ -0,0 +1,278 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+import httpx
+from openai import APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+
+DEFAULT_REQUESTS_PER_MINUTE = 500
+DEFAULT_TOKENS_PER_MINUTE = 30000
+DEFAULT_MAX_RETRIES = 6
+# Completion tokens reserved per request on top of the prompt, settled against the actual usage
+DEFAULT_COMPLETION_TOKENS = 1000
+
+RETRYABLE_ERRORS = (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError)
+# Transport failures that happen before a request is sent, wrapped by the client in an APIConnectionError
+UNSENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+def estimate_tokens(*texts, completion_tokens=DEFAULT_COMPLETION_TOKENS):
+    """
+    Estimates the tokens a request counts against the tokens-per-minute budget.
+
+    Args:
+        *texts (str): The message contents of the request.
+        completion_tokens (int): Tokens reserved for the completion.
+
+    Returns:
+        int: Roughly four characters per prompt token plus the completion reservation.
+    """
+    return sum(len(text) for text in texts) // 4 + completion_tokens
+
+
+def retry_after_seconds(error):
+    """
+    Reads the server's requested wait from the retry-after-ms or retry-after header of an API error.
+
+    Args:
+        error (Exception): The error raised by the OpenAI client.
+
+    Returns:
+        float: Seconds to wait, or None if the server did not say.
+    """
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except ValueError:
+        return None
+    return None
+
+
+def reached_server(error):
+    """
+    Tells whether a failed attempt reached the API, so that it counts against the quota.
+
+    Args:
+        error (BaseException): The error the attempt failed with.
+
+    Returns:
+        bool: False only for connection errors raised before the request was sent.
+    """
+    return not (isinstance(error, APIConnectionError) and isinstance(error.__cause__, UNSENT_ERRORS))
+
+
+class TokenBucket:
+    """
+    Token bucket that hands out reservations instead of blocking.
+
+    A reservation is always granted and may drive the bucket into debt. The returned delay is
+    how long the caller has to wait before its share is actually available, so callers are
+    served strictly in the order they reserved.
+    """
+
+    def __init__(self, capacity, refill_per_second):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.available = capacity
+        self.updated = time.monotonic()
+
+    def reserve(self, amount, now):
+        """
+        Takes amount from the bucket.
+
+        Args:
+            amount (float): Units to take, capped at the bucket capacity.
+            now (float): The current time.monotonic().
+
+        Returns:
+            float: Seconds until the reserved units are available.
+        """
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.refill_per_second)
+        self.updated = now
+        self.available -= min(amount, self.capacity)
+        return max(0.0, -self.available / self.refill_per_second)
+
+    def refund(self, amount):
+        """Returns over-reserved units to the bucket."""
+        self.available = min(self.capacity, self.available + amount)
+
+
+class RateLimitScheduler:
+    """
+    Schedules LLM requests within a requests-per-minute and tokens-per-minute budget.
+
+    Every attempt first reserves one request and its estimated tokens. Reservations are handed
+    out under a lock in arrival order, so concurrent jobs share the quota first come, first
+    served instead of racing each other. Retryable API errors are retried with jittered
+    exponential backoff. A 429 that carries Retry-After pauses the whole scheduler for that long,
+    as the quota is shared by every caller.
+
+    The scheduler is thread-safe and is used from both threads and event loops.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE,
+        tokens_per_minute=DEFAULT_TOKENS_PER_MINUTE,
+        max_retries=DEFAULT_MAX_RETRIES,
+        base_delay=0.5,
+        max_delay=30.0
+    ):
+        self.requests = TokenBucket(requests_per_minute, requests_per_minute / 60)
+        self.tokens = TokenBucket(tokens_per_minute, tokens_per_minute / 60)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.paused_until = 0.0
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens):
+        """
+        Reserves one request and tokens of the budget.
+
+        Args:
+            tokens (int): Estimated tokens of the request, see estimate_tokens.
+
+        Returns:
+            float: Seconds the caller has to wait before sending the request.
+        """
+        with self._lock:
+            now = time.monotonic()
+            return max(
+                self.requests.reserve(1, now),
+                self.tokens.reserve(tokens, now),
+                self.paused_until - now
+            )
+
+    def settle(self, reserved_tokens, usage):
+        """
+        Refunds the tokens a finished request reserved but did not use.
+
+        Args:
+            reserved_tokens (int): The tokens reserved for the request.
+            usage (CompletionUsage, optional): The usage reported by the API.
+        """
+        if usage is None or usage.total_tokens >= reserved_tokens:
+            return
+        with self._lock:
+            self.tokens.refund(reserved_tokens - usage.total_tokens)
+
+    def release(self, reserved_tokens):
+        """
+        Returns the request and tokens of an attempt that was never sent.
+
+        Attempts that reached the API, 429s included, count against the provider's quota and
+        keep their reservation, so the scheduler does not over-admit requests to an endpoint
+        that is already throttling.
+
+        Args:
+            reserved_tokens (int): The tokens reserved for the attempt.
+        """
+        with self._lock:
+            self.requests.refund(1)
+            self.tokens.refund(reserved_tokens)
+
+    def backoff(self, attempt, error):
+        """
+        Computes how long to wait before retrying a failed attempt.
+
+        Honors the Retry-After of the error and pauses the scheduler for every caller if present,
+        otherwise uses full-jitter exponential backoff.
+
+        Args:
+            attempt (int): Zero-based number of the failed attempt.
+            error (Exception): The retryable error.
+
+        Returns:
+            float: Seconds to wait.
+        """
+        retry_after = retry_after_seconds(error)
+        with self._lock:
+            self.retries += 1
+            if retry_after is not None:
+                self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+                return retry_after
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def _should_retry(self, attempt, error, retryable):
+        if not isinstance(error, RETRYABLE_ERRORS) or attempt >= self.max_retries:
+            return False
+        return retryable is None or retryable()
+
+    def call(self, func, tokens, retryable=None):
+        """
+        Runs an API call within the budget, retrying it on transient errors.
+
+        Args:
+            func (callable): Performs the request and returns the completion.
+            tokens (int): Estimated tokens of the request, see estimate_tokens.
+            retryable (callable, optional): Returns False if a failed attempt must not be repeated.
+
+        Returns:
+            The return value of func.
+
+        Raises:
+            Exception: The last error once the retries are exhausted or for non-retryable errors.
+        """
+        attempt = 0
+        while True:
+            time.sleep(self.reserve(tokens))
+            try:
+                completion = func()
+                self.settle(tokens, getattr(completion, "usage", None))
+                return completion
+            except Exception as e:
+                if not reached_server(e):
+                    self.release(tokens)
+                if not self._should_retry(attempt, e, retryable):
+                    raise
+                delay = self.backoff(attempt, e)
+                logging.warning(f"Retrying OpenAI request in {delay:.2f}s after {type(e).__name__}: {e}")
+                time.sleep(delay)
+                attempt += 1
+
+    async def acall(self, func, tokens, retryable=None):
+        """
+        Asynchronous version of call.
+
+        Args:
+            func (callable): Returns an awaitable performing the request.
+            tokens (int): Estimated tokens of the request, see estimate_tokens.
+            retryable (callable, optional): Returns False if a failed attempt must not be repeated.
+
+        Returns:
+            The result of the awaited func().
+        """
+        attempt = 0
+        while True:
+            try:
+                await asyncio.sleep(self.reserve(tokens))
+            except asyncio.CancelledError:
+                # Cancelled while waiting for its turn, the request was never sent
+                self.release(tokens)
+                raise
+            try:
+                completion = await func()
+                self.settle(tokens, getattr(completion, "usage", None))
+                return completion
+            except asyncio.CancelledError:
+                # Cancelled in flight, the provider still bills the request and the tokens it
+                # generated so far, which the reservation covers
+                raise
+            except Exception as e:
+                if not reached_server(e):
+                    self.release(tokens)
+                if not self._should_retry(attempt, e, retryable):
+                    raise
+                delay = self.backoff(attempt, e)
+                logging.warning(f"Retrying OpenAI request in {delay:.2f}s after {type(e).__name__}: {e}")
+                await asyncio.sleep(delay)
+                attempt += 1
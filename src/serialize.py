@@ -0,0 +1,103 @@
+import re
+
+# How resume sections are written into prompts. "repr" interpolates the Python repr of the
+# extracted lists of dicts, "compact" uses compact_section.
+PROMPT_ENCODINGS = ("repr", "compact")
+# List values at most this long and without commas are joined on one line, longer ones get a line each
+INLINE_ITEM_CHARS = 40
+
+_whitespace = re.compile(r"\s+")
+
+
+def _is_empty(value):
+    return value is None or value == "" or value == [] or value == {}
+
+
+def _flatten(values):
+    for value in values:
+        if isinstance(value, (list, tuple)):
+            yield from _flatten(value)
+        else:
+            yield value
+
+
+def _clean(value):
+    """Collapses whitespace so the encoding does not depend on YAML line folding."""
+    return _whitespace.sub(" ", str(value)).strip()
+
+
+def _dedupe(values, seen):
+    """Yields the values not in seen, comparing case-insensitively, and adds them to seen."""
+    for value in values:
+        key = value.casefold()
+        if key not in seen:
+            seen.add(key)
+            yield value
+
+
+def compact_section(items, dedupe_across=()):
+    """
+    Encodes the items of a resume section as compact, deterministic text.
+
+    Every item starts with "- " and its scalar fields on one line as "key: value" pairs joined
+    by "; ". Short list fields follow as "key: a, b, c", lists of sentences as one "* " line per
+    element. Empty fields are dropped and list values are deduplicated case-insensitively. Field
+    order is the order of the extracted dicts, so equal sections always encode to equal text.
+
+    Args:
+        items (list): The dicts of a section as returned by the extract_*_section functions.
+        dedupe_across (tuple): List fields whose values are also deduplicated across items,
+            e.g. ("items",) for skills listed under several categories.
+
+    Returns:
+        str: The encoded section.
+    """
+    seen_across = {field: set() for field in dedupe_across}
+    lines = []
+    for item in items:
+        scalars, lists = [], []
+        for key, value in item.items():
+            if isinstance(value, (list, tuple)):
+                values = [_clean(element) for element in _flatten(value) if not _is_empty(element)]
+                values = list(_dedupe(values, seen_across.get(key, set())))
+                if values:
+                    lists.append((key, values))
+            elif not _is_empty(value) and _clean(value):
+                scalars.append(f"{key}: {_clean(value)}")
+        if dedupe_across and not lists and any(key in dedupe_across for key in item):
+            # Every value was listed under an earlier item already
+            continue
+        if not scalars and not lists:
+            continue
+        item_lines = [f"- {'; '.join(scalars)}" if scalars else "-"]
+        for key, values in lists:
+            if all(len(value) <= INLINE_ITEM_CHARS and "," not in value for value in values):
+                item_lines.append(f"  {key}: {', '.join(values)}")
+            else:
+                item_lines.append(f"  {key}:")
+                item_lines.extend(f"  * {value}" for value in values)
+        if item_lines[0] == "-":
+            item_lines[0] = "- " + item_lines.pop(1).lstrip()
+        lines.extend(item_lines)
+    return "\n".join(lines)
+
+
+def encode_section(section, encoding="repr", dedupe_across=()):
+    """
+    Writes a resume section for a prompt in one of the PROMPT_ENCODINGS.
+
+    Args:
+        section (list or str): The extracted section, or text that was already encoded.
+        encoding (str): "repr" or "compact".
+        dedupe_across (tuple): Passed to compact_section.
+
+    Returns:
+        str: The section text to interpolate into the prompt.
+    """
+    if encoding not in PROMPT_ENCODINGS:
+        raise ValueError(f"Unknown prompt encoding {encoding!r}, expected one of {PROMPT_ENCODINGS}")
+    if isinstance(section, str):
+        return section
+    if encoding == "compact":
+        return compact_section(section, dedupe_across)
+    return str(section)
@@ -0,0 +1,129 @@
+"""
+Tests of the artifact store against the local file system and a local S3 stand-in (moto's server).
+
+Run from the repository root:
+    python -m pytest tests
+"""
+import os
+import socket
+import time
+
+import pytest
+
+from artifact_store import (
+    ARCHIVE_INDEX_KEY, ArtifactStore, LocalBackend, S3Backend, check_application_id, is_application_id
+)
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+def write_job(work_dir, application_id, with_sources=True):
+    job_dir = os.path.join(work_dir, application_id)
+    os.makedirs(job_dir, exist_ok=True)
+    for file_name, content in (("resume.pdf", b"%PDF-1.5"), ("model_outputs.json", b"{}")):
+        with open(os.path.join(job_dir, file_name), "wb") as f:
+            f.write(content)
+    if with_sources:
+        os.makedirs(os.path.join(job_dir, "latex_src"))
+        with open(os.path.join(job_dir, "latex_src", "resume.tex"), "w") as f:
+            f.write("\\documentclass{article}")
+    return job_dir
+
+
+def age(path, seconds):
+    """Set the modification time of every file below path to seconds ago."""
+    then = time.time() - seconds
+    for directory, _, file_names in os.walk(path):
+        for file_name in file_names:
+            os.utime(os.path.join(directory, file_name), (then, then))
+
+
+@pytest.fixture
+def local_store(tmp_path):
+    work_dir = str(tmp_path / "artifacts")
+    os.makedirs(work_dir)
+    return ArtifactStore(LocalBackend(work_dir), work_dir)
+
+
+@pytest.fixture(scope="module")
+def s3_endpoint():
+    pytest.importorskip("boto3")
+    server_module = pytest.importorskip("moto.server")
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = server_module.ThreadedMotoServer(ip_address="127.0.0.1", port=port, verbose=False)
+    server.start()
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.stop()
+
+
+@pytest.fixture
+def s3_store(s3_endpoint, tmp_path, monkeypatch):
+    import boto3
+
+    for name, value in (
+        ("AWS_ACCESS_KEY_ID", "testing"), ("AWS_SECRET_ACCESS_KEY", "testing"), ("AWS_DEFAULT_REGION", "us-east-1")
+    ):
+        monkeypatch.setenv(name, value)
+    bucket = f"resumes-{tmp_path.name.lower().replace('_', '-')}"
+    boto3.client("s3", endpoint_url=s3_endpoint).create_bucket(Bucket=bucket)
+    return ArtifactStore(S3Backend(bucket, "artifacts", s3_endpoint), str(tmp_path / "work"))
+
+
+def test_reserved_and_unsafe_application_ids_are_rejected():
+    for application_id in ("archives", "", "..", "a/b", "a..b", ".hidden"):
+        assert not is_application_id(application_id)
+        with pytest.raises(ValueError):
+            check_application_id(application_id)
+    assert check_application_id("5c2b2828-c059-47db-9fce-ac86e8c4aafb") == "5c2b2828-c059-47db-9fce-ac86e8c4aafb"
+
+
+def test_maintenance_skips_files_and_directories_that_are_not_jobs(local_store):
+    write_job(local_store.work_dir, "job-1")
+    os.makedirs(os.path.join(local_store.work_dir, "notes"))
+    with open(os.path.join(local_store.work_dir, "notes", "todo.txt"), "w") as f:
+        f.write("not a job")
+    with open(os.path.join(local_store.work_dir, "batch_manifest.jsonl"), "w") as f:
+        f.write("{}\n")
+    age(local_store.work_dir, 10 * SECONDS_PER_DAY)
+
+    assert set(local_store.list_jobs()) == {"job-1"}
+    assert local_store.compact(SECONDS_PER_DAY) is not None
+    assert local_store.enforce_retention(max_age_seconds=0, max_bytes=0) != []
+    assert os.path.exists(os.path.join(local_store.work_dir, "notes", "todo.txt"))
+    assert os.path.exists(os.path.join(local_store.work_dir, "batch_manifest.jsonl"))
+
+
+def test_restored_job_is_not_compacted_again(local_store):
+    write_job(local_store.work_dir, "job-1", with_sources=False)
+    age(local_store.work_dir, 10 * SECONDS_PER_DAY)
+    assert local_store.compact(SECONDS_PER_DAY) is not None
+    assert not os.path.exists(local_store.job_dir("job-1"))
+
+    assert local_store.fetch("job-1", "resume.pdf") is not None
+    assert local_store.compact(SECONDS_PER_DAY) is None
+
+
+def test_s3_finalize_fetch_compact_and_restore(s3_store):
+    job_dir = write_job(s3_store.work_dir, "job-1")
+    assert s3_store.finalize("job-1")
+    assert not os.path.exists(job_dir)
+    assert {stored.key for stored in s3_store.backend.list()} == {"job-1/resume.pdf", "job-1/model_outputs.json"}
+    assert s3_store.exists("job-1")
+
+    path = s3_store.fetch("job-1", "resume.pdf")
+    with open(path, "rb") as f:
+        assert f.read() == b"%PDF-1.5"
+    os.remove(path)
+
+    archive_key = s3_store.compact(0, now=time.time() + SECONDS_PER_DAY)
+    assert archive_key is not None
+    assert {stored.key for stored in s3_store.backend.list()} == {archive_key, ARCHIVE_INDEX_KEY}
+    assert s3_store.exists("job-1")
+    assert s3_store.fetch("job-1", "model_outputs.json") is not None
+
+    assert s3_store.enforce_retention(max_bytes=0) == [archive_key]
+    assert s3_store.load_index() == {}
@@ -3,37 +3,122 @@ import os
 import sys
 import yaml
 from typing import List
-from jinja2 import Template
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+from src.metrics import span
 from src.responses import EducationResponse, SkillsResponse, HeadingData, ProjectsResponse, ExperienceResponse
 
-import subprocess
-import os
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+TEMPLATE_BYTECODE_CACHE_DIR = ".cache/jinja"
+
+# Section templates are parsed and compiled once per process and rendered many times. The
+# bytecode cache also spares new processes the compile step. Jinja's default {{ }} and {% %}
+# delimiters clash with LaTeX braces, so the templates use \VAR{}, \BLOCK{} and \#{} instead.
+os.makedirs(TEMPLATE_BYTECODE_CACHE_DIR, exist_ok=True)
+template_env = Environment(
+    loader=FileSystemLoader(TEMPLATE_DIR),
+    bytecode_cache=FileSystemBytecodeCache(TEMPLATE_BYTECODE_CACHE_DIR),
+    block_start_string=r"\BLOCK{",
+    block_end_string="}",
+    variable_start_string=r"\VAR{",
+    variable_end_string="}",
+    comment_start_string=r"\#{",
+    comment_end_string="}",
+    keep_trailing_newline=True,
+    auto_reload=False,
+    autoescape=False,
+)
+
+def render_template(template_name, **context):
+    """
+    Renders a template from the templates directory.
 
-import subprocess
-import os
+    Parameters:
+    template_name (str): File name of the template, e.g. "experience.tex.j2".
+    **context: Variables made available to the template.
+
+    Returns:
+    str: The rendered template.
+    """
+    with span("template.render", template=template_name):
+        return template_env.get_template(template_name).render(**context)
+
+# Intermediate files a resume build leaves next to resume.pdf
+BUILD_INTERMEDIATES = ("resume.aux", "resume.fdb_latexmk", "resume.fls", "resume.log", "resume.out")
+
+def remove_build_intermediates(output_path):
+    """
+    Remove the intermediate files of a resume build from its output directory.
+
+    Parameters:
+    output_path (str): The directory the resume was built in.
+    """
+    for file_name in BUILD_INTERMEDIATES:
+        try:
+            os.remove(os.path.join(output_path, file_name))
+        except FileNotFoundError:
+            pass
 
 def convert_tex_to_pdf(input_path, output_path):
     """
     Convert a LaTeX source file to a PDF.
 
+    The build runs entirely inside output_path, so concurrent builds for different output
+    directories never touch each other's files or the working directory.
+
     Parameters:
     input_path (str): The path to the LaTeX source file.
     output_path (str): The path where the output PDF should be saved.
     """
     try:
-        
+        latexmk_options = ["-interaction=nonstopmode", f"-output-directory={output_path}", "-jobname=resume"]
 
         # Run pdflatex to convert the .tex file to .pdf
-        subprocess.run(["latexmk", "-pdf", input_path], check=True)
-        subprocess.run(["latexmk", "-c"])
-        subprocess.run(["mv", "resume.pdf", output_path+"/resume.pdf"])
-        subprocess.run(["rm", "resume.aux", "resume.fdb_latexmk", "resume.fls", "resume.log", "resume.out", output_path+"/custom-commands.aux"], check=True)
+        subprocess.run(["latexmk", "-pdf", *latexmk_options, input_path], check=True, stdout=subprocess.DEVNULL)
+        subprocess.run(["latexmk", "-c", *latexmk_options, input_path], stdout=subprocess.DEVNULL)
+        remove_build_intermediates(output_path)
         print(f"PDF successfully generated at {output_path}")
     except subprocess.CalledProcessError as e:
         print(f"An error occurred while generating the PDF: {e}")
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
 
+def render_pdf_thumbnail(pdf_path, thumbnail_path, width=600):
+    """
+    Rasterize the first page of a PDF into a PNG thumbnail with pdftoppm.
+
+    The PNG is written atomically, so concurrent readers never see a partial thumbnail.
+
+    Parameters:
+    pdf_path (str): The path to the PDF.
+    thumbnail_path (str): The path of the PNG to write.
+    width (int): Width of the thumbnail in pixels, the height follows the page's aspect ratio.
+
+    Raises:
+    subprocess.CalledProcessError: If pdftoppm fails.
+    OSError: If pdftoppm is not installed.
+    """
+    output_prefix = f"{thumbnail_path}.tmp"
+    subprocess.run(
+        [
+            "pdftoppm", "-png", "-f", "1", "-l", "1", "-singlefile",
+            "-scale-to-x", str(width), "-scale-to-y", "-1", pdf_path, output_prefix
+        ],
+        check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    os.replace(f"{output_prefix}.png", thumbnail_path)
+
+
+def render_experience_section(experience_response: ExperienceResponse) -> str:
+    """
+    Renders the experience data as LaTeX.
+
+    Parameters:
+    experience_response (ExperienceResponse): The response object containing experience data.
+
+    Returns:
+    str: The rendered LaTeX source.
+    """
+    return render_template("experience.tex.j2", experiences=experience_response.experiences)
 
 def write_experience_to_latex(experience_response: ExperienceResponse, file_path: str = "experience.tex"):
     """
@@ -43,27 +128,7 @@ def write_experience_to_latex(experience_response: ExperienceResponse, file_path
     experience_response (ExperienceResponse): The response object containing experience data.
     file_path (str): The path to the LaTeX file to write.
     """
-    experiences = experience_response.experiences
-
-    # LaTeX template for experience
-    latex_template = r"""
-\section{Experience}
-\resumeSubHeadingListStart
-{% for exp in experiences %}
-\resumeSubheading
-    { {{ exp.company }} }{ {{ exp.duration }} }
-    { {{ exp.role }} | \emph{ {% for tool in exp.tools %}{{ tool }}{% if not loop.last %}, {% endif %}{% endfor %} } }{ {{ exp.location }} }
-    \resumeItemListStart
-    {% for responsibility in exp.responsibilities %}
-        \resumeItem{ {{ responsibility }} }
-    {% endfor %}
-    \resumeItemListEnd
-{% endfor %}
-\resumeSubHeadingListEnd
-"""
-    # Render the template using Jinja2
-    template = Template(latex_template)
-    rendered_content = template.render(experiences=experiences)
+    rendered_content = render_experience_section(experience_response)
 
     # Write the rendered LaTeX content to the file
     with open(file_path, "w") as file:
@@ -71,6 +136,19 @@ def write_experience_to_latex(experience_response: ExperienceResponse, file_path
 
     print(f"Experience section successfully written to {file_path}")
 
+
+def render_projects_section(projects_response: ProjectsResponse) -> str:
+    """
+    Renders the project data as LaTeX.
+
+    Parameters:
+    projects_response (ProjectsResponse): The response object containing project data.
+
+    Returns:
+    str: The rendered LaTeX source.
+    """
+    return render_template("projects.tex.j2", projects=projects_response.projects)
+
 def write_projects_to_latex(projects_response: ProjectsResponse, file_path: str = "projects.tex"):
     """
     Writes the project data to a LaTeX file.
@@ -79,26 +157,7 @@ def write_projects_to_latex(projects_response: ProjectsResponse, file_path: str
     projects_response (ProjectsResponse): The response object containing project data.
     file_path (str): The path to the LaTeX file to write.
     """
-    projects = projects_response.projects
-
-    # LaTeX template for projects
-    latex_template = r"""
-\section{Projects}
-\resumeSubHeadingListStart
-{% for project in projects %}
-\resumeProjectHeading
-    {\textbf{ {{ project.title }} } $|$ \emph{ {% for skill in project.skills %}{{ skill }}{% if not loop.last %}, {% endif %}{% endfor %} }}    {}
-\resumeItemListStart
-    {% for description in project.descriptions %}
-        \resumeItem{ {{ description }} }
-    {% endfor %}
-\resumeItemListEnd
-{% endfor %}
-\resumeSubHeadingListEnd
-"""
-    # Render the template using Jinja2
-    template = Template(latex_template)
-    rendered_content = template.render(projects=projects)
+    rendered_content = render_projects_section(projects_response)
 
     # Write the rendered LaTeX content to the file
     with open(file_path, "w") as file:
@@ -107,6 +166,18 @@ def write_projects_to_latex(projects_response: ProjectsResponse, file_path: str
     print(f"Projects section successfully written to {file_path}")
 
 
+def render_skills_section(skills_data: SkillsResponse) -> str:
+    """
+    Renders the skills data as LaTeX.
+
+    Parameters:
+    skills_data (SkillsResponse): The skills data to render.
+
+    Returns:
+    str: The rendered LaTeX source.
+    """
+    return render_template("skills.tex.j2", skills=skills_data.skills)
+
 def write_skills_to_latex(skills_data: SkillsResponse, file_path: str = "skills.tex"):
     """
     Writes the skills data to a LaTeX file.
@@ -115,23 +186,7 @@ def write_skills_to_latex(skills_data: SkillsResponse, file_path: str = "skills.
     skills_data (SkillsResponse): The skills data to write.
     file_path (str): The path to the LaTeX file to write.
     """
-    # LaTeX template for skills
-    latex_template = r"""
-%-----------PROGRAMMING SKILLS-----------%
-\section{Technical Skills}
-    \begin{itemize}[leftmargin=0.15in, label={}]
-    \small{
-    \item{
-    {% for skill in skills %}
-        \textbf{ {{ skill.category }} }:{: {{ skill.items|join(', ') }} } \\
-    {% endfor %}
-    }}
-    \end{itemize}
-"""
-
-    # Render the template using Jinja2
-    template = Template(latex_template)
-    rendered_content = template.render(skills=skills_data.skills)
+    rendered_content = render_skills_section(skills_data)
 
     # Write the rendered LaTeX content to the file
     with open(file_path, "w") as file:
@@ -140,6 +195,17 @@ def write_skills_to_latex(skills_data: SkillsResponse, file_path: str = "skills.
     print(f"Skills section successfully written to {file_path}")
 
 
+def render_education_section(education_data: EducationResponse) -> str:
+    """
+    Renders the education data as LaTeX.
+
+    Parameters:
+    education_data (EducationResponse): The education data to render.
+
+    Returns:
+    str: The rendered LaTeX source.
+    """
+    return render_template("education.tex.j2", education=education_data.education)
 
 def write_education_to_latex(education_data: EducationResponse, file_path: str = "education.tex"):
     """
@@ -149,27 +215,7 @@ def write_education_to_latex(education_data: EducationResponse, file_path: str =
     education_data (EducationResponse): The education data to write.
     file_path (str): The path to the LaTeX file to write.
     """
-    # LaTeX template for education
-    latex_template = r"""
-%-----------EDUCATION-----------%
-\section{Education}
-\resumeSubHeadingListStart
-{% for edu in education %}
-\resumeSubheading
-    { {{ edu.university }} }{ {{ edu.duration }} }
-    { {{ edu.degree }} {% if edu.gpa %}(GPA: {{ edu.gpa }}){% endif %} }{ {{ edu.location }} }
-    {% if edu.relevant_coursework %}
-    \resumeItemListStart
-        \resumeItem{\textbf{Relevant Coursework:} {{ edu.relevant_coursework|join(', ') }} }
-    \resumeItemListEnd
-    {% endif %}
-{% endfor %}
-\resumeSubHeadingListEnd
-"""
-
-    # Render the template using Jinja2
-    template = Template(latex_template)
-    rendered_content = template.render(education=education_data.education)
+    rendered_content = render_education_section(education_data)
 
     # Write the rendered LaTeX content to the file
     with open(file_path, "w") as file:
@@ -178,6 +224,18 @@ def write_education_to_latex(education_data: EducationResponse, file_path: str =
     print(f"Education section successfully written to {file_path}")
 
 
+def render_heading_section(heading_data: HeadingData) -> str:
+    """
+    Renders the heading data as LaTeX.
+
+    Parameters:
+    heading_data (HeadingData): The heading data to render.
+
+    Returns:
+    str: The rendered LaTeX source.
+    """
+    return render_template("heading.tex.j2", heading_data=heading_data)
+
 def write_heading_to_latex(heading_data: HeadingData, file_path: str = "heading.tex"):
     """
     Writes the heading data to a LaTeX file.
@@ -186,24 +244,7 @@ def write_heading_to_latex(heading_data: HeadingData, file_path: str = "heading.
     heading_data (HeadingData): The heading data to write.
     file_path (str): The path to the LaTeX file to write.
     """
-    # LaTeX template for heading
-    latex_template = r"""
-%----------HEADING----------%
-\begin{center}
-    \textbf{\Large \scshape {{ heading_data.name }} } \\ \vspace{1pt}
-
-    \href{tel:{{ heading_data.phone }}}{\seticon{faPhone}
-    \underline{ {{ heading_data.phone }} }} \quad
-    \href{mailto:{{ heading_data.email }}}{\seticon{faEnvelope} \underline{ {{ heading_data.email }} }} \quad
-    \href{https://www.linkedin.com/in/{{ heading_data.linkedin }}}{\seticon{faLinkedin} \underline{in/{{ heading_data.linkedin }}}} \quad
-    \href{https://github.com/{{ heading_data.github }}}{\seticon{faGithub} \underline{ {{ heading_data.github }} }}
-
-\end{center}
-    """
-
-    # Render the template using Jinja2
-    template = Template(latex_template)
-    rendered_content = template.render(heading_data=heading_data)
+    rendered_content = render_heading_section(heading_data)
 
     # Write the rendered LaTeX content to the file
     with open(file_path, "w") as file:
@@ -212,12 +253,14 @@ def write_heading_to_latex(heading_data: HeadingData, file_path: str = "heading.
     print(f"Heading section successfully written to {file_path}")
 
 
+# Prefer the LibYAML-backed loader, which parses several times faster, when PyYAML was built with it
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
 
 def load_resume_data(yaml_file_path="resume.yaml"):
     """Loads and parses the resume.yaml file."""
     with open(yaml_file_path, "r") as f:
         try:
-            resume_data = yaml.safe_load(f)
+            resume_data = yaml.load(f, Loader=YAML_LOADER)
             return resume_data
         except yaml.YAMLError as e:
             print(f"Error parsing YAML file: {e}")
@@ -290,65 +333,68 @@ def extract_skills_section(resume_data):
 
 
 
-def write_resume_dot_tex(path):
-    """
-    Writes the main LaTeX resume file with dynamically generated paths for included files.
+# Fixed preamble of resume.tex. It is identical for every resume, so it can be precompiled into a format file.
+RESUME_PREAMBLE = r"""
+\documentclass[letterpaper,10pt]{article}
 
-    Parameters:
-    path (str): The base directory where the LaTeX file and its included files are stored.
-    """
-    # Define the content of the LaTeX file with dynamic paths
-    latex_content = rf"""
-\documentclass[letterpaper,10pt]{{article}}
-
-\usepackage{{fontawesome5}}
-\usepackage{{latexsym}}
-\usepackage[empty]{{fullpage}}
-\usepackage{{titlesec}}
-\usepackage{{marvosym}}
-\usepackage[usenames,dvipsnames]{{color}}
-\usepackage{{verbatim}}
-\usepackage{{enumitem}}
-\usepackage[hidelinks]{{hyperref}}
-\usepackage{{fancyhdr}}
-\usepackage[english]{{babel}}
-\usepackage{{tabularx}}
-\input{{glyphtounicode}}
+\usepackage{fontawesome5}
+\usepackage{latexsym}
+\usepackage[empty]{fullpage}
+\usepackage{titlesec}
+\usepackage{marvosym}
+\usepackage[usenames,dvipsnames]{color}
+\usepackage{verbatim}
+\usepackage{enumitem}
+\usepackage[hidelinks]{hyperref}
+\usepackage{fancyhdr}
+\usepackage[english]{babel}
+\usepackage{tabularx}
+\input{glyphtounicode}
 
 % Custom font
-\usepackage[default]{{lato}}
+\usepackage[default]{lato}
 
-\pagestyle{{fancy}}
-\fancyhf{{}} % clear all header and footer fields
-\fancyfoot{{}}
-\renewcommand{{\headrulewidth}}{{0pt}}
-\renewcommand{{\footrulewidth}}{{0pt}}
+\pagestyle{fancy}
+\fancyhf{} % clear all header and footer fields
+\fancyfoot{}
+\renewcommand{\headrulewidth}{0pt}
+\renewcommand{\footrulewidth}{0pt}
 
 % Adjust margins
-\addtolength{{\oddsidemargin}}{{-0.5in}}
-\addtolength{{\evensidemargin}}{{-0.7in}}
-\addtolength{{\textwidth}}{{1in}}
-\addtolength{{\topmargin}}{{-0.5in}}
-\addtolength{{\textheight}}{{1.0in}}
+\addtolength{\oddsidemargin}{-0.5in}
+\addtolength{\evensidemargin}{-0.7in}
+\addtolength{\textwidth}{1in}
+\addtolength{\topmargin}{-0.5in}
+\addtolength{\textheight}{1.0in}
 
-\urlstyle{{same}}
+\urlstyle{same}
 
 \raggedbottom
 \raggedright
-\setlength{{\tabcolsep}}{{0in}}
+\setlength{\tabcolsep}{0in}
 
 % Sections formatting
-\titleformat{{\section}}{{
-\vspace{{-4pt}}\scshape\raggedright\large
-}}{{}}{{0em}}{{}}[\color{{black}}\titlerule\vspace{{-5pt}}]
+\titleformat{\section}{
+\vspace{-4pt}\scshape\raggedright\large
+}{}{0em}{}[\color{black}\titlerule\vspace{-5pt}]
 
 % Ensure that generate pdf is machine readable/ATS parsable
 \pdfgentounicode=1
+"""
+
+def write_resume_dot_tex(path):
+    """
+    Writes the main LaTeX resume file with dynamically generated paths for included files.
 
+    Parameters:
+    path (str): The base directory where the LaTeX file and its included files are stored.
+    """
+    # Define the content of the LaTeX file with dynamic paths
+    latex_content = RESUME_PREAMBLE + rf"""
 %-------------------------%
 % Custom commands
 \begin{{document}}
-\include{{{path}/custom-commands}}
+\input{{{path}/custom-commands}}
 
 %-------------------------------------------%
 %%%%%%  RESUME STARTS HERE  %%%%%
@@ -383,9 +429,8 @@ def write_resume_dot_tex(path):
     except Exception as e:
         print(f"An error occurred: {e}")
 
-def write_custom_commands_dot_tex(path):
-    # Define the content of the custom-commands.tex file
-    custom_commands_content = r"""
+# Custom LaTeX commands used by the section templates
+CUSTOM_COMMANDS = r"""
     %-------------------------%
     % Custom commands
     \newcommand{\resumeItem}[1]{
@@ -429,6 +474,10 @@ def write_custom_commands_dot_tex(path):
     \newcommand{\seticon}[1]{\textcolor{Black}{\csname #1\endcsname}}
     """
 
+def write_custom_commands_dot_tex(path):
+    # Define the content of the custom-commands.tex file
+    custom_commands_content = CUSTOM_COMMANDS
+
     # Specify the file path
     file_path = f"{path}/custom-commands.tex"
 
@@ -441,4 +490,49 @@ def write_custom_commands_dot_tex(path):
         print(f"An error occurred: {e}")
 
 
+def render_resume_document(heading_data, education_data, skills_data, experience_data, projects_data):
+    """
+    Renders the complete resume as a single LaTeX document.
+
+    Unlike write_resume_dot_tex, which pulls the custom commands and every section in from
+    separate files, the document is assembled in memory and needs no other files to compile.
+
+    Parameters:
+    heading_data (HeadingData): The heading data.
+    education_data (EducationResponse): The education data.
+    skills_data (SkillsResponse): The skills data.
+    experience_data (ExperienceResponse): The experience data.
+    projects_data (ProjectsResponse): The projects data.
+
+    Returns:
+    str: The LaTeX source of the whole resume.
+    """
+    return "".join([
+        RESUME_PREAMBLE,
+        "\n%-------------------------%\n% Custom commands\n\\begin{document}\n",
+        CUSTOM_COMMANDS,
+        "\n%-------------------------------------------%\n%%%%%%  RESUME STARTS HERE  %%%%%\n",
+        render_heading_section(heading_data),
+        render_education_section(education_data),
+        render_skills_section(skills_data),
+        render_experience_section(experience_data),
+        render_projects_section(projects_data),
+        "\n%-------------------------------------------%\n\\end{document}\n",
+    ])
+
+def write_resume_document(document, path):
+    """
+    Writes a single-document resume rendered by render_resume_document.
+
+    Parameters:
+    document (str): The LaTeX source of the whole resume.
+    path (str): The directory to write resume.tex to.
 
+    Returns:
+    str: The path of the written resume.tex.
+    """
+    file_path = f"{path}/resume.tex"
+    with span("file.write", file="resume.tex"), open(file_path, "w") as file:
+        file.write(document)
+    print(f"LaTeX file successfully written to {file_path}")
+    return file_path